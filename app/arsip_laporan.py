@@ -0,0 +1,119 @@
+import hashlib
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, lazyload
+
+from app import db
+from app.cache import SECTION_LAPAK, SECTION_SUPPLIER
+from app.metrics import record_cache
+from app.models import ArsipDetailLaporan, CacheVersion, Lapak, LaporanHarian, LaporanHarianProduk, Product
+
+# ===================================================================
+# ARSIP DETAIL LAPORAN TERKONFIRMASI
+# ===================================================================
+# Setelah dikonfirmasi, isi laporan tidak berubah lagi. Body JSON get_report_details
+# disusun sekali saat konfirmasi (atau saat pertama dibuka untuk laporan lama) dan
+# disimpan di tabel arsip_detail_laporan bersama SHA-1-nya, sehingga membuka detail
+# cukup satu baca berdasarkan primary key dan ETag-nya stabil lintas worker/restart.
+# Yang masih bisa mengubah isi hanya nama yang ikut tampil (supplier, lokasi lapak,
+# penanggung jawab): endpoint yang mengubahnya menghapus baris arsip terkait di
+# transaksi yang sama, lalu arsip disusun ulang saat dibuka berikutnya.
+# Produk belum punya endpoint ubah; jika ditambahkan, ia juga harus menghapus arsipnya.
+
+def laporan_untuk_detail(report_id):
+    return db.session.get(LaporanHarian, report_id, populate_existing=True, options=[
+        joinedload(LaporanHarian.lapak).joinedload(Lapak.penanggung_jawab),
+        joinedload(LaporanHarian.rincian_produk).joinedload(LaporanHarianProduk.product).joinedload(Product.supplier),
+        # Relasi lazy='subquery' yang tidak ikut tampil di detail
+        lazyload(LaporanHarian.lapak, Lapak.anggota), lazyload(LaporanHarian.rincian_produk, LaporanHarianProduk.product, Product.lapaks)
+    ])
+
+def susun_detail(report):
+    """Data detail laporan (isi "data" pada respons get_report_details)."""
+    # Mengelompokkan produk berdasarkan supplier
+    rincian_per_supplier = {}
+    for item in report.rincian_produk:
+        supplier_name = item.product.supplier.nama_supplier if item.product.supplier else "Produk Manual"
+        rincian_per_supplier.setdefault(supplier_name, []).append({
+            "nama_produk": item.product.nama_produk,
+            "stok_awal": item.stok_awal,
+            "stok_akhir": item.stok_akhir,
+            "terjual": item.jumlah_terjual,
+            "harga_jual": item.product.harga_jual,
+            "total_pendapatan": item.total_harga_jual,
+        })
+
+    return {
+        "id": report.id,
+        "tanggal": report.tanggal.strftime('%d %B %Y'),
+        "status": report.status,
+        "lokasi": report.lapak.lokasi,
+        "penanggung_jawab": report.lapak.penanggung_jawab.nama_lengkap,
+        "rincian_per_supplier": rincian_per_supplier,
+        "rekap_otomatis": {
+            "terjual_cash": report.pendapatan_cash,
+            "terjual_qris": report.pendapatan_qris,
+            "terjual_bca": report.pendapatan_bca,
+            "total_produk_terjual": report.total_produk_terjual,
+            "total_pendapatan": report.total_pendapatan,
+            "total_biaya_supplier": report.total_biaya_supplier
+        },
+        "rekap_manual": {
+            "terjual_cash": report.manual_pendapatan_cash,
+            "terjual_qris": report.manual_pendapatan_qris,
+            "terjual_bca": report.manual_pendapatan_bca,
+            # Menggunakan total dari rekap otomatis untuk konsistensi
+            "total_produk_terjual": report.total_produk_terjual,
+            "total_pendapatan": report.manual_total_pendapatan
+        }
+    }
+
+def _baris_arsip(report, data):
+    # Pemisah ringkas seperti jsonify di mode produksi
+    isi = current_app.json.dumps({"success": True, "data": data}, separators=(",", ":"))
+    return {"laporan_id": report.id, "lapak_id": report.lapak_id, "isi": isi, "etag": hashlib.sha1(isi.encode()).hexdigest()}
+
+def arsipkan_laporan(report_id):
+    """Dipanggil confirm_report setelah status diubah, di transaksi yang sama (belum ada request lain yang mengarsipkannya)."""
+    report = laporan_untuk_detail(report_id)
+    db.session.execute(db.insert(ArsipDetailLaporan), [_baris_arsip(report, susun_detail(report))])
+
+def simpan_arsip(report, data, versi):
+    """Arsipkan laporan terkonfirmasi yang dibuka sebelum terarsip (dalam transaksi pemanggil).
+
+    versi: token versi (current_versions()) yang dibaca sebelum laporan dimuat. Arsip hanya disimpan bila
+    token lapak & supplier belum berganti, agar nama yang diubah request lain di antara baca dan simpan
+    tidak ikut terarsip.
+    """
+    baris = _baris_arsip(report, data)
+    pilih = db.select(*(db.literal(value) for value in baris.values()))
+    for section in (SECTION_LAPAK, SECTION_SUPPLIER):
+        pilih = pilih.where(db.select(CacheVersion.version).where(CacheVersion.name == section).scalar_subquery() == versi[section])
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(ArsipDetailLaporan).from_select(list(baris), pilih))
+    except IntegrityError:
+        # Request lain sudah mengarsipkan laporan ini
+        pass
+
+def baca_arsip(report_id):
+    """(isi, etag) dari arsip, atau None jika laporan belum terarsip."""
+    arsip = db.session.query(ArsipDetailLaporan.isi, ArsipDetailLaporan.etag)\
+        .filter(ArsipDetailLaporan.laporan_id == report_id).first()
+    record_cache('detail_laporan', arsip is not None)
+    return arsip
+
+# --- INVALIDASI (DALAM TRANSAKSI PERUBAHAN NAMA) ---
+def hapus_arsip_lapak(lapak_id):
+    ArsipDetailLaporan.query.filter(ArsipDetailLaporan.lapak_id == lapak_id).delete(synchronize_session=False)
+
+def hapus_arsip_penanggung_jawab(admin_id):
+    lapak_ids = db.select(Lapak.id).where(Lapak.user_id == admin_id)
+    ArsipDetailLaporan.query.filter(ArsipDetailLaporan.lapak_id.in_(lapak_ids)).delete(synchronize_session=False)
+
+def hapus_arsip_supplier(supplier_id):
+    laporan_ids = db.select(LaporanHarianProduk.laporan_id)\
+        .join(Product, Product.id == LaporanHarianProduk.product_id)\
+        .where(Product.supplier_id == supplier_id)
+    ArsipDetailLaporan.query.filter(ArsipDetailLaporan.laporan_id.in_(laporan_ids)).delete(synchronize_session=False)
@@ -0,0 +1,95 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+from werkzeug.utils import import_string
+
+from app import db
+from app.metrics import record_cache
+from app.models import CacheVersion
+
+# ===================================================================
+# CACHE DATA DENGAN INVALIDASI BERVERSI
+# ===================================================================
+# Setiap bagian data punya token versi di tabel cache_version. Penulis mengganti
+# token di transaksi yang sama dengan perubahan datanya; pembaca mengambil semua
+# token dengan satu query kecil dan memakai token itu sebagai bagian dari key
+# cache dan ETag. Karena token disimpan di database, invalidasi berlaku untuk
+# semua proses worker, dan entry lama cukup dibiarkan tergusur LRU.
+SECTION_ADMIN = 'admin'
+SECTION_LAPAK = 'lapak'
+SECTION_SUPPLIER = 'supplier'
+SECTION_SUMMARY = 'summary'
+ALL_SECTIONS = (SECTION_ADMIN, SECTION_LAPAK, SECTION_SUPPLIER, SECTION_SUMMARY)
+
+@event.listens_for(CacheVersion.__table__, 'after_create')
+def _initial_versions(table, connection, **kw):
+    # Token acak sejak tabel dibuat: database baru (init-db, seed-db, drop_all) tidak
+    # pernah memakai token yang sama dengan database sebelumnya di cache proses ini
+    connection.execute(table.insert(), [{"name": name, "version": uuid.uuid4().hex} for name in ALL_SECTIONS])
+
+class MemoryCache:
+    """Cache LRU in-process yang aman dipakai banyak thread."""
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+class NullCache:
+    """Backend tanpa penyimpanan (CACHE_BACKEND=none), untuk menonaktifkan cache."""
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+def init_cache(app):
+    """Pilih backend dari CACHE_BACKEND: 'memory', 'none', atau path kelas ('modul:Kelas') dengan get/set."""
+    backend = app.config['CACHE_BACKEND']
+    if backend == 'memory':
+        cache = MemoryCache(app.config['CACHE_MAX_ENTRIES'])
+    elif backend == 'none':
+        cache = NullCache()
+    else:
+        cache = import_string(backend)()
+    app.extensions['data_cache'] = cache
+
+def bump_versions(*sections):
+    """Ganti token versi bagian data (dalam transaksi pemanggil; ikut batal jika di-rollback)."""
+    token = uuid.uuid4().hex
+    updated = CacheVersion.query.filter(CacheVersion.name.in_(sections))\
+        .update({CacheVersion.version: token}, synchronize_session=False)
+    if updated < len(sections):
+        existing = {name for (name,) in db.session.query(CacheVersion.name).filter(CacheVersion.name.in_(sections))}
+        db.session.add_all(CacheVersion(name=name, version=token) for name in sections if name not in existing)
+
+def current_versions():
+    """Semua token versi dalam satu query."""
+    versions = dict(db.session.query(CacheVersion.name, CacheVersion.version))
+    return {section: versions.get(section, '0') for section in ALL_SECTIONS}
+
+def cached(name, key, build):
+    """Ambil nilai dari cache atau bangun ulang; key harus memuat token versi datanya."""
+    cache = current_app.extensions['data_cache']
+    value = cache.get((name, key))
+    record_cache(name, value is not None)
+    if value is None:
+        value = build()
+        cache.set((name, key), value)
+    return value
@@ -0,0 +1,287 @@
+import click
+import datetime
+import random
+from datetime import timedelta
+from flask.cli import with_appcontext
+
+from app import db
+
+# ===================================================================
+# CLI COMMANDS UNTUK INISIALISASI & SEEDING DATABASE
+# ===================================================================
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    db.create_all()
+    print("Database telah diinisialisasi.")
+
+@click.command("upgrade-db")
+@with_appcontext
+def upgrade_db_command():
+    """Memperbarui penjualan.db lama: membuat tabel dan index yang belum ada tanpa menghapus data."""
+    db.create_all()
+    from app.migrasi import migrate_money_columns, migrate_password_columns, migrate_username_columns
+    migrated = migrate_money_columns()
+    if migrated:
+        print(f"Kolom uang diubah ke rupiah bulat: {', '.join(migrated)}")
+    try:
+        migrated = migrate_username_columns()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if migrated:
+        print(f"Kolom username_lower ditambahkan: {', '.join(migrated)}")
+    migrated = migrate_password_columns()
+    if migrated:
+        print(f"Kolom password diperlebar: {', '.join(migrated)}")
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    from app.urutan import inisialisasi_urutan_register
+    inisialisasi_urutan_register()
+    db.session.commit()
+    from app.ringkasan import rebuild_ringkasan
+    rebuild_ringkasan()
+    from app.ledger import backfill_ledger
+    from app.models import MutasiSupplier
+    if db.session.query(MutasiSupplier.id).first() is None:
+        hasil = backfill_ledger()
+        db.session.commit()
+        print(f"Ledger supplier dibangun: {hasil['mutasi']} mutasi ({hasil['penyesuaian']} penyesuaian), {hasil['snapshot']} snapshot akhir bulan.")
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    print("Database telah diperbarui (index, tabel ringkasan & statistik query planner).")
+
+@click.command("rebuild-ringkasan")
+@with_appcontext
+def rebuild_ringkasan_command():
+    """Mengisi ulang tabel ringkasan harian dari seluruh laporan terkonfirmasi dan pembayaran."""
+    from app.ringkasan import rebuild_ringkasan
+    rebuild_ringkasan()
+    print("Tabel ringkasan telah dibangun ulang.")
+
+@click.command("snapshot-saldo")
+@click.option("--tanggal", default=None, help="Tanggal snapshot YYYY-MM-DD (default kemarin).")
+@with_appcontext
+def snapshot_saldo_command(tanggal):
+    """Menyimpan snapshot saldo semua supplier pada akhir suatu hari (jalankan harian lewat cron)."""
+    from app.ledger import buat_snapshot
+    tanggal = datetime.datetime.strptime(tanggal, '%Y-%m-%d').date() if tanggal else datetime.date.today() - timedelta(days=1)
+    try:
+        jumlah = buat_snapshot(tanggal)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    db.session.commit()
+    print(f"Snapshot saldo {tanggal.isoformat()} disimpan untuk {jumlah} supplier.")
+
+@click.command("check-ledger")
+@with_appcontext
+def check_ledger_command():
+    """Menghitung ulang saldo dari seluruh ledger dan membandingkannya dengan snapshot & saldo berjalan."""
+    from app.ledger import cek_ledger
+    jumlah, problems = cek_ledger()
+    for problem in problems:
+        print(f"SELISIH {problem}")
+    if problems:
+        raise SystemExit(f"Ledger tidak konsisten: {len(problems)} selisih dari {jumlah} mutasi.")
+    print(f"Ledger konsisten: {jumlah} mutasi diperiksa.")
+
+@click.command("run-jobs")
+@click.option("--workers", type=int, default=None, help="Jumlah thread worker (default JOB_WORKERS, minimal 1).")
+@with_appcontext
+def run_jobs_command(workers):
+    """Proses worker khusus antrian job laporan (dipakai jika server web berjalan dengan JOB_WORKERS=0)."""
+    import threading
+    from flask import current_app
+    from app.jobs import job_runner
+    runner = job_runner(current_app._get_current_object())
+    workers = workers or max(1, current_app.config['JOB_WORKERS'])
+    stop = threading.Event()
+    threads = [threading.Thread(target=runner.loop, args=(stop,), name=f"job-worker-{i}") for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    print(f"Worker job berjalan ({workers} thread). Tekan Ctrl+C untuk berhenti.")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            threads[0].join(timeout=1)
+    except KeyboardInterrupt:
+        # Job yang sedang berjalan diselesaikan dulu; job yang terputus diambil ulang setelah lease habis
+        stop.set()
+        runner.wake()
+        for thread in threads:
+            thread.join()
+
+# --- DATA DEMO BAWAAN (dipakai lebih dulu sebelum data buatan) ---
+DEMO_LAPAK = [
+    ("Lapak Kopo", dict(nama_lengkap="Andi (PJ Kopo)", nik="1111111111111111", username="andi", email="andi@app.com", nomor_kontak="0811")),
+    ("Lapak Buah Batu", dict(nama_lengkap="Budi (PJ Buah Batu)", nik="2222222222222222", username="budi", email="budi@app.com", nomor_kontak="0812")),
+]
+DEMO_SUPPLIER = [
+    (dict(nama_supplier="Roti Lezat Bakery", username="roti", kontak="0851", metode_pembayaran="BCA", nomor_rekening="112233"), "hash",
+     [("Roti Tawar Gandum", 12000, 15000), ("Roti Sobek Coklat", 10000, 13000), ("Donat Gula", 4000, 6000)]),
+    # Dua supplier demo ini sengaja masih menyimpan password teks biasa (data lama)
+    (dict(nama_supplier="Minuman Segar Haus", username="minuman", kontak="0852", metode_pembayaran="DANA", nomor_rekening="08521234"), "plain",
+     [("Es Teh Manis", 3000, 5000), ("Jus Jambu", 6000, 8000), ("Kopi Susu Gula Aren", 15000, 18000)]),
+    (dict(nama_supplier="Cemilan Gurih Nusantara", username="snack", kontak="0853", metode_pembayaran="BCA", nomor_rekening="445566"), "plain",
+     [("Keripik Singkong Balado", 8000, 10000), ("Tahu Crispy", 7000, 10000)]),
+]
+# Password untuk semua akun buatan (di-hash sekali saja)
+GENERATED_PASSWORD = "demo"
+BULK_CHUNK_SIZE = 20000
+
+def _reset_sequences(models):
+    """PostgreSQL: majukan sequence id setelah insert dengan id yang ditentukan sendiri."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"))
+
+def _bulk_insert(model, rows):
+    """Insert banyak baris sekaligus (executemany) dalam potongan agar memori tetap kecil."""
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        db.session.execute(model.__table__.insert(), rows[start:start + BULK_CHUNK_SIZE])
+
+@click.command("seed-db")
+@click.option("--days", default=90, show_default=True, help="Jumlah hari data historis.")
+@click.option("--lapaks", default=2, show_default=True, help="Jumlah lapak (2 pertama adalah lapak demo).")
+@click.option("--suppliers", default=3, show_default=True, help="Jumlah supplier (3 pertama adalah supplier demo).")
+@click.option("--products-per-supplier", default=3, show_default=True, help="Jumlah produk untuk setiap supplier buatan.")
+@click.option("--seed", default=None, type=int, help="Seed random agar data bisa direproduksi.")
+@with_appcontext
+def seed_db_command(days, lapaks, suppliers, products_per_supplier, seed):
+    """Menghapus database dan membuat data demo dengan skala yang bisa diatur (bulk insert)."""
+    from app.models import Admin, Supplier, Lapak, Product, SupplierBalance, LaporanHarian, LaporanHarianProduk, PembayaranSupplier, NomorUrut
+    from flask import current_app
+    from werkzeug.security import generate_password_hash
+    from app.ringkasan import rebuild_ringkasan
+    from app.ledger import backfill_ledger
+    from app.urutan import URUTAN_REGISTER_SUPPLIER
+    from app.cache import bump_versions, ALL_SECTIONS
+
+    rng = random.Random(seed)
+    db.drop_all()
+    db.create_all()
+    print("Database dibersihkan...")
+
+    # ===================================================================
+    ## 1. Pengguna (Owner & PJ Lapak) dan Lapak
+    # ===================================================================
+    hash_method = current_app.config['PASSWORD_HASH_METHOD']
+    generated_hash = generate_password_hash(GENERATED_PASSWORD, hash_method)
+    admin_rows = [dict(id=1, nama_lengkap="Owner Utama", nik="0000000000000000", username="owner", email="owner@app.com", nomor_kontak="0", password=generate_password_hash("owner", hash_method))]
+    lapak_rows = []
+    for i in range(lapaks):
+        admin_id, lapak_id = i + 2, i + 1
+        if i < len(DEMO_LAPAK):
+            lokasi, pj = DEMO_LAPAK[i]
+            admin_rows.append(dict(id=admin_id, password=generate_password_hash(pj["username"], hash_method), **pj))
+        else:
+            lokasi = f"Lapak {lapak_id:03d}"
+            admin_rows.append(dict(id=admin_id, nama_lengkap=f"PJ Lapak {lapak_id:03d}", nik=f"{admin_id:016d}", username=f"pj{lapak_id:03d}",
+                                   email=f"pj{lapak_id:03d}@app.com", nomor_kontak=None, password=generated_hash))
+        lapak_rows.append(dict(id=lapak_id, lokasi=lokasi, user_id=admin_id))
+    _bulk_insert(Admin, admin_rows)
+    _bulk_insert(Lapak, lapak_rows)
+    print(f"=> {len(admin_rows)} pengguna dan {len(lapak_rows)} lapak berhasil dibuat.")
+
+    # ===================================================================
+    ## 2. Supplier & Produk
+    # ===================================================================
+    supplier_rows, product_rows = [], []
+    for i in range(suppliers):
+        supplier_id = i + 1
+        if i < len(DEMO_SUPPLIER):
+            info, password_kind, produk = DEMO_SUPPLIER[i]
+            password = generate_password_hash(info["username"], hash_method) if password_kind == "hash" else info["username"]
+        else:
+            info = dict(nama_supplier=f"Supplier {supplier_id:03d}", username=f"supplier{supplier_id:03d}", kontak=None,
+                        metode_pembayaran=rng.choice(["BCA", "DANA"]), nomor_rekening=f"{supplier_id:08d}")
+            password = generated_hash
+            produk = []
+            for j in range(products_per_supplier):
+                harga_beli = rng.randrange(2000, 20000, 500)
+                produk.append((f"Produk {supplier_id:03d}-{j + 1:02d}", harga_beli, harga_beli + rng.randrange(1000, 5000, 500)))
+        supplier_rows.append(dict(id=supplier_id, nomor_register=f"REG{supplier_id:03d}", alamat=None, password=password, **info))
+        for nama, harga_beli, harga_jual in produk:
+            product_rows.append(dict(id=len(product_rows) + 1, nama_produk=nama, supplier_id=supplier_id,
+                                     harga_beli=harga_beli, harga_jual=harga_jual, is_manual=False))
+    _bulk_insert(Supplier, supplier_rows)
+    _bulk_insert(NomorUrut, [dict(nama=URUTAN_REGISTER_SUPPLIER, nilai=len(supplier_rows))])
+    _bulk_insert(Product, product_rows)
+    print(f"=> {len(supplier_rows)} supplier dengan total {len(product_rows)} produk berhasil dibuat.")
+
+    # ===================================================================
+    ## 3. Data Transaksi Historis (Laporan & Pembayaran), ID ditentukan di Python
+    # ===================================================================
+    print(f"Membuat data transaksi historis ({days} hari)...")
+    today = datetime.date.today()
+    balances = {row["id"]: 0 for row in supplier_rows}
+    report_rows, rincian_rows, payment_rows = [], [], []
+    report_count = rincian_count = 0
+
+    def flush_batch():
+        _bulk_insert(LaporanHarian, report_rows)
+        _bulk_insert(LaporanHarianProduk, rincian_rows)
+        report_rows.clear()
+        rincian_rows.clear()
+
+    for i in range(days, 0, -1):
+        current_date = today - timedelta(days=i)
+
+        for lapak in lapak_rows:
+            if rng.random() >= 0.85 or not product_rows:
+                continue
+            status = 'Menunggu Konfirmasi' if i <= 10 and rng.random() < 0.5 else 'Terkonfirmasi'
+            report_count += 1
+            total_pendapatan = total_biaya = total_terjual = 0
+
+            # Pilih beberapa produk secara acak untuk dijual hari itu
+            for product in rng.sample(product_rows, k=min(len(product_rows), rng.randint(3, 6))):
+                stok_awal = rng.randint(10, 30)
+                terjual = rng.randint(1, stok_awal - 2)
+                total_harga_jual = terjual * product["harga_jual"]
+                total_harga_beli = terjual * product["harga_beli"]
+                rincian_count += 1
+                rincian_rows.append(dict(id=rincian_count, laporan_id=report_count, product_id=product["id"],
+                                         stok_awal=stok_awal, stok_akhir=stok_awal - terjual, jumlah_terjual=terjual,
+                                         total_harga_jual=total_harga_jual, total_harga_beli=total_harga_beli))
+                total_pendapatan += total_harga_jual
+                total_biaya += total_harga_beli
+                total_terjual += terjual
+                if status == 'Terkonfirmasi':
+                    balances[product["supplier_id"]] += total_harga_beli
+
+            report_rows.append(dict(id=report_count, lapak_id=lapak["id"], tanggal=current_date, status=status,
+                                    total_pendapatan=total_pendapatan, total_biaya_supplier=total_biaya,
+                                    total_produk_terjual=total_terjual, pendapatan_cash=total_pendapatan // 2,
+                                    pendapatan_qris=total_pendapatan - total_pendapatan // 2, pendapatan_bca=0,
+                                    manual_pendapatan_cash=None, manual_pendapatan_qris=None, manual_pendapatan_bca=None,
+                                    manual_total_pendapatan=total_pendapatan))
+
+        # Rata-rata 0.1 pembayaran per hari untuk setiap 3 supplier, tidak melebihi tagihan
+        for supplier in supplier_rows:
+            if rng.random() < 0.1 / 3 and balances[supplier["id"]] > 0:
+                jumlah = min(rng.randint(50000, 200000), balances[supplier["id"]])
+                balances[supplier["id"]] -= jumlah
+                payment_rows.append(dict(id=len(payment_rows) + 1, supplier_id=supplier["id"], tanggal_pembayaran=current_date,
+                                         jumlah_pembayaran=jumlah, metode_pembayaran=supplier["metode_pembayaran"]))
+
+        if len(rincian_rows) >= BULK_CHUNK_SIZE:
+            flush_batch()
+
+    flush_batch()
+    _bulk_insert(PembayaranSupplier, payment_rows)
+    _bulk_insert(SupplierBalance, [dict(id=sid, supplier_id=sid, balance=balance) for sid, balance in balances.items()])
+    _reset_sequences([Admin, Lapak, Supplier, Product, SupplierBalance, LaporanHarian, LaporanHarianProduk, PembayaranSupplier])
+    # Token versi baru agar cache/ETag dari database sebelumnya tidak terpakai lagi
+    bump_versions(*ALL_SECTIONS)
+    db.session.commit()
+    print(f"=> {report_count} laporan, {rincian_count} rincian dan {len(payment_rows)} pembayaran berhasil dibuat.")
+
+    rebuild_ringkasan()
+    print("=> Tabel ringkasan berhasil dibangun.")
+    hasil = backfill_ledger()
+    db.session.commit()
+    print(f"=> Ledger supplier berhasil dibangun ({hasil['mutasi']} mutasi, {hasil['snapshot']} snapshot akhir bulan).")
+    print(f"\nDatabase siap untuk demo! Akun buatan memakai password '{GENERATED_PASSWORD}'. Silakan jalankan aplikasi.")
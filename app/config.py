@@ -0,0 +1,100 @@
+import os
+
+# ===================================================================
+# KONFIGURASI APLIKASI (DIBACA DARI ENVIRONMENT)
+# ===================================================================
+DEFAULT_DATABASE_URI = 'sqlite:///penjualan.db'
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def config_from_env():
+    """Kumpulkan konfigurasi dari environment saat aplikasi dibuat (bukan saat modul di-import)."""
+    database_uri = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URI)
+    # Beberapa penyedia hosting masih memakai skema lama "postgres://"
+    if database_uri.startswith('postgres://'):
+        database_uri = 'postgresql://' + database_uri[len('postgres://'):]
+
+    return {
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'kunci-rahasia-katanya'),
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        # Ukuran pool hanya dipakai untuk database server (PostgreSQL, dll.)
+        'DB_POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'DB_MAX_OVERFLOW': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'DB_POOL_TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'DB_POOL_RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'DB_POOL_PRE_PING': _env_bool('DB_POOL_PRE_PING', True),
+        # Pragma SQLite untuk produksi: WAL agar pembaca tidak diblokir penulis,
+        # busy_timeout agar penulis menunggu (bukan langsung "database is locked").
+        # Semua nilai bisa diganti lewat environment SQLITE_<NAMA_PRAGMA>.
+        'SQLITE_PRAGMAS': {
+            'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+            'busy_timeout': os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'),
+            'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+            'cache_size': os.environ.get('SQLITE_CACHE_SIZE', '-20000'),
+            'mmap_size': os.environ.get('SQLITE_MMAP_SIZE', '268435456'),
+            'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY'),
+        },
+        # Server produksi (wsgi.py / gunicorn.conf.py)
+        'WEB_HOST': os.environ.get('WEB_HOST', '0.0.0.0'),
+        'WEB_PORT': int(os.environ.get('WEB_PORT', os.environ.get('PORT', 5001))),
+        'WEB_WORKERS': int(os.environ.get('WEB_WORKERS', (os.cpu_count() or 1) * 2 + 1)),
+        'WEB_THREADS': int(os.environ.get('WEB_THREADS', 4)),
+        'WEB_KEEPALIVE': int(os.environ.get('WEB_KEEPALIVE', 5)),
+        'WEB_TIMEOUT': int(os.environ.get('WEB_TIMEOUT', 60)),
+        'WEB_GRACEFUL_TIMEOUT': int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)),
+        'WEB_MAX_REQUESTS': int(os.environ.get('WEB_MAX_REQUESTS', 0)),
+        'WEB_PRELOAD': _env_bool('WEB_PRELOAD', True),
+        'WEB_ACCESS_LOG': _env_bool('WEB_ACCESS_LOG', False),
+        # Cache data (dashboard owner dll.): 'memory', 'none', atau 'modul:Kelas' dengan method get/set
+        'CACHE_BACKEND': os.environ.get('CACHE_BACKEND', 'memory'),
+        'CACHE_MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 256)),
+        # Endpoint /metrics (format teks Prometheus)
+        'METRICS_ENABLED': _env_bool('METRICS_ENABLED', True),
+        'METRICS_LEDGER_ROWS_TTL': float(os.environ.get('METRICS_LEDGER_ROWS_TTL', 60)),
+        # Instrumentasi SQL per request (header Server-Timing, log terstruktur, slow-query log, deteksi N+1)
+        'SQL_INSTRUMENTATION': _env_bool('SQL_INSTRUMENTATION', False),
+        'SLOW_QUERY_MS': float(os.environ.get('SLOW_QUERY_MS', 100)),
+        'SLOW_QUERY_LOG': os.environ.get('SLOW_QUERY_LOG'),
+        'N_PLUS_ONE_THRESHOLD': int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10)),
+        # Antrian job laporan: thread worker per proses (0 = hanya lewat `flask run-jobs`),
+        # batas job yang berjalan bersamaan di semua proses, dan pengulangan saat gagal
+        'JOB_WORKERS': int(os.environ.get('JOB_WORKERS', 2)),
+        'JOB_MAX_CONCURRENT': int(os.environ.get('JOB_MAX_CONCURRENT', 2)),
+        'JOB_MAX_ATTEMPTS': int(os.environ.get('JOB_MAX_ATTEMPTS', 3)),
+        'JOB_RETRY_DELAY': float(os.environ.get('JOB_RETRY_DELAY', 10)),
+        'JOB_LEASE_SECONDS': int(os.environ.get('JOB_LEASE_SECONDS', 600)),
+        'JOB_POLL_INTERVAL': float(os.environ.get('JOB_POLL_INTERVAL', 5)),
+        'JOB_RESULT_TTL': int(os.environ.get('JOB_RESULT_TTL', 7 * 24 * 3600)),
+        'JOB_PURGE_INTERVAL': float(os.environ.get('JOB_PURGE_INTERVAL', 600)),
+        # Hash password: metode Werkzeug (mis. 'scrypt' atau 'pbkdf2:sha256:600000'), thread pool
+        # per proses (0 = di thread request), antrian maksimum dan detik menunggu sebelum ditolak (503)
+        'PASSWORD_HASH_METHOD': os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        'PASSWORD_HASH_WORKERS': int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+        'PASSWORD_HASH_QUEUE': int(os.environ.get('PASSWORD_HASH_QUEUE', 16)),
+        'PASSWORD_HASH_TIMEOUT': float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10)),
+    }
+
+def engine_options(config):
+    """Opsi create_engine sesuai backend: pool berukuran untuk server DB, default untuk SQLite."""
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        options = {}
+    else:
+        options = {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        }
+    # SQLite in-memory memakai pool satu koneksi dari Flask-SQLAlchemy; selain itu QueuePool yang diukur
+    in_memory = uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+    if config['METRICS_ENABLED'] and not in_memory:
+        from app.metrics import TimedQueuePool
+        options['poolclass'] = TimedQueuePool
+    return options
@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# ===================================================================
+# INSTRUMENTASI SQL PER REQUEST (OPT-IN: SQL_INSTRUMENTATION=1)
+# ===================================================================
+# Jumlah statement terlambat yang disertakan di log & header Server-Timing
+SLOWEST_COUNT = 3
+STATEMENT_PREVIEW = 200
+
+sql_logger = logging.getLogger('app.sql')
+slow_query_logger = logging.getLogger('app.slow_query')
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+
+def statement_shape(statement):
+    """Bentuk statement tanpa variasi panjang daftar IN, untuk mendeteksi pola N+1."""
+    return _PLACEHOLDER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+def _explain(cursor, dialect_name, statement, parameters):
+    """Jalankan EXPLAIN langsung di koneksi DBAPI (tidak memicu event SQLAlchemy lagi)."""
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect_name == 'sqlite' else 'EXPLAIN '
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        return [' '.join(str(col) for col in row) for row in explain_cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN gagal: {e}"]
+    finally:
+        explain_cursor.close()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _handle_error(exception_context):
+    # Statement gagal tidak memicu after_cursor_execute; buang waktu mulainya
+    starts = exception_context.connection.info.get('query_start') if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+def _make_after_cursor_execute(slow_query_ms):
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+        if not has_request_context() or 'sql_stats' not in g:
+            return
+        stats = g.sql_stats
+        stats['count'] += 1
+        stats['db_ms'] += elapsed_ms
+        stats['shapes'][statement_shape(statement)] += 1
+        stats['slowest'] = sorted(stats['slowest'] + [(elapsed_ms, statement)], key=lambda s: -s[0])[:SLOWEST_COUNT]
+
+        if elapsed_ms >= slow_query_ms:
+            slow_query_logger.warning(json.dumps({
+                "path": request.path,
+                "ms": round(elapsed_ms, 2),
+                "statement": statement,
+                "params": repr(parameters),
+                "plan": None if executemany else _explain(cursor, conn.dialect.name, statement, parameters),
+            }))
+    return after_cursor_execute
+
+def _start_request():
+    g.sql_stats = {'count': 0, 'db_ms': 0.0, 'shapes': Counter(), 'slowest': [], 'start': time.perf_counter()}
+
+def _make_finish_request(n_plus_one_threshold):
+    def finish_request(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats['start']) * 1000
+        repeated = [(shape, n) for shape, n in stats['shapes'].most_common() if n > n_plus_one_threshold]
+
+        timings = [f'db;desc="{stats["count"]} queries";dur={stats["db_ms"]:.2f}', f'app;dur={total_ms:.2f}']
+        timings += [f'sql-{i};dur={ms:.2f}' for i, (ms, _) in enumerate(stats['slowest'], 1)]
+        response.headers.add('Server-Timing', ', '.join(timings))
+
+        line = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": stats['count'],
+            "db_ms": round(stats['db_ms'], 2),
+            "total_ms": round(total_ms, 2),
+            "slowest": [{"ms": round(ms, 2), "statement": statement[:STATEMENT_PREVIEW]} for ms, statement in stats['slowest']],
+            "n_plus_one": [{"count": n, "statement": shape[:STATEMENT_PREVIEW]} for shape, n in repeated],
+        }
+        if repeated:
+            sql_logger.warning(json.dumps(line))
+        else:
+            sql_logger.info(json.dumps(line))
+        return response
+    return finish_request
+
+def _configure_slow_query_log(path):
+    """Tulis slow-query log ke file terpisah (sekali saja walau create_app dipanggil berulang)."""
+    if not path:
+        return
+    path = os.path.abspath(path)
+    for handler in slow_query_logger.handlers:
+        if getattr(handler, 'baseFilename', None) == path:
+            return
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_query_logger.addHandler(handler)
+
+def init_instrumentation(app, engines):
+    """Pasang pencatat statement pada engine dan hook request pada aplikasi."""
+    _configure_slow_query_log(app.config['SLOW_QUERY_LOG'])
+    after_cursor_execute = _make_after_cursor_execute(app.config['SLOW_QUERY_MS'])
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_make_finish_request(app.config['N_PLUS_ONE_THRESHOLD']))
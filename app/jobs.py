@@ -0,0 +1,212 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy import and_, func, or_
+from werkzeug.utils import import_string
+
+from app import db
+from app.metrics import metrics
+from app.models import JobLaporan
+
+logger = logging.getLogger('app.jobs')
+
+# ===================================================================
+# ANTRIAN JOB LAPORAN (TABEL DATABASE + THREAD WORKER, TANPA BROKER)
+# ===================================================================
+# Job disimpan di tabel job_laporan sehingga semua proses worker web melihat
+# antrian yang sama. Worker mengklaim job dengan satu UPDATE bersyarat (di
+# SQLite penulis berjalan bergantian, jadi dua worker tidak bisa mengklaim job
+# yang sama); klaim memberi lease, dan job yang lease-nya habis (worker mati
+# di tengah jalan) boleh diambil ulang. Job yang gagal diulang dengan jeda
+# bertingkat sampai JOB_MAX_ATTEMPTS, lalu ditandai Gagal. Job yang sudah selesai
+# atau gagal (beserta file hasilnya) dihapus JOB_RESULT_TTL detik setelah selesai.
+# Polling antrian kosong hanya membaca (SELECT): transaksi tulis, yang di SQLite
+# memegang lock tulis seluruh database, baru dibuka jika memang ada job atau
+# job kedaluwarsa, dan pembersihan hanya dicek tiap JOB_PURGE_INTERVAL per proses.
+JOB_ANTRI = 'Antri'
+JOB_DIPROSES = 'Diproses'
+JOB_SELESAI = 'Selesai'
+JOB_GAGAL = 'Gagal'
+
+# jenis job -> fungsi pembuat file (dipanggil dengan parameter job, mengembalikan (nama_file, content_type, bytes))
+JOB_HANDLERS = {
+    'statement_supplier': 'app.statement:build_supplier_statement',
+}
+
+# Kunci advisory PostgreSQL untuk klaim job (angka bebas, unik di aplikasi ini)
+KUNCI_KLAIM_JOB = 0x6A6F62
+
+def _now():
+    return datetime.datetime.now()
+
+def _params_json(params):
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+def job_to_dict(job):
+    return {
+        "id": job.id, "jenis": job.jenis, "parameter": json.loads(job.parameter), "status": job.status,
+        "percobaan": job.percobaan, "pesan_error": job.pesan_error, "nama_file": job.nama_file,
+        "dibuat_pada": job.dibuat_pada.isoformat(timespec='seconds'),
+        "selesai_pada": job.selesai_pada.isoformat(timespec='seconds') if job.selesai_pada else None,
+    }
+
+def submit_job(jenis, params):
+    """Masukkan job ke antrian; permintaan yang sama dan masih berjalan memakai job yang sudah ada."""
+    if jenis not in JOB_HANDLERS:
+        raise ValueError(f"Jenis job tidak dikenal: {jenis}")
+    parameter = _params_json(params)
+    job = JobLaporan.query.filter(JobLaporan.jenis == jenis, JobLaporan.parameter == parameter,
+                                  JobLaporan.status.in_((JOB_ANTRI, JOB_DIPROSES))).first()
+    if job is None:
+        job = JobLaporan(id=uuid.uuid4().hex, jenis=jenis, parameter=parameter, status=JOB_ANTRI)
+        db.session.add(job)
+        db.session.commit()
+    return job
+
+def purge_expired_jobs(config, now):
+    """Hapus job Selesai/Gagal yang selesai lebih dari JOB_RESULT_TTL detik lalu (0 = simpan selamanya)."""
+    if config['JOB_RESULT_TTL'] <= 0:
+        return 0
+    expired = and_(JobLaporan.status.in_((JOB_SELESAI, JOB_GAGAL)),
+                   JobLaporan.selesai_pada < now - datetime.timedelta(seconds=config['JOB_RESULT_TTL']))
+    # Cek dulu dengan SELECT agar tidak membuka transaksi tulis jika tidak ada yang dihapus
+    if db.session.query(JobLaporan.id).filter(expired).first() is None:
+        db.session.rollback()
+        return 0
+    purged = db.session.execute(db.delete(JobLaporan).where(expired)).rowcount
+    db.session.commit()
+    if purged:
+        logger.info("%d job kedaluwarsa dihapus", purged)
+    return purged
+
+def claim_job(config):
+    """Klaim satu job yang siap dikerjakan (atau lease-nya habis); None jika tidak ada atau batas paralel tercapai.
+
+    Antrian kosong hanya dibaca: UPDATE klaim (dan lock tulisnya) dijalankan hanya jika ada kandidat.
+    """
+    now = _now()
+    running = db.select(func.count(JobLaporan.id))\
+        .where(JobLaporan.status == JOB_DIPROSES, JobLaporan.batas_waktu >= now).scalar_subquery()
+    ready = or_(
+        and_(JobLaporan.status == JOB_ANTRI, JobLaporan.jadwal <= now),
+        and_(JobLaporan.status == JOB_DIPROSES, JobLaporan.batas_waktu < now),
+    )
+    if db.session.query(JobLaporan.id).filter(ready).first() is None:
+        db.session.rollback()
+        return None
+    candidate = db.select(JobLaporan.id).where(ready)\
+        .order_by(JobLaporan.jadwal).limit(1).with_for_update(skip_locked=True).scalar_subquery()
+    # Di SQLite klaim berjalan bergantian sehingga hitungan `running` selalu terbaru. Di PostgreSQL
+    # (READ COMMITTED) dua klaim bisa membaca hitungan yang sama, jadi klaim diserialkan dengan
+    # advisory lock transaksi (dilepas saat commit) agar batas paralel lintas proses tetap tepat.
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(db.select(func.pg_advisory_xact_lock(KUNCI_KLAIM_JOB)))
+    token = uuid.uuid4().hex
+    claimed = db.session.execute(
+        db.update(JobLaporan)
+          .where(JobLaporan.id == candidate, running < config['JOB_MAX_CONCURRENT'])
+          .values(status=JOB_DIPROSES, percobaan=JobLaporan.percobaan + 1, mulai_pada=now, pemegang=token,
+                  batas_waktu=now + datetime.timedelta(seconds=config['JOB_LEASE_SECONDS']))
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return None
+    return JobLaporan.query.filter_by(pemegang=token).one()
+
+def run_job(job, config):
+    """Kerjakan job yang sudah diklaim dan simpan hasil, jadwal ulang, atau status gagalnya."""
+    token, jenis = job.pemegang, job.jenis
+    start = time.perf_counter()
+    try:
+        handler = import_string(JOB_HANDLERS[jenis])
+        nama_file, content_type, data = handler(**json.loads(job.parameter))
+        values = {"status": JOB_SELESAI, "nama_file": nama_file, "content_type": content_type, "hasil": data,
+                  "pesan_error": None, "selesai_pada": _now()}
+        result = 'sukses'
+    except Exception as e:
+        db.session.rollback()
+        retry = job.percobaan < config['JOB_MAX_ATTEMPTS']
+        logger.warning("Job %s (%s) gagal pada percobaan %d: %s", job.id, jenis, job.percobaan, e, exc_info=not retry)
+        values = {"status": JOB_ANTRI if retry else JOB_GAGAL, "pesan_error": str(e)[:1000]}
+        if retry:
+            values["jadwal"] = _now() + datetime.timedelta(seconds=config['JOB_RETRY_DELAY'] * 2 ** (job.percobaan - 1))
+        else:
+            values["selesai_pada"] = _now()
+        result = 'diulang' if retry else 'gagal'
+    # Hanya pemegang klaim yang boleh menulis hasil (job bisa sudah diambil ulang setelah lease habis)
+    db.session.execute(db.update(JobLaporan).where(JobLaporan.id == job.id, JobLaporan.pemegang == token)
+                       .values(pemegang=None, batas_waktu=None, **values))
+    db.session.commit()
+    metrics.inc('jobs_total', (jenis, result))
+    metrics.observe('job_duration_seconds', (jenis,), time.perf_counter() - start)
+    return values["status"]
+
+def run_next_job(config):
+    """Klaim dan kerjakan satu job; True jika ada job yang dikerjakan."""
+    job = claim_job(config)
+    if job is None:
+        return False
+    run_job(job, config)
+    return True
+
+
+class JobRunner:
+    """Thread worker per proses yang mengambil job dari tabel antrian."""
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config['JOB_WORKERS']
+        self.poll_interval = app.config['JOB_POLL_INTERVAL']
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next_purge = 0.0
+
+    def ensure_started(self):
+        # Thread tidak ikut ter-fork (gunicorn preload_app), jadi dimulai per proses saat pertama dibutuhkan
+        if self.workers <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self.loop, name=f"job-worker-{i}", daemon=True).start()
+            self._pid = os.getpid()
+
+    def wake(self):
+        self._wake.set()
+
+    def purge_due(self):
+        """True untuk satu thread per proses setiap JOB_PURGE_INTERVAL detik."""
+        with self._lock:
+            if time.monotonic() < self._next_purge:
+                return False
+            self._next_purge = time.monotonic() + self.app.config['JOB_PURGE_INTERVAL']
+            return True
+
+    def loop(self, stop=None):
+        while stop is None or not stop.is_set():
+            with self.app.app_context():
+                try:
+                    if self.purge_due():
+                        purge_expired_jobs(self.app.config, _now())
+                    ran = run_next_job(self.app.config)
+                except Exception:
+                    logger.exception("Worker job gagal mengambil job")
+                    db.session.rollback()
+                    ran = False
+                finally:
+                    db.session.remove()
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+def init_jobs(app):
+    app.extensions['job_runner'] = JobRunner(app)
+
+def job_runner(app):
+    return app.extensions['job_runner']
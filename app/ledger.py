@@ -0,0 +1,154 @@
+import datetime
+from collections import deque
+
+from sqlalchemy.sql import and_, func, or_
+
+from app import db
+from app.models import (sum_rupiah, Product, LaporanHarian, LaporanHarianProduk, PembayaranSupplier, SupplierBalance,
+                        MutasiSupplier, SnapshotSaldoSupplier)
+
+# ===================================================================
+# LEDGER SUPPLIER (APPEND-ONLY) DENGAN SNAPSHOT SALDO
+# ===================================================================
+# SupplierBalance tetap menjadi saldo berjalan (cepat dibaca dan menjaga agar
+# pembayaran tidak melebihi tagihan); setiap perubahannya juga dicatat sebagai
+# baris mutasi di transaksi yang sama. Mutasi diberi tanggal pencatatan (hari
+# ini), jadi snapshot untuk hari yang sudah lewat tidak pernah berubah dan saldo
+# pada tanggal D = snapshot terakhir <= D + jumlah mutasi sesudahnya.
+JENIS_PENJUALAN = 'penjualan'
+JENIS_PEMBAYARAN = 'pembayaran'
+JENIS_PENYESUAIAN = 'penyesuaian'
+
+def catat_mutasi_penjualan(laporan_id, supplier_costs):
+    """Tagihan per supplier untuk laporan yang baru dikonfirmasi (dalam transaksi pemanggil)."""
+    rows = [{"supplier_id": sid, "tanggal": datetime.date.today(), "jenis": JENIS_PENJUALAN, "jumlah": cost, "laporan_id": laporan_id}
+            for sid, cost in supplier_costs.items() if cost]
+    if rows:
+        db.session.execute(db.insert(MutasiSupplier), rows)
+
+def catat_mutasi_pembayaran(payment):
+    """Pengurangan tagihan untuk pembayaran supplier (payment sudah di-flush sehingga punya id)."""
+    db.session.add(MutasiSupplier(supplier_id=payment.supplier_id, tanggal=datetime.date.today(), jenis=JENIS_PEMBAYARAN,
+                                  jumlah=-payment.jumlah_pembayaran, pembayaran_id=payment.id))
+
+def saldo_pada(supplier_id, tanggal):
+    """Saldo supplier pada akhir `tanggal`; kembalikan (saldo, tanggal snapshot yang dipakai atau None)."""
+    snapshot = SnapshotSaldoSupplier.query.filter(SnapshotSaldoSupplier.supplier_id == supplier_id,
+                                                  SnapshotSaldoSupplier.tanggal <= tanggal)\
+        .order_by(SnapshotSaldoSupplier.tanggal.desc()).first()
+    tail = db.session.query(sum_rupiah(MutasiSupplier.jumlah))\
+        .filter(MutasiSupplier.supplier_id == supplier_id, MutasiSupplier.tanggal <= tanggal)
+    if snapshot is None:
+        return tail.scalar(), None
+    return snapshot.saldo + tail.filter(MutasiSupplier.tanggal > snapshot.tanggal).scalar(), snapshot.tanggal
+
+def buat_snapshot(tanggal):
+    """Simpan saldo semua supplier pada akhir `tanggal` (hanya hari yang sudah lewat); kembalikan jumlah snapshot."""
+    if tanggal >= datetime.date.today():
+        raise ValueError("Snapshot hanya untuk tanggal yang sudah lewat (mutasi hari ini masih bisa bertambah).")
+    # Mulai dari snapshot sebelumnya per supplier, tambahkan mutasi sesudahnya
+    latest = db.session.query(SnapshotSaldoSupplier.supplier_id, func.max(SnapshotSaldoSupplier.tanggal).label('tanggal'))\
+        .filter(SnapshotSaldoSupplier.tanggal < tanggal).group_by(SnapshotSaldoSupplier.supplier_id).subquery()
+    base = dict(db.session.query(SnapshotSaldoSupplier.supplier_id, SnapshotSaldoSupplier.saldo)
+                .join(latest, and_(latest.c.supplier_id == SnapshotSaldoSupplier.supplier_id,
+                                   latest.c.tanggal == SnapshotSaldoSupplier.tanggal)))
+    tail = dict(db.session.query(MutasiSupplier.supplier_id, sum_rupiah(MutasiSupplier.jumlah))
+                .outerjoin(latest, latest.c.supplier_id == MutasiSupplier.supplier_id)
+                .filter(MutasiSupplier.tanggal <= tanggal,
+                        or_(latest.c.tanggal.is_(None), MutasiSupplier.tanggal > latest.c.tanggal))
+                .group_by(MutasiSupplier.supplier_id))
+    saldo = {sid: base.get(sid, 0) + tail.get(sid, 0) for sid in base.keys() | tail.keys()}
+    SnapshotSaldoSupplier.query.filter_by(tanggal=tanggal).delete()
+    if saldo:
+        db.session.execute(db.insert(SnapshotSaldoSupplier),
+                           [{"supplier_id": sid, "tanggal": tanggal, "saldo": value} for sid, value in saldo.items()])
+    return len(saldo)
+
+def _akhir_bulan(tanggal):
+    return (tanggal.replace(day=1) + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+
+def backfill_ledger():
+    """Isi ledger yang masih kosong dari laporan terkonfirmasi & pembayaran yang ada, lalu snapshot akhir bulan.
+
+    Laporan lama tidak menyimpan tanggal konfirmasi, jadi tanggal laporan dipakai sebagai tanggal mutasi.
+    Selisih dengan saldo berjalan (mis. laporan dari lapak yang sudah dihapus) dicatat sebagai penyesuaian.
+    """
+    if db.session.query(MutasiSupplier.id).first() is not None:
+        raise ValueError("Ledger sudah berisi mutasi; ledger bersifat append-only dan tidak dibangun ulang.")
+
+    db.session.execute(db.insert(MutasiSupplier).from_select(
+        ['tanggal', 'supplier_id', 'jenis', 'jumlah', 'laporan_id'],
+        db.select(LaporanHarian.tanggal, Product.supplier_id, db.literal(JENIS_PENJUALAN), sum_rupiah(LaporanHarianProduk.total_harga_beli), LaporanHarian.id)
+          .select_from(LaporanHarianProduk)
+          .join(Product, Product.id == LaporanHarianProduk.product_id)
+          .join(LaporanHarian, LaporanHarian.id == LaporanHarianProduk.laporan_id)
+          .where(LaporanHarian.status == 'Terkonfirmasi', Product.supplier_id.isnot(None))
+          .group_by(LaporanHarian.id, LaporanHarian.tanggal, Product.supplier_id)
+          .having(func.sum(LaporanHarianProduk.total_harga_beli) != 0)
+    ))
+    db.session.execute(db.insert(MutasiSupplier).from_select(
+        ['tanggal', 'supplier_id', 'jenis', 'jumlah', 'pembayaran_id'],
+        db.select(PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.supplier_id, db.literal(JENIS_PEMBAYARAN),
+                  -PembayaranSupplier.jumlah_pembayaran, PembayaranSupplier.id)
+    ))
+
+    ledger = dict(db.session.query(MutasiSupplier.supplier_id, sum_rupiah(MutasiSupplier.jumlah)).group_by(MutasiSupplier.supplier_id))
+    adjustments = [{"supplier_id": sid, "tanggal": datetime.date.today(), "jenis": JENIS_PENYESUAIAN,
+                    "jumlah": balance - ledger.get(sid, 0), "keterangan": "Selisih saldo berjalan saat ledger pertama kali dibangun"}
+                   for sid, balance in db.session.query(SupplierBalance.supplier_id, SupplierBalance.balance)
+                   if balance != ledger.get(sid, 0)]
+    if adjustments:
+        db.session.execute(db.insert(MutasiSupplier), adjustments)
+
+    snapshots = 0
+    first = db.session.query(func.min(MutasiSupplier.tanggal)).scalar()
+    if first is not None:
+        month_end = _akhir_bulan(first)
+        while month_end < datetime.date.today():
+            buat_snapshot(month_end)
+            snapshots += 1
+            month_end = _akhir_bulan(month_end + datetime.timedelta(days=1))
+    return {"mutasi": db.session.query(func.count(MutasiSupplier.id)).scalar(), "penyesuaian": len(adjustments), "snapshot": snapshots}
+
+def cek_ledger(chunk_rows=5000):
+    """Hitung ulang saldo dari seluruh mutasi dalam satu pass berurutan (index supplier+tanggal).
+
+    Setiap snapshot dan saldo berjalan (SupplierBalance) dibandingkan dengan hasil hitungan ulang.
+    Kembalikan (jumlah mutasi yang dibaca, daftar selisih).
+    """
+    snapshots = {}
+    for snapshot in SnapshotSaldoSupplier.query.order_by(SnapshotSaldoSupplier.supplier_id, SnapshotSaldoSupplier.tanggal):
+        snapshots.setdefault(snapshot.supplier_id, []).append((snapshot.tanggal, snapshot.saldo))
+    balances = dict(db.session.query(SupplierBalance.supplier_id, SupplierBalance.balance))
+    problems = []
+
+    def finish(sid, running, pending):
+        for tanggal, saldo in pending:
+            if saldo != running:
+                problems.append(f"supplier {sid}: snapshot {tanggal} = {saldo}, hitung ulang = {running}")
+        if sid in balances and balances[sid] != running:
+            problems.append(f"supplier {sid}: saldo berjalan = {balances[sid]}, hitung ulang ledger = {running}")
+
+    rows = db.session.execute(
+        db.select(MutasiSupplier.supplier_id, MutasiSupplier.tanggal, MutasiSupplier.jumlah)
+          .order_by(MutasiSupplier.supplier_id, MutasiSupplier.tanggal, MutasiSupplier.id)
+          .execution_options(yield_per=chunk_rows))
+    count, current, running, pending, seen = 0, None, 0, deque(), set()
+    for sid, tanggal, jumlah in rows:
+        if sid != current:
+            if current is not None:
+                finish(current, running, pending)
+            current, running, pending = sid, 0, deque(snapshots.get(sid, []))
+            seen.add(sid)
+        while pending and pending[0][0] < tanggal:
+            snap_tanggal, saldo = pending.popleft()
+            if saldo != running:
+                problems.append(f"supplier {sid}: snapshot {snap_tanggal} = {saldo}, hitung ulang = {running}")
+        running += jumlah
+        count += 1
+    if current is not None:
+        finish(current, running, pending)
+    # Supplier tanpa mutasi sama sekali harus bersaldo nol
+    for sid in (balances.keys() | snapshots.keys()) - seen:
+        finish(sid, 0, deque(snapshots.get(sid, [])))
+    return count, problems
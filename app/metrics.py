@@ -0,0 +1,240 @@
+import bisect
+import sqlite3
+import threading
+import time
+
+from flask import Response, g, request
+from sqlalchemy import event, exc, select
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import func
+
+# ===================================================================
+# REGISTRY METRIK IN-PROCESS (FORMAT TEKS PROMETHEUS)
+# ===================================================================
+# Setiap thread menulis ke shard miliknya sendiri sehingga hot path tidak
+# pernah mengambil lock; shard baru hanya didaftarkan sekali per thread dan
+# semua shard dijumlahkan saat /metrics di-scrape.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+class Registry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._meta = {}      # nama -> (tipe, keterangan, label, bucket)
+
+    def counter(self, name, help_text, labels=()):
+        self._meta[name] = ('counter', help_text, labels, None)
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help_text, labels, buckets)
+
+    def gauge(self, name, help_text, labels=()):
+        self._meta[name] = ('gauge', help_text, labels, None)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        key = (name, labels)
+        slots = shard.get(key)
+        if slots is None:
+            # [jumlah per bucket ..., jumlah +Inf, total nilai]
+            slots = shard[key] = [0] * (len(self._meta[name][3]) + 2)
+        slots[bisect.bisect_left(self._meta[name][3], value)] += 1
+        slots[-1] += value
+
+    def _collect(self):
+        totals = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in list(shard.items()):
+                if isinstance(value, list):
+                    current = totals.setdefault(key, [0] * len(value))
+                    for i, v in enumerate(value):
+                        current[i] += v
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self, collectors=()):
+        """Format teks Prometheus; collectors dipanggil saat scrape -> [(nama, labels, nilai)] untuk gauge."""
+        samples = {}
+        for (name, labels), value in self._collect().items():
+            samples.setdefault(name, []).append((labels, value))
+        for callback in collectors:
+            for name, labels, value in callback():
+                samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, help_text, label_names, buckets) in self._meta.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples.get(name, []), key=lambda s: s[0]):
+                pairs = list(zip(label_names, labels))
+                if kind != 'histogram':
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(pairs + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+metrics = Registry()
+metrics.counter('http_requests_total', 'Jumlah request HTTP.', ('endpoint', 'method', 'status'))
+metrics.histogram('http_request_duration_seconds', 'Latensi request HTTP per route.', ('endpoint',))
+metrics.histogram('db_statement_duration_seconds', 'Durasi statement SQL (tanpa menunggu lock tulis SQLite, lihat db_sqlite_busy_wait_seconds).', ('kind',), DB_BUCKETS)
+metrics.counter('db_errors_total', 'Statement SQL yang gagal.', ('error',))
+metrics.counter('sqlalchemy_compiled_cache_total', 'Pemakaian cache kompilasi statement SQLAlchemy.', ('result',))
+metrics.counter('cache_requests_total', 'Akses cache aplikasi.', ('cache', 'result'))
+metrics.gauge('db_pool_connections', 'Status pool koneksi database.', ('state',))
+metrics.histogram('db_pool_checkout_wait_seconds', 'Lama menunggu koneksi dari pool (antri + membuat koneksi baru).', (), DB_BUCKETS)
+metrics.histogram('db_sqlite_busy_wait_seconds', 'Lama menunggu lock tulis SQLite (busy_timeout) di awal transaksi tulis.', (), DB_BUCKETS)
+metrics.gauge('ledger_rows', 'Jumlah baris tabel ledger (dihitung ulang paling cepat tiap METRICS_LEDGER_ROWS_TTL detik).', ('table',))
+metrics.counter('jobs_total', 'Job background yang selesai diproses per hasil.', ('jenis', 'result'))
+metrics.histogram('job_duration_seconds', 'Durasi pengerjaan job background.', ('jenis',), JOB_BUCKETS)
+
+def record_cache(name, hit):
+    """Catat hit/miss cache aplikasi (rasio hit = hit / (hit + miss))."""
+    metrics.inc('cache_requests_total', (name, 'hit' if hit else 'miss'))
+
+
+# ===================================================================
+# PEMASANGAN PADA APLIKASI & ENGINE
+# ===================================================================
+_STATEMENT_KINDS = ('select', 'insert', 'update', 'delete')
+
+class TimedQueuePool(QueuePool):
+    """QueuePool yang mencatat lama checkout: menunggu koneksi kosong dan membuat koneksi baru.
+
+    Dipasang sebagai poolclass (lihat config.engine_options) sehingga tetap berlaku setelah
+    engine.dispose() membuat pool baru di worker hasil fork.
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe('db_pool_checkout_wait_seconds', (), time.perf_counter() - start)
+
+def _begin_sqlite_write(conn, cursor, statement, parameters, context, executemany):
+    # pysqlite membuka transaksi (BEGIN DEFERRED) tepat sebelum INSERT/UPDATE/DELETE pertama, dan
+    # statement itulah yang menunggu lock tulis. Transaksi dibuka dengan BEGIN IMMEDIATE di titik
+    # yang sama sehingga lamanya statement BEGIN = lama menunggu busy_timeout.
+    dbapi_connection = conn.connection.dbapi_connection
+    if (not isinstance(dbapi_connection, sqlite3.Connection) or dbapi_connection.isolation_level is None
+            or dbapi_connection.in_transaction or statement.lstrip()[:6].lower() not in ('insert', 'update', 'delete')):
+        return
+    start = time.perf_counter()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+    except sqlite3.OperationalError as e:
+        metrics.inc('db_errors_total', ('locked' if 'locked' in str(e).lower() else 'other',))
+        raise exc.OperationalError("BEGIN IMMEDIATE", None, e) from e
+    finally:
+        metrics.observe('db_sqlite_busy_wait_seconds', (), time.perf_counter() - start)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_start'].pop()
+    kind = statement.lstrip()[:6].lower()
+    metrics.observe('db_statement_duration_seconds', (kind if kind in _STATEMENT_KINDS else 'other',), elapsed)
+    if context is not None and context.compiled is not None:
+        result = {CacheStats.CACHE_HIT: 'hit', CacheStats.CACHE_MISS: 'miss'}.get(context.cache_hit, 'uncached')
+        metrics.inc('sqlalchemy_compiled_cache_total', (result,))
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get('metrics_start') if exception_context.connection else None
+    if starts:
+        starts.pop()
+    error = 'locked' if 'locked' in str(exception_context.original_exception).lower() else 'other'
+    metrics.inc('db_errors_total', (error,))
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None and request.endpoint != 'metrics':
+        endpoint = (request.endpoint or 'not_found').rsplit('.', 1)[-1]
+        metrics.inc('http_requests_total', (endpoint, request.method, str(response.status_code)))
+        metrics.observe('http_request_duration_seconds', (endpoint,), time.perf_counter() - start)
+    return response
+
+def _pool_gauges(engines):
+    def collect():
+        samples = []
+        for engine in engines:
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                samples += [('db_pool_connections', ('size',), pool.size()),
+                            ('db_pool_connections', ('checked_out',), pool.checkedout()),
+                            ('db_pool_connections', ('overflow',), max(0, pool.overflow()))]
+        return samples
+    return collect
+
+def _ledger_gauges(db, ttl):
+    # COUNT(*) memindai seluruh tabel; hasilnya dipakai ulang selama ttl detik agar scrape tetap murah
+    cached = {"expires": 0.0, "samples": []}
+    lock = threading.Lock()
+
+    def collect():
+        with lock:
+            if time.monotonic() < cached["expires"]:
+                return cached["samples"]
+            from app.models import LaporanHarian, LaporanHarianProduk, PembayaranSupplier, SupplierBalance, RingkasanHarian, RingkasanPembayaranHarian, MutasiSupplier
+            tables = [LaporanHarian, LaporanHarianProduk, PembayaranSupplier, SupplierBalance, RingkasanHarian, RingkasanPembayaranHarian, MutasiSupplier]
+            # Satu statement berisi COUNT(*) per tabel
+            counts = db.session.execute(select(*[select(func.count()).select_from(t).scalar_subquery() for t in tables])).one()
+            cached["samples"] = [('ledger_rows', (t.__tablename__,), n) for t, n in zip(tables, counts)]
+            cached["expires"] = time.monotonic() + ttl
+            return cached["samples"]
+    return collect
+
+def init_metrics(app, db, engines):
+    """Pasang pencatat request & statement serta route /metrics."""
+    engines = list(engines)
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            # Didaftarkan lebih dulu: lama menunggu lock tidak ikut durasi statement
+            event.listen(engine, 'before_cursor_execute', _begin_sqlite_write)
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    collectors = [_pool_gauges(engines), _ledger_gauges(db, app.config['METRICS_LEDGER_ROWS_TTL'])]
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    def metrics_view():
+        return Response(metrics.render(collectors), mimetype='text/plain; version=0.0.4')
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,121 @@
+from sqlalchemy import Integer, inspect
+
+from app import db
+
+# ===================================================================
+# MIGRASI DATABASE LAMA (DIPANGGIL OLEH upgrade-db)
+# ===================================================================
+# Kolom uang yang dulu bertipe FLOAT dan sekarang BIGINT (rupiah bulat)
+KOLOM_UANG = {
+    'product': ('harga_beli', 'harga_jual'),
+    'laporan_harian': ('total_pendapatan', 'total_biaya_supplier', 'pendapatan_cash', 'pendapatan_qris', 'pendapatan_bca',
+                       'manual_pendapatan_cash', 'manual_pendapatan_qris', 'manual_pendapatan_bca', 'manual_total_pendapatan'),
+    'laporan_harian_produk': ('total_harga_jual', 'total_harga_beli'),
+    'supplier_balance': ('balance',),
+    'pembayaran_supplier': ('jumlah_pembayaran',),
+    'ringkasan_harian': ('pendapatan', 'biaya'),
+    'ringkasan_pembayaran_harian': ('jumlah_pembayaran',),
+}
+
+def _float_columns(inspector, table_name, columns):
+    types = {c['name']: c['type'] for c in inspector.get_columns(table_name)}
+    return [c for c in columns if c in types and not isinstance(types[c], Integer)]
+
+def _rebuild_sqlite_table(table, money_columns):
+    # SQLite tidak bisa mengubah tipe kolom (dan kolom REAL selalu menyimpan float), jadi
+    # tabel dibuat ulang: tabel baru -> salin data -> hapus tabel lama -> ganti nama.
+    temp_name = f"{table.name}_baru"
+    with db.engine.begin() as conn:
+        inspector = inspect(conn)
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        names = [c.name for c in table.columns if c.name in existing]
+        # Nama index berlaku untuk seluruh database; index lama dilepas dulu agar bisa dibuat di tabel baru
+        for index in inspector.get_indexes(table.name):
+            conn.exec_driver_sql(f'DROP INDEX "{index["name"]}"')
+        conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{temp_name}"')
+        temp = table.to_metadata(db.metadata, name=temp_name)
+        try:
+            temp.create(conn)
+        finally:
+            db.metadata.remove(temp)
+        select_list = ', '.join(f'CAST(round("{name}") AS INTEGER)' if name in money_columns else f'"{name}"' for name in names)
+        column_list = ', '.join(f'"{name}"' for name in names)
+        conn.exec_driver_sql(f'INSERT INTO "{temp_name}" ({column_list}) SELECT {select_list} FROM "{table.name}"')
+        conn.exec_driver_sql(f'DROP TABLE "{table.name}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{temp_name}" RENAME TO "{table.name}"')
+
+def migrate_money_columns():
+    """Ubah kolom uang FLOAT menjadi BIGINT (nilai dibulatkan ke rupiah terdekat); kembalikan tabel yang diubah."""
+    migrated = []
+    for table_name, columns in KOLOM_UANG.items():
+        inspector = inspect(db.engine)
+        if not inspector.has_table(table_name):
+            continue
+        float_columns = _float_columns(inspector, table_name, columns)
+        if not float_columns:
+            continue
+        if db.engine.dialect.name == 'sqlite':
+            _rebuild_sqlite_table(db.metadata.tables[table_name], float_columns)
+        else:
+            # PostgreSQL
+            with db.engine.begin() as conn:
+                for column in float_columns:
+                    conn.exec_driver_sql(f'ALTER TABLE "{table_name}" ALTER COLUMN "{column}" TYPE BIGINT USING round("{column}")::bigint')
+        migrated.append(table_name)
+    return migrated
+
+# Tabel login dengan kolom username_lower (username huruf kecil untuk pencarian login)
+TABEL_USERNAME = ('admin', 'supplier')
+
+def migrate_username_columns():
+    """Tambahkan & isi kolom username_lower pada database lama; kembalikan tabel yang diubah.
+
+    Gagal (ValueError) jika ada username yang hanya berbeda huruf besar/kecil, karena
+    unique index pada username_lower tidak bisa dibuat sebelum salah satunya diganti.
+    """
+    from app.models import normalize_username
+    migrated = []
+    for table_name in TABEL_USERNAME:
+        inspector = inspect(db.engine)
+        if not inspector.has_table(table_name):
+            continue
+        if 'username_lower' not in {c['name'] for c in inspector.get_columns(table_name)}:
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f'ALTER TABLE "{table_name}" ADD COLUMN username_lower VARCHAR(80)')
+            migrated.append(table_name)
+        table = db.metadata.tables[table_name]
+        with db.engine.begin() as conn:
+            rows = conn.execute(db.select(table.c.id, table.c.username, table.c.username_lower)).all()
+            seen, duplicates = set(), set()
+            for _, username, _ in rows:
+                lower = normalize_username(username)
+                (duplicates if lower in seen else seen).add(lower)
+            if duplicates:
+                raise ValueError(f"Username ganda di tabel {table_name} (beda huruf besar/kecil saja): {', '.join(sorted(duplicates))}")
+            stale = [{"row_id": row_id, "lower": normalize_username(username)}
+                     for row_id, username, lower in rows if lower != normalize_username(username)]
+            if stale:
+                conn.execute(table.update().where(table.c.id == db.bindparam('row_id')).values(username_lower=db.bindparam('lower')), stale)
+    return migrated
+
+# Hash password Werkzeug (scrypt ~160 karakter) lebih panjang dari kolom VARCHAR(120) lama
+PANJANG_PASSWORD = 255
+
+def migrate_password_columns():
+    """Perlebar kolom password ke VARCHAR(255); kembalikan tabel yang diubah.
+
+    Hanya perlu di PostgreSQL: SQLite tidak membatasi panjang VARCHAR.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return []
+    migrated = []
+    for table_name in TABEL_USERNAME:
+        inspector = inspect(db.engine)
+        if not inspector.has_table(table_name):
+            continue
+        length = {c['name']: getattr(c['type'], 'length', None) for c in inspector.get_columns(table_name)}.get('password')
+        if length is not None and length < PANJANG_PASSWORD:
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f'ALTER TABLE "{table_name}" ALTER COLUMN password TYPE VARCHAR({PANJANG_PASSWORD})')
+            migrated.append(table_name)
+    return migrated
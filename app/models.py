@@ -1,10 +1,30 @@
-from app import db, datetime
+import datetime
+from app import db
 import sqlalchemy
+from sqlalchemy.orm import validates
+from sqlalchemy.sql import func
 
 # --- HARGA KONSTAN (SEBAGAI DEFAULT) ---
 HARGA_BELI_DEFAULT = 8000
 HARGA_JUAL_DEFAULT = 10000
 
+# --- UANG ---
+# Semua nominal disimpan sebagai rupiah bulat (BigInteger): penjumlahan bertahun-tahun
+# tetap tepat dan perbandingan saldo tidak butuh toleransi pembulatan float.
+def sum_rupiah(column):
+    """SUM kolom uang sebagai BIGINT (PostgreSQL mengembalikan NUMERIC/Decimal untuk SUM bigint)."""
+    return db.cast(func.coalesce(func.sum(column), 0), db.BigInteger)
+
+# --- USERNAME ---
+# Login tidak membedakan huruf besar/kecil. Bentuk huruf kecilnya disimpan di kolom
+# username_lower (unique index) agar login cukup satu pencarian index, bukan lower(username).
+def normalize_username(username):
+    return (username or '').lower()
+
+def _username_lower_default(context):
+    # Dipakai juga oleh insert Core (bulk insert seed-db) yang tidak melewati @validates
+    return normalize_username(context.get_current_parameters().get('username'))
+
 # ===================================================================
 # DEFINISI MODEL DATABASE
 # ===================================================================
@@ -25,24 +45,36 @@ class Admin(db.Model):
     nama_lengkap = db.Column(db.String(100), nullable=False)
     nik = db.Column(db.String(20), unique=True, nullable=False)
     username = db.Column(db.String(80), unique=True, nullable=False)
+    username_lower = db.Column(db.String(80), nullable=False, default=_username_lower_default, index=True, unique=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     nomor_kontak = db.Column(db.String(20), nullable=True)
-    password = db.Column(db.String(120), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+
+    @validates('username')
+    def _set_username_lower(self, key, username):
+        self.username_lower = normalize_username(username)
+        return username
 
 class Supplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nama_supplier = db.Column(db.String(100), nullable=False)
     username = db.Column(db.String(80), unique=True, nullable=False) 
+    username_lower = db.Column(db.String(80), nullable=False, default=_username_lower_default, index=True, unique=True)
     kontak = db.Column(db.String(20), nullable=True)
     nomor_register = db.Column(db.String(50), unique=True, nullable=True)
     alamat = db.Column(db.Text, nullable=True)
-    password = db.Column(db.String(120), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     # --- REVISI: Kolom baru untuk info pembayaran ---
     metode_pembayaran = db.Column(db.String(20), nullable=True)
     nomor_rekening = db.Column(db.String(50), nullable=True)
     products = db.relationship('Product', backref='supplier', lazy=True, cascade="all, delete-orphan")
     balance = db.relationship('SupplierBalance', backref='supplier', uselist=False, cascade="all, delete-orphan")
 
+    @validates('username')
+    def _set_username_lower(self, key, username):
+        self.username_lower = normalize_username(username)
+        return username
+
 class Lapak(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     lokasi = db.Column(db.String(200), nullable=False, unique=True)
@@ -56,11 +88,12 @@ class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nama_produk = db.Column(db.String(100), nullable=False)
     supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=True)
-    harga_beli = db.Column(db.Float, nullable=False, default=HARGA_BELI_DEFAULT)
-    harga_jual = db.Column(db.Float, nullable=False, default=HARGA_JUAL_DEFAULT)
+    harga_beli = db.Column(db.BigInteger, nullable=False, default=HARGA_BELI_DEFAULT)
+    harga_jual = db.Column(db.BigInteger, nullable=False, default=HARGA_JUAL_DEFAULT)
     is_manual = db.Column(db.Boolean, default=False, nullable=False)
     lapaks = db.relationship('Lapak', secondary=product_lapak_association, lazy='subquery',
                              backref=db.backref('products', lazy=True))
+    __table_args__ = (db.Index('ix_product_supplier_id', 'supplier_id'),)
 
 class StokHarian(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -74,18 +107,23 @@ class LaporanHarian(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     lapak_id = db.Column(db.Integer, db.ForeignKey('lapak.id'), nullable=False)
     tanggal = db.Column(db.Date, nullable=False, default=datetime.date.today)
-    total_pendapatan = db.Column(db.Float, nullable=False)
-    total_biaya_supplier = db.Column(db.Float, nullable=False, default=0)
-    pendapatan_cash = db.Column(db.Float, nullable=False)
-    pendapatan_qris = db.Column(db.Float, nullable=False)
-    pendapatan_bca = db.Column(db.Float, nullable=False) 
+    total_pendapatan = db.Column(db.BigInteger, nullable=False)
+    total_biaya_supplier = db.Column(db.BigInteger, nullable=False, default=0)
+    pendapatan_cash = db.Column(db.BigInteger, nullable=False)
+    pendapatan_qris = db.Column(db.BigInteger, nullable=False)
+    pendapatan_bca = db.Column(db.BigInteger, nullable=False) 
     total_produk_terjual = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), default='Menunggu Konfirmasi')
-    manual_pendapatan_cash = db.Column(db.Float, nullable=True)
-    manual_pendapatan_qris = db.Column(db.Float, nullable=True)
-    manual_pendapatan_bca = db.Column(db.Float, nullable=True)
-    manual_total_pendapatan = db.Column(db.Float, nullable=True)
+    manual_pendapatan_cash = db.Column(db.BigInteger, nullable=True)
+    manual_pendapatan_qris = db.Column(db.BigInteger, nullable=True)
+    manual_pendapatan_bca = db.Column(db.BigInteger, nullable=True)
+    manual_total_pendapatan = db.Column(db.BigInteger, nullable=True)
     rincian_produk = db.relationship('LaporanHarianProduk', backref='laporan', lazy=True, cascade="all, delete-orphan")
+    # Filter laporan selalu berdasarkan rentang tanggal (+status) atau per lapak per tanggal
+    __table_args__ = (
+        db.Index('ix_laporan_harian_tanggal_status', 'tanggal', 'status'),
+        db.Index('ix_laporan_harian_lapak_tanggal', 'lapak_id', 'tanggal'),
+    )
 
 class LaporanHarianProduk(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -94,20 +132,142 @@ class LaporanHarianProduk(db.Model):
     stok_awal = db.Column(db.Integer, nullable=False)
     stok_akhir = db.Column(db.Integer, nullable=False)
     jumlah_terjual = db.Column(db.Integer, nullable=False)
-    total_harga_jual = db.Column(db.Float, nullable=False)
-    total_harga_beli = db.Column(db.Float, nullable=False)
+    total_harga_jual = db.Column(db.BigInteger, nullable=False)
+    total_harga_beli = db.Column(db.BigInteger, nullable=False)
     product = db.relationship('Product')
+    __table_args__ = (
+        db.Index('ix_laporan_harian_produk_laporan_id', 'laporan_id'),
+        db.Index('ix_laporan_harian_produk_product_id', 'product_id'),
+    )
 
 class SupplierBalance(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), unique=True, nullable=False)
-    balance = db.Column(db.Float, nullable=False, default=0.0)
+    balance = db.Column(db.BigInteger, nullable=False, default=0)
 
 class PembayaranSupplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=False)
     tanggal_pembayaran = db.Column(db.Date, nullable=False, default=datetime.date.today)
-    jumlah_pembayaran = db.Column(db.Float, nullable=False)
+    jumlah_pembayaran = db.Column(db.BigInteger, nullable=False)
     metode_pembayaran = db.Column(db.String(20), nullable=False) 
     supplier = db.relationship('Supplier')
+    __table_args__ = (
+        db.Index('ix_pembayaran_supplier_supplier_tanggal', 'supplier_id', 'tanggal_pembayaran'),
+        db.Index('ix_pembayaran_supplier_tanggal', 'tanggal_pembayaran'),
+    )
+
+
+# ===================================================================
+# TABEL RINGKASAN (ROLLUP) UNTUK GRAFIK & REKAP BULANAN
+# ===================================================================
+class RingkasanHarian(db.Model):
+    """Rekap penjualan terkonfirmasi per tanggal x lapak x supplier (supplier_id 0 = produk manual)."""
+    id = db.Column(db.Integer, primary_key=True)
+    tanggal = db.Column(db.Date, nullable=False)
+    lapak_id = db.Column(db.Integer, db.ForeignKey('lapak.id'), nullable=False)
+    supplier_id = db.Column(db.Integer, nullable=False, default=0)
+    pendapatan = db.Column(db.BigInteger, nullable=False, default=0)
+    biaya = db.Column(db.BigInteger, nullable=False, default=0)
+    jumlah_terjual = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.UniqueConstraint('tanggal', 'lapak_id', 'supplier_id', name='_ringkasan_tanggal_lapak_supplier_uc'),
+        db.Index('ix_ringkasan_harian_supplier_tanggal', 'supplier_id', 'tanggal'),
+    )
+
+class RingkasanPembayaranHarian(db.Model):
+    """Rekap pembayaran ke supplier per tanggal x supplier."""
+    id = db.Column(db.Integer, primary_key=True)
+    tanggal = db.Column(db.Date, nullable=False)
+    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=False)
+    jumlah_pembayaran = db.Column(db.BigInteger, nullable=False, default=0)
+    __table_args__ = (db.UniqueConstraint('tanggal', 'supplier_id', name='_ringkasan_pembayaran_tanggal_supplier_uc'),)
+
+
+# ===================================================================
+# ARSIP DETAIL LAPORAN TERKONFIRMASI
+# ===================================================================
+class ArsipDetailLaporan(db.Model):
+    """Respons get_report_details yang sudah jadi untuk laporan terkonfirmasi.
 
+    laporan_id sengaja bukan foreign key (seperti ledger); baris dihapus lewat app/arsip_laporan.py
+    saat nama yang ikut tampil di detail berubah atau lapaknya dihapus.
+    """
+    __tablename__ = 'arsip_detail_laporan'
+    laporan_id = db.Column(db.Integer, primary_key=True)
+    lapak_id = db.Column(db.Integer, nullable=False, index=True)
+    isi = db.Column(db.Text, nullable=False)      # body JSON persis seperti yang dikirim
+    etag = db.Column(db.String(40), nullable=False)  # SHA-1 dari isi (strong ETag)
+
+# ===================================================================
+# LEDGER SUPPLIER (APPEND-ONLY) & SNAPSHOT SALDO
+# ===================================================================
+class MutasiSupplier(db.Model):
+    """Satu mutasi saldo supplier; baris tidak pernah diubah atau dihapus.
+
+    jumlah bertanda: positif = tagihan bertambah (penjualan terkonfirmasi), negatif = pembayaran.
+    tanggal adalah tanggal pencatatan (hari konfirmasi/pembayaran), bukan tanggal laporan.
+    laporan_id/pembayaran_id sengaja bukan foreign key agar riwayat tetap utuh walau datanya dihapus.
+    """
+    __tablename__ = 'mutasi_supplier'
+    id = db.Column(db.Integer, primary_key=True)
+    supplier_id = db.Column(db.Integer, nullable=False)
+    tanggal = db.Column(db.Date, nullable=False, default=datetime.date.today)
+    jenis = db.Column(db.String(20), nullable=False)  # penjualan / pembayaran / penyesuaian
+    jumlah = db.Column(db.BigInteger, nullable=False)
+    laporan_id = db.Column(db.Integer, nullable=True)
+    pembayaran_id = db.Column(db.Integer, nullable=True)
+    keterangan = db.Column(db.String(200), nullable=True)
+    __table_args__ = (db.Index('ix_mutasi_supplier_supplier_tanggal', 'supplier_id', 'tanggal', 'id'),)
+
+class SnapshotSaldoSupplier(db.Model):
+    """Saldo supplier pada akhir suatu tanggal (semua mutasi dengan tanggal <= tanggal snapshot)."""
+    __tablename__ = 'snapshot_saldo_supplier'
+    supplier_id = db.Column(db.Integer, primary_key=True)
+    tanggal = db.Column(db.Date, primary_key=True)
+    saldo = db.Column(db.BigInteger, nullable=False)
+
+# ===================================================================
+# VERSI CACHE (INVALIDASI LINTAS PROSES WORKER)
+# ===================================================================
+class CacheVersion(db.Model):
+    """Token versi per bagian data; diganti di transaksi yang sama dengan perubahan datanya."""
+    __tablename__ = 'cache_version'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.String(32), nullable=False)
+
+
+# ===================================================================
+# NOMOR URUT (PENGGANTI SEQUENCE LINTAS DATABASE)
+# ===================================================================
+class NomorUrut(db.Model):
+    """Nomor terakhir yang sudah dibagikan per jenis (mis. nomor register supplier)."""
+    __tablename__ = 'nomor_urut'
+    nama = db.Column(db.String(50), primary_key=True)
+    nilai = db.Column(db.BigInteger, nullable=False, default=0)
+
+# ===================================================================
+# ANTRIAN JOB LAPORAN (DIKERJAKAN DI BACKGROUND)
+# ===================================================================
+class JobLaporan(db.Model):
+    """Satu permintaan laporan berat (mis. statement bulanan supplier) beserta file hasilnya."""
+    __tablename__ = 'job_laporan'
+    id = db.Column(db.String(32), primary_key=True)
+    jenis = db.Column(db.String(50), nullable=False)
+    parameter = db.Column(db.Text, nullable=False)  # JSON, key terurut (dipakai juga untuk deduplikasi)
+    status = db.Column(db.String(20), nullable=False, default='Antri')
+    percobaan = db.Column(db.Integer, nullable=False, default=0)
+    pesan_error = db.Column(db.Text, nullable=True)
+    dibuat_pada = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+    jadwal = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)  # paling cepat dikerjakan
+    mulai_pada = db.Column(db.DateTime, nullable=True)
+    batas_waktu = db.Column(db.DateTime, nullable=True)  # lease worker; lewat dari ini job boleh diambil ulang
+    pemegang = db.Column(db.String(32), nullable=True)   # token klaim worker yang sedang mengerjakan
+    selesai_pada = db.Column(db.DateTime, nullable=True)
+    nama_file = db.Column(db.String(200), nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    hasil = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    __table_args__ = (
+        db.Index('ix_job_laporan_status_jadwal', 'status', 'jadwal'),
+        db.Index('ix_job_laporan_jenis_parameter', 'jenis', 'parameter'),
+    )
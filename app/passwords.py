@@ -0,0 +1,92 @@
+import concurrent.futures
+import hmac
+import logging
+import os
+import threading
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+# ===================================================================
+# HASH PASSWORD DI POOL THREAD TERBATAS
+# ===================================================================
+# scrypt/PBKDF2 sengaja lambat dan melepas GIL, jadi puluhan login bersamaan di awal
+# shift bisa memakan semua CPU dan membuat request lain ikut menunggu. Hashing
+# dikerjakan di pool kecil per proses; jika pool dan antriannya penuh, request
+# langsung ditolak (503) alih-alih menumpuk di thread web.
+METODE_HASH = ('pbkdf2', 'scrypt')
+
+class HashPoolBusy(Exception):
+    """Pool hash password sedang penuh (atau terlalu lama mengantri)."""
+
+def is_password_hash(stored):
+    """True jika `stored` berbentuk hash Werkzeug ("metode$salt$hash"), bukan password teks biasa lama."""
+    return stored.count('$') >= 2 and stored.split(':', 1)[0].split('$', 1)[0] in METODE_HASH
+
+class PasswordHasher:
+    def __init__(self, app):
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        # Slot = hash yang sedang dikerjakan + yang boleh mengantri
+        self._slots = threading.BoundedSemaphore(max(1, self.workers) + app.config['PASSWORD_HASH_QUEUE'])
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._prefix = None
+
+    def _pool(self):
+        # Thread pool tidak ikut ter-fork (gunicorn preload_app), jadi dibuat per proses
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy()
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            raise HashPoolBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    @property
+    def prefix(self):
+        """Awalan hash untuk metode sekarang, mis. "scrypt:32768:8:1" (parameter default diisi Werkzeug)."""
+        if self._prefix is None:
+            self._prefix = self.hash('').split('$', 1)[0]
+        return self._prefix
+
+    def verify(self, stored, password):
+        """Periksa password; kembalikan (cocok, perlu_hash_ulang).
+
+        Password teks biasa dari data lama dibandingkan langsung dan selalu perlu di-hash
+        ulang, begitu juga hash dengan metode/iterasi yang berbeda dari PASSWORD_HASH_METHOD.
+        """
+        if not stored or password is None:
+            return False, False
+        if not is_password_hash(stored):
+            return hmac.compare_digest(stored.encode(), password.encode()), True
+        if not self._run(check_password_hash, stored, password):
+            return False, False
+        return True, stored.split('$', 1)[0] != self.prefix
+
+def init_passwords(app):
+    app.extensions['password_hasher'] = PasswordHasher(app)
+
+def password_hasher(app):
+    return app.extensions['password_hasher']
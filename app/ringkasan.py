@@ -0,0 +1,81 @@
+from app import db
+from app.models import sum_rupiah, Product, LaporanHarian, LaporanHarianProduk, PembayaranSupplier, RingkasanHarian, RingkasanPembayaranHarian
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import func, literal_column
+from app.cache import bump_versions, SECTION_SUMMARY
+
+# ===================================================================
+# PEMELIHARAAN TABEL RINGKASAN (ROLLUP)
+# ===================================================================
+# Supplier id untuk produk manual (tanpa supplier) di tabel ringkasan
+SUPPLIER_MANUAL = 0
+# Kolom supplier untuk pengelompokan; literal (bukan bind param) agar GROUP BY sama persis di PostgreSQL
+SUPPLIER_ID_RINGKASAN = func.coalesce(Product.supplier_id, literal_column(str(SUPPLIER_MANUAL)))
+# Ringkasan ditambah lewat upsert (SQLite >= 3.24, PostgreSQL >= 9.5)
+_INSERT_UPSERT = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def _insert_upsert(model):
+    """INSERT yang mendukung ON CONFLICT DO UPDATE untuk dialek database yang sedang dipakai."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _INSERT_UPSERT:
+        raise NotImplementedError(f"Ringkasan belum mendukung database {dialect}")
+    return _INSERT_UPSERT[dialect](model)
+
+def _tambahkan(model, keys, values, columns):
+    """Upsert atomik: baris baru di-insert, baris yang sudah ada ditambah (col = col + excluded.col).
+
+    Satu statement, jadi dua transaksi bersamaan untuk key yang sama tidak saling menimpa dan
+    insert pertama yang bersamaan tidak gagal karena unique constraint.
+    """
+    stmt = _insert_upsert(model).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: getattr(model, column) + getattr(stmt.excluded, column) for column in columns})
+    db.session.execute(stmt)
+
+def catat_penjualan(tanggal, lapak_id, per_supplier):
+    """Tambahkan penjualan laporan yang baru dikonfirmasi ke ringkasan harian (dalam transaksi pemanggil).
+
+    per_supplier: {supplier_id: (pendapatan, biaya, jumlah_terjual)}, supplier_id 0 untuk produk manual.
+    """
+    if not per_supplier:
+        return
+    _tambahkan(RingkasanHarian, ['tanggal', 'lapak_id', 'supplier_id'],
+               [{"tanggal": tanggal, "lapak_id": lapak_id, "supplier_id": sid,
+                 "pendapatan": pendapatan, "biaya": biaya, "jumlah_terjual": terjual}
+                for sid, (pendapatan, biaya, terjual) in per_supplier.items()],
+               ['pendapatan', 'biaya', 'jumlah_terjual'])
+
+def catat_pembayaran(payment):
+    """Tambahkan pembayaran supplier ke ringkasan pembayaran harian (dalam transaksi pemanggil)."""
+    _tambahkan(RingkasanPembayaranHarian, ['tanggal', 'supplier_id'],
+               [{"tanggal": payment.tanggal_pembayaran, "supplier_id": payment.supplier_id,
+                 "jumlah_pembayaran": payment.jumlah_pembayaran}],
+               ['jumlah_pembayaran'])
+
+def rebuild_ringkasan():
+    """Hitung ulang seluruh tabel ringkasan dari laporan terkonfirmasi dan pembayaran (untuk backfill)."""
+    RingkasanHarian.query.delete()
+    RingkasanPembayaranHarian.query.delete()
+
+    penjualan = db.session.query(
+        LaporanHarian.tanggal, LaporanHarian.lapak_id, SUPPLIER_ID_RINGKASAN,
+        sum_rupiah(LaporanHarianProduk.total_harga_jual),
+        sum_rupiah(LaporanHarianProduk.total_harga_beli),
+        func.sum(LaporanHarianProduk.jumlah_terjual)
+    ).select_from(LaporanHarianProduk)\
+     .join(LaporanHarian, LaporanHarian.id == LaporanHarianProduk.laporan_id)\
+     .join(Product, Product.id == LaporanHarianProduk.product_id)\
+     .filter(LaporanHarian.status == 'Terkonfirmasi')\
+     .group_by(LaporanHarian.tanggal, LaporanHarian.lapak_id, SUPPLIER_ID_RINGKASAN)
+    db.session.execute(db.insert(RingkasanHarian).from_select(
+        ['tanggal', 'lapak_id', 'supplier_id', 'pendapatan', 'biaya', 'jumlah_terjual'], penjualan))
+
+    pembayaran = db.session.query(
+        PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.supplier_id,
+        sum_rupiah(PembayaranSupplier.jumlah_pembayaran)
+    ).group_by(PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.supplier_id)
+    db.session.execute(db.insert(RingkasanPembayaranHarian).from_select(
+        ['tanggal', 'supplier_id', 'jumlah_pembayaran'], pembayaran))
+    bump_versions(SECTION_SUMMARY)
+    db.session.commit()
@@ -1,33 +1,146 @@
-from flask import render_template, jsonify, request, session, redirect, url_for
-from app import app, db
-from app.models import Admin, Supplier, Lapak, Product, StokHarian, LaporanHarian, LaporanHarianProduk, SupplierBalance, PembayaranSupplier, HARGA_BELI_DEFAULT, HARGA_JUAL_DEFAULT
-from werkzeug.security import generate_password_hash, check_password_hash # <--- TAMBAHKAN BARIS INI
+from flask import Blueprint, current_app, render_template, jsonify, request, session, redirect, url_for, stream_with_context
+from app import db
+from app.models import Admin, Supplier, Lapak, Product, StokHarian, LaporanHarian, LaporanHarianProduk, SupplierBalance, PembayaranSupplier, HARGA_BELI_DEFAULT, HARGA_JUAL_DEFAULT, product_lapak_association, RingkasanHarian, RingkasanPembayaranHarian, JobLaporan, MutasiSupplier, sum_rupiah, normalize_username
+from app.ringkasan import catat_penjualan, catat_pembayaran, SUPPLIER_MANUAL, SUPPLIER_ID_RINGKASAN
+from app.cache import bump_versions, cached, current_versions, SECTION_ADMIN, SECTION_LAPAK, SECTION_SUPPLIER, SECTION_SUMMARY
+from app.jobs import job_runner, job_to_dict, submit_job, JOB_SELESAI
+from app.ledger import catat_mutasi_penjualan, catat_mutasi_pembayaran, saldo_pada
+from app.urutan import alokasi_nomor_register, pratinjau_nomor_register
+from app.passwords import password_hasher, HashPoolBusy
+from app.arsip_laporan import (arsipkan_laporan, baca_arsip, hapus_arsip_lapak, hapus_arsip_penanggung_jawab, hapus_arsip_supplier,
+                                laporan_untuk_detail, simpan_arsip, susun_detail)
+import csv
 import datetime
-import re
+import decimal
+import functools
+import hashlib
+import io
 from datetime import timedelta
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.sql import func, or_
-from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import case, func, or_, tuple_
+from sqlalchemy.orm import joinedload, lazyload, undefer
 from calendar import monthrange
 import logging
 import random
 
+bp = Blueprint('main', __name__)
+
+# ===================================================================
+# PAGINATION (KEYSET / CURSOR)
+# ===================================================================
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 200
+
+class InvalidPageArgs(ValueError):
+    """cursor/limit/section di query string tidak valid (dijawab 400 lewat errorhandler)."""
+
+def _page_args(args, sections=None):
+    """Baca cursor ("YYYY-MM-DD:id") dan limit dari query string.
+
+    sections: nilai ?section= untuk endpoint yang memuat beberapa daftar sekaligus. Id di cursor
+    berasal dari tabel salah satu daftar, jadi cursor hanya diterima bersama section.
+    """
+    try:
+        limit = max(1, min(int(args.get('limit', PAGE_SIZE_DEFAULT)), PAGE_SIZE_MAX))
+    except ValueError:
+        raise InvalidPageArgs(f"limit tidak valid: {args.get('limit')!r}")
+    cursor = args.get('cursor')
+    if sections:
+        section = args.get('section')
+        if section is not None and section not in sections:
+            raise InvalidPageArgs(f"section harus salah satu dari: {', '.join(sections)}")
+        if cursor and section is None:
+            raise InvalidPageArgs(f"cursor hanya berlaku untuk satu daftar; sertakan section ({', '.join(sections)})")
+    if not cursor:
+        return None, limit
+    date_part, _, id_part = cursor.partition(':')
+    try:
+        return (datetime.datetime.strptime(date_part, '%Y-%m-%d').date(), int(id_part)), limit
+    except ValueError:
+        raise InvalidPageArgs(f"cursor tidak valid: {cursor!r}")
+
+def _keyset_page(query, date_col, id_col, cursor, limit):
+    """Ambil satu halaman terurut (tanggal, id) menurun; kembalikan (rows, next_cursor)."""
+    if cursor:
+        query = query.filter(tuple_(date_col, id_col) < cursor)
+    rows = query.order_by(date_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    last_date, last_id = getattr(last, date_col.key), getattr(last, id_col.key)
+    return rows, f"{last_date.isoformat()}:{last_id}"
+
+# ===================================================================
+# NOMINAL UANG (RUPIAH BULAT)
+# ===================================================================
+def _rupiah(value):
+    """Nominal dari input JSON (angka atau teks) ke rupiah bulat; pecahan dibulatkan setengah ke atas."""
+    if value is None or value == '':
+        return 0
+    try:
+        return int(decimal.Decimal(str(value)).quantize(decimal.Decimal(1), rounding=decimal.ROUND_HALF_UP))
+    except decimal.InvalidOperation:
+        raise ValueError(f"Nominal tidak valid: {value!r}")
+
+# ===================================================================
+# ETAG / CONDITIONAL GET
+# ===================================================================
+def _version_etag(*parts):
+    """ETag pendek dari token versi (dan parameter lain yang memengaruhi isi respons)."""
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()[:24]
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    # Browser tetap menyimpan respons, tapi selalu bertanya ulang (If-None-Match) sebelum memakainya
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _not_modified(etag):
+    return _with_etag(current_app.response_class(status=304), etag)
+
+def conditional_get(version_token):
+    """Jawab If-None-Match dengan 304 tanpa menjalankan view.
+
+    version_token(**view_args) -> bagian_token: query murah yang berubah setiap kali isi respons bisa
+    berubah. Respons selalu dikirim dengan no-cache: data historis yang sudah final pun memuat nama
+    (lapak, supplier, penanggung jawab) yang masih bisa diganti, jadi browser harus selalu bertanya ulang.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            try:
+                parts = version_token(**kwargs)
+            except Exception:
+                # Parameter tidak valid: biarkan view yang menyusun pesan kesalahannya
+                db.session.rollback()
+                return view(**kwargs)
+            etag = _version_etag(view.__name__, request.query_string.decode(), *parts)
+            if etag in request.if_none_match:
+                return _not_modified(etag)
+            response = current_app.make_response(view(**kwargs))
+            if response.status_code == 200:
+                _with_etag(response, etag)
+            return response
+        return wrapper
+    return decorator
+
 # ===================================================================
 # ENDPOINTS API
 # ===================================================================
-@app.route('/')
+@bp.route('/')
 def index():
     # Jika pengguna sudah login di sesi, arahkan ke dashboard
     if 'user_role' in session:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     # Jika tidak, tampilkan halaman login
     return render_template('login.html')
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
     # Jika pengguna belum login, tendang kembali ke halaman login
     if 'user_role' not in session:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     # Render template yang sesuai berdasarkan peran pengguna di sesi
     role = session['user_role']
@@ -40,30 +153,64 @@ def dashboard():
     else:
         # Jika ada peran yang tidak dikenal, logout saja
         session.clear()
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
+# --- HASH PASSWORD ---
+@bp.errorhandler(InvalidPageArgs)
+def invalid_page_args(e):
+    return jsonify({"success": False, "message": str(e)}), 400
+
+@bp.errorhandler(HashPoolBusy)
+def password_pool_busy(e):
+    response = jsonify({"success": False, "message": "Server sedang sibuk, silakan coba lagi sebentar."})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def _rehash_password(hasher, akun, password):
+    # Password teks biasa / hash lama diganti hash dengan metode sekarang setelah login berhasil.
+    # Kondisi password lama di WHERE agar tidak menimpa password yang baru diganti owner.
+    model, section = (Admin, SECTION_ADMIN) if akun.jenis == 'admin' else (Supplier, SECTION_SUPPLIER)
+    try:
+        updated = model.query.filter(model.id == akun.id, model.password == akun.password)\
+            .update({model.password: hasher.hash(password)}, synchronize_session=False)
+        if updated:
+            bump_versions(section)
+        db.session.commit()
+    except Exception as e:
+        # Login tetap berhasil; hash ulang dicoba lagi pada login berikutnya
+        db.session.rollback()
+        logging.warning(f"Gagal meng-hash ulang password {akun.jenis} {akun.id}: {e}")
+
 # Anda juga perlu mengatur sesi saat login berhasil
-@app.route('/api/login', methods=['POST'])
+@bp.route('/api/login', methods=['POST'])
 def handle_login():
     data = request.json
-    username = data.get('username', '').lower()
+    username = normalize_username(data.get('username', ''))
     password = data.get('password')
     
-    # ... (logika pengecekan username/password Anda tetap sama)
-    
-    # === TAMBAHAN PENTING: Simpan peran di sesi saat login berhasil ===
-    admin = Admin.query.filter(db.func.lower(Admin.username) == username).first()
-    if admin and check_password_hash(admin.password, password): # <--- UBAH 'Admin' menjadi 'admin'
-        role = 'owner' if admin.username == 'owner' else 'lapak'
-        user_info_dict = {"nama_lengkap": admin.nama_lengkap, "id": admin.id} # Buat dictionary biasa
-        session['user_role'] = role
-        session['user_info'] = user_info_dict # Gunakan untuk session
-        return jsonify({"success": True, "role": role, "user_info": user_info_dict}) # Gunakan juga untuk jsonify
+    # Admin dan supplier dicari sekaligus lewat index username_lower (satu query);
+    # admin diperiksa lebih dulu seperti sebelumnya
+    candidates = db.session.execute(db.union_all(
+        db.select(db.literal('admin').label('jenis'), Admin.id, Admin.username.label('username'), Admin.nama_lengkap.label('nama'), Admin.password)
+          .where(Admin.username_lower == username),
+        db.select(db.literal('supplier').label('jenis'), Supplier.id, Supplier.username, Supplier.nama_supplier, Supplier.password)
+          .where(Supplier.username_lower == username),
+    ).order_by('jenis')).all()
 
-    supplier = Supplier.query.filter(db.func.lower(Supplier.username) == username).first()
-    if supplier and check_password_hash(supplier.password, password):
-        role = 'supplier' # Tambahkan ini untuk konsistensi
-        user_info_dict = {"nama_supplier": supplier.nama_supplier, "supplier_id": supplier.id} # Buat dictionary biasa
+    # === TAMBAHAN PENTING: Simpan peran di sesi saat login berhasil ===
+    hasher = password_hasher(current_app)
+    for akun in candidates:
+        cocok, perlu_hash_ulang = hasher.verify(akun.password, password)
+        if not cocok:
+            continue
+        if perlu_hash_ulang:
+            _rehash_password(hasher, akun, password)
+        if akun.jenis == 'admin':
+            role = 'owner' if akun.username == 'owner' else 'lapak'
+            user_info_dict = {"nama_lengkap": akun.nama, "id": akun.id} # Buat dictionary biasa
+        else:
+            role = 'supplier' # Tambahkan ini untuk konsistensi
+            user_info_dict = {"nama_supplier": akun.nama, "supplier_id": akun.id} # Buat dictionary biasa
         session['user_role'] = role
         session['user_info'] = user_info_dict # Gunakan untuk session
         return jsonify({"success": True, "role": role, "user_info": user_info_dict}) # Gunakan juga untuk jsonify
@@ -71,97 +218,140 @@ def handle_login():
     return jsonify({"success": False, "message": "Username atau password salah"}), 401
     
 # Anda juga perlu rute untuk logout
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear() # Hapus semua data dari sesi
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 # --- OWNER API ---
-@app.route('/api/get_data_owner', methods=['GET'])
+# Data dashboard owner dibangun per bagian dan di-cache dengan key token versi bagian tsb.
+def _owner_admin_data():
+    admins = Admin.query.filter(Admin.username != 'owner').all()
+    return [{"id": u.id, "nama_lengkap": u.nama_lengkap, "nik": u.nik, "username": u.username, "email": u.email, "nomor_kontak": u.nomor_kontak, "password": u.password} for u in admins]
+
+def _owner_lapak_data():
+    lapaks = Lapak.query.options(joinedload(Lapak.penanggung_jawab), joinedload(Lapak.anggota)).all()
+    return [{"id": l.id, "lokasi": l.lokasi, "penanggung_jawab": f"{l.penanggung_jawab.nama_lengkap}", "user_id": l.user_id, "anggota": [{"id": a.id, "nama": a.nama_lengkap} for a in l.anggota], "anggota_ids": [a.id for a in l.anggota]} for l in lapaks]
+
+def _owner_supplier_data():
+    """Supplier beserta produk & alokasi lapak dalam jumlah query yang tetap (tidak bergantung jumlah supplier)."""
+    suppliers = Supplier.query.all()
+
+    # Ambil produk sebagai kolom biasa agar relasi lapaks (lazy='subquery') tidak ikut dimuat
+    products = db.session.query(
+        Product.id, Product.supplier_id, Product.nama_produk, Product.harga_beli, Product.harga_jual
+    ).filter(Product.supplier_id.isnot(None)).order_by(Product.id).all()
+
+    links = db.session.query(
+        product_lapak_association.c.product_id, product_lapak_association.c.lapak_id
+    ).all()
+    lapak_ids_per_product = {}
+    for product_id, lapak_id in links:
+        lapak_ids_per_product.setdefault(product_id, []).append(lapak_id)
+
+    products_per_supplier = {}
+    for p in products:
+        products_per_supplier.setdefault(p.supplier_id, []).append(p)
+
+    # --- REVISI: Sertakan info pembayaran ---
+    supplier_list = []
+    for s in suppliers:
+        products = products_per_supplier.get(s.id, [])
+        product_list = [{
+            "id": p.id,
+            "name": p.nama_produk,
+            "harga_beli": p.harga_beli,
+            "harga_jual": p.harga_jual
+        } for p in products]
+
+        # Dapatkan alokasi lapak (kita asumsikan semua produk supplier ada di lapak yang sama)
+        lapak_ids = []
+        if products:
+            lapak_ids = sorted(lapak_ids_per_product.get(products[0].id, []))
+
+        supplier_list.append({
+            "id": s.id, "nama_supplier": s.nama_supplier, "username": s.username, 
+            "kontak": s.kontak, "nomor_register": s.nomor_register, "alamat": s.alamat, 
+            "password": s.password, "metode_pembayaran": s.metode_pembayaran, 
+            "nomor_rekening": s.nomor_rekening,
+            "products": product_list, # Data produk baru
+            "lapak_ids": lapak_ids   # Data alokasi lapak baru
+        })
+    return supplier_list
+
+def _owner_summary(start_of_month):
+    total_pendapatan_bulan_ini = db.session.query(sum_rupiah(RingkasanHarian.pendapatan)).filter(RingkasanHarian.tanggal >= start_of_month).scalar() or 0
+    total_biaya_bulan_ini = db.session.query(sum_rupiah(RingkasanPembayaranHarian.jumlah_pembayaran)).filter(RingkasanPembayaranHarian.tanggal >= start_of_month).scalar() or 0
+    return {"pendapatan_bulan_ini": total_pendapatan_bulan_ini, "biaya_bulan_ini": total_biaya_bulan_ini}
+
+@bp.route('/api/get_data_owner', methods=['GET'])
 def get_owner_data():
     try:
-        admins = Admin.query.filter(Admin.username != 'owner').all()
-        lapaks = Lapak.query.options(joinedload(Lapak.penanggung_jawab), joinedload(Lapak.anggota)).all()
-        suppliers = Supplier.query.all()
-        
-        admin_list = [{"id": u.id, "nama_lengkap": u.nama_lengkap, "nik": u.nik, "username": u.username, "email": u.email, "nomor_kontak": u.nomor_kontak, "password": u.password} for u in admins]
-        lapak_list = [{"id": l.id, "lokasi": l.lokasi, "penanggung_jawab": f"{l.penanggung_jawab.nama_lengkap}", "user_id": l.user_id, "anggota": [{"id": a.id, "nama": a.nama_lengkap} for a in l.anggota], "anggota_ids": [a.id for a in l.anggota]} for l in lapaks]
-        # --- REVISI: Sertakan info pembayaran ---
-        supplier_list = []
-        for s in suppliers:
-            # Dapatkan produk untuk setiap supplier
-            products = Product.query.filter_by(supplier_id=s.id).all()
-            product_list = [{
-                "id": p.id,
-                "name": p.nama_produk,
-                "harga_beli": p.harga_beli,
-                "harga_jual": p.harga_jual
-            } for p in products]
-
-            # Dapatkan alokasi lapak (kita asumsikan semua produk supplier ada di lapak yang sama)
-            lapak_ids = []
-            if products:
-                lapak_ids = [lapak.id for lapak in products[0].lapaks]
-
-            supplier_list.append({
-                "id": s.id, "nama_supplier": s.nama_supplier, "username": s.username, 
-                "kontak": s.kontak, "nomor_register": s.nomor_register, "alamat": s.alamat, 
-                "password": s.password, "metode_pembayaran": s.metode_pembayaran, 
-                "nomor_rekening": s.nomor_rekening,
-                "products": product_list, # Data produk baru
-                "lapak_ids": lapak_ids   # Data alokasi lapak baru
-            })
-        
-        today = datetime.date.today()
-        start_of_month = today.replace(day=1)
-        total_pendapatan_bulan_ini = db.session.query(func.sum(LaporanHarian.total_pendapatan)).filter(LaporanHarian.tanggal >= start_of_month, LaporanHarian.status == 'Terkonfirmasi').scalar() or 0
-        total_biaya_bulan_ini = db.session.query(func.sum(PembayaranSupplier.jumlah_pembayaran)).filter(PembayaranSupplier.tanggal_pembayaran >= start_of_month).scalar() or 0
-        return jsonify({"admin_data": admin_list, "lapak_data": lapak_list, "supplier_data": supplier_list, "summary": {"pendapatan_bulan_ini": total_pendapatan_bulan_ini, "biaya_bulan_ini": total_biaya_bulan_ini}})
+        start_of_month = datetime.date.today().replace(day=1)
+        versions = current_versions()
+        etag = _version_etag('owner', start_of_month.isoformat(), *versions.values())
+        if etag in request.if_none_match:
+            return _not_modified(etag)
+
+        response = jsonify({
+            "admin_data": cached('owner_admin', versions[SECTION_ADMIN], _owner_admin_data),
+            "lapak_data": cached('owner_lapak', versions[SECTION_LAPAK], _owner_lapak_data),
+            "supplier_data": cached('owner_supplier', versions[SECTION_SUPPLIER], _owner_supplier_data),
+            "summary": cached('owner_summary', (versions[SECTION_SUMMARY], start_of_month), lambda: _owner_summary(start_of_month)),
+        })
+        return _with_etag(response, etag)
     except Exception as e:
         return jsonify({"success": False, "message": f"Terjadi kesalahan server: {str(e)}"}), 500
 
-@app.route('/api/add_admin', methods=['POST'])
+@bp.route('/api/add_admin', methods=['POST'])
 def add_admin():
     data = request.json
     if data['password'] != data['password_confirm']: return jsonify({"success": False, "message": "Password dan konfirmasi password tidak cocok."}), 400
+    hashed_password = password_hasher(current_app).hash(data['password'])
     try:
-        hashed_password = generate_password_hash(data['password']) # <--- TAMBAHKAN BARIS INI
         new_admin = Admin(nama_lengkap=data['nama_lengkap'], nik=data['nik'], username=data['username'], email=data['email'], nomor_kontak=data['nomor_kontak'], password=hashed_password) # <--- GUNAKAN HASHED_PASSWORD
         db.session.add(new_admin)
+        bump_versions(SECTION_ADMIN, SECTION_LAPAK)
         db.session.commit()
         return jsonify({"success": True, "message": "Admin berhasil ditambahkan"})
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "Gagal: Username, NIK, atau email sudah ada."}), 400
 
-@app.route('/api/update_admin/<int:admin_id>', methods=['PUT'])
+@bp.route('/api/update_admin/<int:admin_id>', methods=['PUT'])
 def update_admin(admin_id):
     data = request.json
     admin = Admin.query.get_or_404(admin_id)
     if data.get('password') and data['password'] != data['password_confirm']: return jsonify({"success": False, "message": "Password dan konfirmasi password tidak cocok."}), 400
+    # Hash dikerjakan sebelum transaksi dibuka (penuh -> 503 lewat errorhandler HashPoolBusy)
+    hashed_password = password_hasher(current_app).hash(data['password']) if data.get('password') else None
     try:
+        if admin.nama_lengkap != data['nama_lengkap']:
+            hapus_arsip_penanggung_jawab(admin_id)
         admin.nama_lengkap = data['nama_lengkap']
         admin.nik = data['nik']
         admin.username = data['username']
         admin.email = data['email']
         admin.nomor_kontak = data['nomor_kontak']
-        if data.get('password'):
-            admin.password = generate_password_hash(data['password']) # <--- UBAH BARIS INI
+        if hashed_password:
+            admin.password = hashed_password
+        bump_versions(SECTION_ADMIN, SECTION_LAPAK)
         db.session.commit()
         return jsonify({"success": True, "message": "Data Admin berhasil diperbarui"})
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "Gagal: Username, NIK, atau email sudah digunakan oleh admin lain."}), 400
 
-@app.route('/api/delete_admin/<int:admin_id>', methods=['DELETE'])
+@bp.route('/api/delete_admin/<int:admin_id>', methods=['DELETE'])
 def delete_admin(admin_id):
     admin = Admin.query.get_or_404(admin_id)
     if Lapak.query.filter_by(user_id=admin_id).first(): return jsonify({"success": False, "message": "Gagal menghapus: Admin ini adalah Penanggung Jawab sebuah lapak."}), 400
     db.session.delete(admin)
+    bump_versions(SECTION_ADMIN, SECTION_LAPAK)
     db.session.commit()
     return jsonify({"success": True, "message": "Admin berhasil dihapus"})
 
-@app.route('/api/add_lapak', methods=['POST'])
+@bp.route('/api/add_lapak', methods=['POST'])
 def add_lapak():
     data = request.json
     try:
@@ -169,72 +359,73 @@ def add_lapak():
         anggota_ids = data.get('anggota_ids', [])
         if anggota_ids: new_lapak.anggota = Admin.query.filter(Admin.id.in_(anggota_ids)).all()
         db.session.add(new_lapak)
+        bump_versions(SECTION_LAPAK)
         db.session.commit()
         return jsonify({"success": True, "message": "Lapak berhasil ditambahkan"})
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "Nama lokasi lapak sudah ada."}), 400
 
-@app.route('/api/update_lapak/<int:lapak_id>', methods=['PUT'])
+@bp.route('/api/update_lapak/<int:lapak_id>', methods=['PUT'])
 def update_lapak(lapak_id):
     data = request.json
     lapak = Lapak.query.get_or_404(lapak_id)
     try:
+        if lapak.lokasi != data['lokasi'] or lapak.user_id != data['user_id']:
+            hapus_arsip_lapak(lapak_id)
         lapak.lokasi = data['lokasi']
         lapak.user_id = data['user_id']
         anggota_ids = data.get('anggota_ids', [])
         lapak.anggota = Admin.query.filter(Admin.id.in_(anggota_ids)).all()
+        bump_versions(SECTION_LAPAK)
         db.session.commit()
         return jsonify({"success": True, "message": "Data Lapak berhasil diperbarui"})
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "Nama lokasi lapak sudah digunakan."}), 400
 
-@app.route('/api/delete_lapak/<int:lapak_id>', methods=['DELETE'])
+@bp.route('/api/delete_lapak/<int:lapak_id>', methods=['DELETE'])
 def delete_lapak(lapak_id):
     lapak = Lapak.query.get_or_404(lapak_id)
+    RingkasanHarian.query.filter_by(lapak_id=lapak_id).delete()
+    hapus_arsip_lapak(lapak_id)
     db.session.delete(lapak)
+    bump_versions(SECTION_LAPAK, SECTION_SUPPLIER, SECTION_SUMMARY)
     db.session.commit()
     return jsonify({"success": True, "message": "Lapak berhasil dihapus"})
 
 # --- REVISI: Logika baru untuk nomor registrasi ---
-@app.route('/api/get_next_supplier_reg_number', methods=['GET'])
+@bp.route('/api/get_next_supplier_reg_number', methods=['GET'])
 def get_next_supplier_reg_number():
-    used_numbers = set()
-    suppliers = Supplier.query.filter(Supplier.nomor_register.like('REG%')).all()
-    for s in suppliers:
-        num_part = re.search(r'\d+', s.nomor_register)
-        if num_part:
-            used_numbers.add(int(num_part.group()))
-    
-    next_id = 1
-    while next_id in used_numbers:
-        next_id += 1
-        
-    return jsonify({"success": True, "reg_number": f"REG{next_id:03d}"})
+    # Hanya pratinjau; nomor sebenarnya dialokasikan di add_supplier
+    return jsonify({"success": True, "reg_number": pratinjau_nomor_register()})
 
 # --- REVISI: Tambahkan metode pembayaran & no rekening ---
-@app.route('/api/add_supplier', methods=['POST'])
+@bp.route('/api/add_supplier', methods=['POST'])
 def add_supplier():
     data = request.json
     if data['password'] != data['password_confirm']:
         return jsonify({"success": False, "message": "Password dan konfirmasi password tidak cocok."}), 400
+    hashed_password = password_hasher(current_app).hash(data['password'])
     
     try:
         new_supplier = Supplier(
             nama_supplier=data['nama_supplier'],
             username=data.get('username'),
             kontak=data.get('kontak'),
-            nomor_register=data.get('nomor_register'),
+            # Nomor dari form hanya pratinjau; nomor dialokasikan di transaksi ini agar tidak bentrok
+            nomor_register=alokasi_nomor_register(),
             alamat=data.get('alamat'),
-            password=generate_password_hash(data['password']), # <--- UBAH DISINI
+            password=hashed_password,
             metode_pembayaran=data.get('metode_pembayaran'),
             nomor_rekening=data.get('nomor_rekening')
         )
-        new_supplier.balance = SupplierBalance(balance=0.0)
+        new_supplier.balance = SupplierBalance(balance=0)
         db.session.add(new_supplier)
+        bump_versions(SECTION_SUPPLIER)
+        nomor_register = new_supplier.nomor_register
         db.session.commit()
-        return jsonify({"success": True, "message": "Supplier berhasil ditambahkan"})
+        return jsonify({"success": True, "message": f"Supplier berhasil ditambahkan dengan nomor register {nomor_register}", "nomor_register": nomor_register})
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "Gagal: Username atau Nomor Register sudah ada."}), 400
@@ -244,24 +435,28 @@ def add_supplier():
         return jsonify({"success": False, "message": f"Terjadi kesalahan server: {str(e)}"}), 500
 
 # --- REVISI: Update metode pembayaran & no rekening ---
-@app.route('/api/update_supplier/<int:supplier_id>', methods=['PUT'])
+@bp.route('/api/update_supplier/<int:supplier_id>', methods=['PUT'])
 def update_supplier(supplier_id):
     data = request.json
     supplier = Supplier.query.get_or_404(supplier_id)
 
     if data.get('password') and data['password'] != data['password_confirm']:
         return jsonify({"success": False, "message": "Password dan konfirmasi password tidak cocok."}), 400
+    hashed_password = password_hasher(current_app).hash(data['password']) if data.get('password') else None
 
     try:
+        if supplier.nama_supplier != data['nama_supplier']:
+            hapus_arsip_supplier(supplier_id)
         supplier.nama_supplier = data['nama_supplier']
         supplier.username = data.get('username')
         supplier.kontak = data.get('kontak')
         supplier.alamat = data.get('alamat')
         supplier.metode_pembayaran = data.get('metode_pembayaran')
         supplier.nomor_rekening = data.get('nomor_rekening')
-        if data.get('password'):
-            supplier.password = generate_password_hash(data['password']) # <--- UBAH DISINI
+        if hashed_password:
+            supplier.password = hashed_password
         
+        bump_versions(SECTION_SUPPLIER)
         db.session.commit()
         return jsonify({"success": True, "message": "Data Supplier berhasil diperbarui"})
     except IntegrityError:
@@ -272,15 +467,21 @@ def update_supplier(supplier_id):
         logging.error(f"Error updating supplier: {str(e)}")
         return jsonify({"success": False, "message": f"Terjadi kesalahan server: {str(e)}"}), 500
 
-@app.route('/api/delete_supplier/<int:supplier_id>', methods=['DELETE'])
+@bp.route('/api/delete_supplier/<int:supplier_id>', methods=['DELETE'])
 def delete_supplier(supplier_id):
     supplier = Supplier.query.get_or_404(supplier_id)
+    hapus_arsip_supplier(supplier_id)
     db.session.delete(supplier)
+    bump_versions(SECTION_SUPPLIER)
     db.session.commit()
     return jsonify({"success": True, "message": "Supplier berhasil dihapus"})
 
-@app.route('/api/get_owner_supplier_history/<int:supplier_id>', methods=['GET'])
+# Riwayat supplier memuat dua daftar (pembayaran & penjualan), masing-masing dengan cursor sendiri
+HISTORY_SECTIONS = ('payments', 'sales')
+
+@bp.route('/api/get_owner_supplier_history/<int:supplier_id>', methods=['GET'])
 def get_owner_supplier_history(supplier_id):
+    cursor, limit = _page_args(request.args, HISTORY_SECTIONS)
     try:
         # Ambil parameter tanggal dari request
         start_date_str = request.args.get('start_date')
@@ -291,7 +492,7 @@ def get_owner_supplier_history(supplier_id):
         
         # Query dasar untuk penjualan
         sales_query = db.session.query(
-            LaporanHarian.tanggal, Lapak.lokasi, Product.nama_produk,
+            LaporanHarian.tanggal, Lapak.lokasi, Product.nama_produk, LaporanHarianProduk.id,
             LaporanHarianProduk.jumlah_terjual, LaporanHarianProduk.total_harga_beli
         ).select_from(LaporanHarianProduk)\
          .join(Product, Product.id == LaporanHarianProduk.product_id)\
@@ -310,113 +511,152 @@ def get_owner_supplier_history(supplier_id):
             payments_query = payments_query.filter(PembayaranSupplier.tanggal_pembayaran <= end_date)
             sales_query = sales_query.filter(LaporanHarian.tanggal <= end_date)
 
-        # Eksekusi query setelah filter diterapkan
-        payments = payments_query.order_by(PembayaranSupplier.tanggal_pembayaran.desc()).all()
-        sales = sales_query.order_by(LaporanHarian.tanggal.desc(), Lapak.lokasi).all()
+        # Eksekusi query per halaman; section=payments/sales untuk memuat halaman berikutnya satu tabel saja
+        section = request.args.get('section')
+        response = {"success": True, "next_cursor": {}}
+
+        if section in (None, 'payments'):
+            payments, response["next_cursor"]["payments"] = _keyset_page(
+                payments_query, PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.id, cursor, limit)
+            response["payments"] = [{"tanggal": p.tanggal_pembayaran.strftime('%Y-%m-%d'), "jumlah": p.jumlah_pembayaran, "metode": p.metode_pembayaran} for p in payments]
 
-        # Proses hasil
-        payment_list = [{"tanggal": p.tanggal_pembayaran.strftime('%Y-%m-%d'), "jumlah": p.jumlah_pembayaran, "metode": p.metode_pembayaran} for p in payments]
-        sales_list = [{"tanggal": s.tanggal.strftime('%Y-%m-%d'), "lokasi": s.lokasi, "nama_produk": s.nama_produk, "terjual": s.jumlah_terjual, "total_harga_beli": s.total_harga_beli} for s in sales]
+        if section in (None, 'sales'):
+            sales, response["next_cursor"]["sales"] = _keyset_page(
+                sales_query, LaporanHarian.tanggal, LaporanHarianProduk.id, cursor, limit)
+            response["sales"] = [{"tanggal": s.tanggal.strftime('%Y-%m-%d'), "lokasi": s.lokasi, "nama_produk": s.nama_produk, "terjual": s.jumlah_terjual, "total_harga_beli": s.total_harga_beli} for s in sales]
         
-        return jsonify({"success": True, "payments": payment_list, "sales": sales_list})
+        return jsonify(response)
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 # --- OWNER API (Laporan & Pembayaran) ---
 # TAMBAHKAN DUA FUNGSI BARU INI DI app.py
 
-@app.route('/api/get_laporan_pendapatan_harian')
-def get_laporan_pendapatan_harian():
-    try:
-        date_str = request.args.get('date')
-        target_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+# --- LAPORAN PENDAPATAN & BIAYA HARIAN ---
+# Satu SELECT berisi kolom yang dibutuhkan saja (tuple, tanpa objek ORM): laporan -> lapak -> PJ,
+# rincian yang terjual -> produk -> supplier; hasilnya dikelompokkan per laporan di Python.
+LAPORAN_HARIAN_MAX_DAYS = 31
 
-        reports = LaporanHarian.query.options(
-            joinedload(LaporanHarian.lapak),
-            joinedload(LaporanHarian.rincian_produk).joinedload(LaporanHarianProduk.product).joinedload(Product.supplier)
-        ).filter(
-            LaporanHarian.tanggal == target_date,
-            LaporanHarian.status == 'Terkonfirmasi'
-        ).all()
-
-        total_harian = sum(r.total_pendapatan for r in reports)
-        laporan_per_lapak = []
-
-        for report in reports:
-            rincian_pendapatan = []
-            for item in report.rincian_produk:
-                if item.jumlah_terjual > 0:
-                    rincian_pendapatan.append({
-                        "produk": item.product.nama_produk,
-                        "supplier": item.product.supplier.nama_supplier if item.product.supplier else "N/A",
-                        "stok_awal": item.stok_awal,
-                        "stok_akhir": item.stok_akhir,
-                        "jumlah": item.jumlah_terjual
-                    })
-            
-            if rincian_pendapatan:
-                 laporan_per_lapak.append({
-                    "lokasi": report.lapak.lokasi,
-                    "penanggung_jawab": report.lapak.penanggung_jawab.nama_lengkap,
-                    "total_pendapatan": report.total_pendapatan,
-                    "rincian_pendapatan": rincian_pendapatan
-                })
+def _laporan_harian_range():
+    """Rentang dari ?date= atau ?start_date=&end_date= (maksimal LAPORAN_HARIAN_MAX_DAYS hari)."""
+    if request.args.get('date'):
+        start_date = end_date = datetime.datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+    else:
+        start_date = datetime.datetime.strptime(request.args['start_date'], '%Y-%m-%d').date()
+        end_date = datetime.datetime.strptime(request.args.get('end_date') or request.args['start_date'], '%Y-%m-%d').date()
+    if end_date < start_date or (end_date - start_date).days >= LAPORAN_HARIAN_MAX_DAYS:
+        raise ValueError(f"Rentang tanggal harus 1-{LAPORAN_HARIAN_MAX_DAYS} hari.")
+    return start_date, end_date
+
+def _laporan_harian_token():
+    """Versi laporan per rentang: jumlah laporan & yang masih menunggu (index tanggal+status) dan nama master data."""
+    start_date, end_date = _laporan_harian_range()
+    total, pending = db.session.query(
+        func.count(LaporanHarian.id),
+        func.count(case((LaporanHarian.status == 'Menunggu Konfirmasi', 1)))
+    ).filter(LaporanHarian.tanggal >= start_date, LaporanHarian.tanggal <= end_date).one()
+    versions = current_versions()
+    return (start_date, end_date, total, pending, versions[SECTION_LAPAK], versions[SECTION_SUPPLIER])
+
+def _laporan_harian(start_date, end_date):
+    """Laporan terkonfirmasi dalam rentang beserta rincian yang terjual; kembalikan (laporan, total pendapatan, total biaya)."""
+    rows = db.session.query(
+        LaporanHarian.id, LaporanHarian.tanggal, LaporanHarian.total_pendapatan, LaporanHarian.total_biaya_supplier,
+        Lapak.lokasi, Admin.nama_lengkap,
+        Product.nama_produk, Supplier.nama_supplier, LaporanHarianProduk.stok_awal, LaporanHarianProduk.stok_akhir,
+        LaporanHarianProduk.jumlah_terjual, LaporanHarianProduk.total_harga_jual, LaporanHarianProduk.total_harga_beli
+    ).select_from(LaporanHarian)\
+     .join(Lapak, Lapak.id == LaporanHarian.lapak_id)\
+     .join(Admin, Admin.id == Lapak.user_id)\
+     .outerjoin(LaporanHarianProduk, (LaporanHarianProduk.laporan_id == LaporanHarian.id) & (LaporanHarianProduk.jumlah_terjual > 0))\
+     .outerjoin(Product, Product.id == LaporanHarianProduk.product_id)\
+     .outerjoin(Supplier, Supplier.id == Product.supplier_id)\
+     .filter(LaporanHarian.tanggal >= start_date, LaporanHarian.tanggal <= end_date, LaporanHarian.status == 'Terkonfirmasi')\
+     .order_by(LaporanHarian.tanggal, LaporanHarian.id, LaporanHarianProduk.id)
+
+    laporan, total_pendapatan, total_biaya = [], 0, 0
+    for row in rows:
+        if not laporan or laporan[-1]["laporan_id"] != row.id:
+            # Total harian tetap menghitung laporan tanpa produk terjual (seperti sebelumnya)
+            total_pendapatan += row.total_pendapatan
+            total_biaya += row.total_biaya_supplier
+            laporan.append({"laporan_id": row.id, "tanggal": row.tanggal.isoformat(), "lokasi": row.lokasi,
+                            "penanggung_jawab": row.nama_lengkap, "total_pendapatan": row.total_pendapatan,
+                            "total_biaya": row.total_biaya_supplier, "rincian": []})
+        if row.nama_produk is not None:
+            laporan[-1]["rincian"].append({
+                "produk": row.nama_produk, "supplier": row.nama_supplier or "N/A",
+                "stok_awal": row.stok_awal, "stok_akhir": row.stok_akhir, "jumlah": row.jumlah_terjual,
+                "pendapatan": row.total_harga_jual, "biaya": row.total_harga_beli
+            })
+    return [l for l in laporan if l["rincian"]], total_pendapatan, total_biaya
 
+@bp.route('/api/get_laporan_harian')
+@conditional_get(_laporan_harian_token)
+def get_laporan_harian():
+    """Pendapatan & biaya per lapak untuk satu tanggal (?date=) atau rentang (?start_date=&end_date=)."""
+    try:
+        start_date, end_date = _laporan_harian_range()
+    except (KeyError, ValueError) as e:
+        return jsonify({"success": False, "message": f"Tanggal tidak valid: {e}"}), 400
+    try:
+        laporan, total_pendapatan, total_biaya = _laporan_harian(start_date, end_date)
         return jsonify({
-            "total_harian": total_harian,
-            "laporan_per_lapak": laporan_per_lapak
+            "success": True,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "total_pendapatan": total_pendapatan,
+            "total_biaya": total_biaya,
+            "laporan_per_lapak": laporan
+        })
+    except Exception as e:
+        logging.error(f"Error fetching laporan harian: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+
+# Dua endpoint lama tetap tersedia (bentuk respons sama), kini dari query yang sama
+@bp.route('/api/get_laporan_pendapatan_harian')
+@conditional_get(_laporan_harian_token)
+def get_laporan_pendapatan_harian():
+    try:
+        target_date = datetime.datetime.strptime(request.args.get('date'), '%Y-%m-%d').date()
+        laporan, total_pendapatan, _ = _laporan_harian(target_date, target_date)
+        return jsonify({
+            "total_harian": total_pendapatan,
+            "laporan_per_lapak": [{
+                "lokasi": l["lokasi"],
+                "penanggung_jawab": l["penanggung_jawab"],
+                "total_pendapatan": l["total_pendapatan"],
+                "rincian_pendapatan": [{key: item[key] for key in ("produk", "supplier", "stok_awal", "stok_akhir", "jumlah")}
+                                       for item in l["rincian"]]
+            } for l in laporan]
         })
 
     except Exception as e:
         logging.error(f"Error fetching pendapatan harian: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
 
-@app.route('/api/get_laporan_biaya_harian')
+@bp.route('/api/get_laporan_biaya_harian')
+@conditional_get(_laporan_harian_token)
 def get_laporan_biaya_harian():
     try:
-        date_str = request.args.get('date')
-        target_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-
-        reports = LaporanHarian.query.options(
-            joinedload(LaporanHarian.lapak),
-            joinedload(LaporanHarian.rincian_produk).joinedload(LaporanHarianProduk.product).joinedload(Product.supplier)
-        ).filter(
-            LaporanHarian.tanggal == target_date,
-            LaporanHarian.status == 'Terkonfirmasi'
-        ).all()
-
-        total_harian = sum(r.total_biaya_supplier for r in reports)
-        laporan_per_lapak = []
-
-        for report in reports:
-            rincian_biaya = []
-            for item in report.rincian_produk:
-                 if item.jumlah_terjual > 0:
-                    rincian_biaya.append({
-                        "produk": item.product.nama_produk,
-                        "supplier": item.product.supplier.nama_supplier if item.product.supplier else "N/A",
-                        "jumlah": item.jumlah_terjual,
-                        "biaya": item.total_harga_beli
-                    })
-            
-            if rincian_biaya:
-                laporan_per_lapak.append({
-                    "lokasi": report.lapak.lokasi,
-                    "penanggung_jawab": report.lapak.penanggung_jawab.nama_lengkap,
-                    "total_biaya": report.total_biaya_supplier,
-                    "rincian_biaya": rincian_biaya
-                })
-
+        target_date = datetime.datetime.strptime(request.args.get('date'), '%Y-%m-%d').date()
+        laporan, _, total_biaya = _laporan_harian(target_date, target_date)
         return jsonify({
-            "total_harian": total_harian,
-            "laporan_per_lapak": laporan_per_lapak
+            "total_harian": total_biaya,
+            "laporan_per_lapak": [{
+                "lokasi": l["lokasi"],
+                "penanggung_jawab": l["penanggung_jawab"],
+                "total_biaya": l["total_biaya"],
+                "rincian_biaya": [{key: item[key] for key in ("produk", "supplier", "jumlah", "biaya")} for item in l["rincian"]]
+            } for l in laporan]
         })
 
     except Exception as e:
         logging.error(f"Error fetching biaya harian: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
 
-@app.route('/api/get_manage_reports')
+@bp.route('/api/get_manage_reports')
 def get_manage_reports():
+    cursor, limit = _page_args(request.args)
     try:
         # Ambil semua parameter dari request
         start_date_str = request.args.get('start_date')
@@ -446,42 +686,63 @@ def get_manage_reports():
                          .filter(Product.supplier_id == supplier_id)\
                          .distinct() # Gunakan distinct untuk menghindari duplikat laporan
 
-        reports = query.order_by(LaporanHarian.tanggal.desc()).all()
+        reports, next_cursor = _keyset_page(query, LaporanHarian.tanggal, LaporanHarian.id, cursor, limit)
         
         report_list = [{"id": r.id, "lokasi": r.lapak.lokasi, "penanggung_jawab": r.lapak.penanggung_jawab.nama_lengkap, "tanggal": r.tanggal.isoformat(), "total_pendapatan": r.total_pendapatan, "total_produk_terjual": r.total_produk_terjual, "status": r.status} for r in reports]
-        return jsonify({"success": True, "reports": report_list})
+        return jsonify({"success": True, "reports": report_list, "next_cursor": next_cursor})
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-@app.route('/api/confirm_report/<int:report_id>', methods=['POST'])
+@bp.route('/api/confirm_report/<int:report_id>', methods=['POST'])
 def confirm_report(report_id):
     try:
-        report = LaporanHarian.query.options(joinedload(LaporanHarian.rincian_produk).joinedload(LaporanHarianProduk.product)).get(report_id)
-        if not report: return jsonify({"success": False, "message": "Laporan tidak ditemukan."}), 404
-        if report.status == 'Terkonfirmasi': return jsonify({"success": False, "message": "Laporan ini sudah dikonfirmasi."}), 400
-        report.status = 'Terkonfirmasi'
-        supplier_costs = {}
-        for rincian in report.rincian_produk:
-            if rincian.product.supplier_id:
-                sid = rincian.product.supplier_id
-                cost = rincian.total_harga_beli
-                supplier_costs[sid] = supplier_costs.get(sid, 0) + cost
-        for supplier_id, cost in supplier_costs.items():
-            balance = SupplierBalance.query.filter_by(supplier_id=supplier_id).first()
-            if balance: balance.balance += cost
-            else: db.session.add(SupplierBalance(supplier_id=supplier_id, balance=cost))
+        # Transisi status dijaga di WHERE: hanya satu request yang bisa mengkonfirmasi laporan ini
+        confirmed = LaporanHarian.query.filter_by(id=report_id, status='Menunggu Konfirmasi')\
+            .update({LaporanHarian.status: 'Terkonfirmasi'}, synchronize_session=False)
+        if not confirmed:
+            db.session.rollback()
+            if not db.session.get(LaporanHarian, report_id): return jsonify({"success": False, "message": "Laporan tidak ditemukan."}), 404
+            return jsonify({"success": False, "message": "Laporan ini sudah dikonfirmasi."}), 400
+
+        report = db.session.query(LaporanHarian.tanggal, LaporanHarian.lapak_id).filter(LaporanHarian.id == report_id).one()
+        per_supplier = {sid: (pendapatan, biaya, terjual) for sid, pendapatan, biaya, terjual in db.session.query(
+            SUPPLIER_ID_RINGKASAN,
+            sum_rupiah(LaporanHarianProduk.total_harga_jual),
+            sum_rupiah(LaporanHarianProduk.total_harga_beli),
+            func.sum(LaporanHarianProduk.jumlah_terjual)
+        ).join(Product, Product.id == LaporanHarianProduk.product_id)\
+         .filter(LaporanHarianProduk.laporan_id == report_id)\
+         .group_by(SUPPLIER_ID_RINGKASAN)}
+
+        supplier_costs = {sid: biaya for sid, (_, biaya, _) in per_supplier.items() if sid != SUPPLIER_MANUAL}
+        if supplier_costs:
+            existing = {sid for (sid,) in db.session.query(SupplierBalance.supplier_id).filter(SupplierBalance.supplier_id.in_(supplier_costs))}
+            missing = [{"supplier_id": sid, "balance": 0} for sid in supplier_costs if sid not in existing]
+            if missing:
+                db.session.execute(db.insert(SupplierBalance), missing)
+            # Satu UPDATE ... SET balance = balance + :delta per supplier, dikirim sebagai executemany
+            db.session.execute(
+                db.update(SupplierBalance.__table__)
+                  .where(SupplierBalance.__table__.c.supplier_id == db.bindparam('sid'))
+                  .values(balance=SupplierBalance.__table__.c.balance + db.bindparam('delta')),
+                [{"sid": sid, "delta": cost} for sid, cost in supplier_costs.items()]
+            )
+            catat_mutasi_penjualan(report_id, supplier_costs)
+        catat_penjualan(report.tanggal, report.lapak_id, per_supplier)
+        arsipkan_laporan(report_id)
+        bump_versions(SECTION_SUMMARY)
         db.session.commit()
         return jsonify({"success": True, "message": "Laporan berhasil dikonfirmasi."})
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
         
-@app.route('/api/get_pembayaran_data', methods=['GET'])
+@bp.route('/api/get_pembayaran_data', methods=['GET'])
 def get_pembayaran_data():
     try:
         # Mengambil data tagihan SEMUA supplier
         suppliers = Supplier.query.options(joinedload(Supplier.balance)).all()
-        supplier_list = [{"supplier_id": s.id, "nama_supplier": s.nama_supplier, "total_tagihan": s.balance.balance if s.balance else 0.0, "metode_pembayaran": s.metode_pembayaran, "nomor_rekening": s.nomor_rekening} for s in suppliers]
+        supplier_list = [{"supplier_id": s.id, "nama_supplier": s.nama_supplier, "total_tagihan": s.balance.balance if s.balance else 0, "metode_pembayaran": s.metode_pembayaran, "nomor_rekening": s.nomor_rekening} for s in suppliers]
         
         return jsonify({
             "success": True, 
@@ -491,33 +752,49 @@ def get_pembayaran_data():
         return jsonify({"success": False, "message": str(e)}), 500
 
 # --- REVISI: Hapus pemilihan metode, ambil dari data supplier ---
-@app.route('/api/submit_pembayaran', methods=['POST'])
+@bp.route('/api/submit_pembayaran', methods=['POST'])
 def submit_pembayaran():
     data = request.json
     supplier_id = data.get('supplier_id')
-    jumlah_dibayar = float(data.get('jumlah_pembayaran', 0))
+    try:
+        jumlah_dibayar = _rupiah(data.get('jumlah_pembayaran'))
+    except ValueError:
+        jumlah_dibayar = 0
+    if jumlah_dibayar <= 0:
+        return jsonify({"success": False, "message": "Jumlah pembayaran tidak valid."}), 400
     supplier = Supplier.query.get(supplier_id)
     if not supplier or not supplier.metode_pembayaran:
         return jsonify({"success": False, "message": "Metode pembayaran untuk supplier ini belum diatur."}), 400
-    balance = supplier.balance
-    if not balance or balance.balance < (jumlah_dibayar - 0.01):
-        return jsonify({"success": False, "message": f"Jumlah pembayaran melebihi total tagihan."}), 400
     try:
+        # Kurangi saldo secara atomik; WHERE memastikan saldo tidak bisa minus walau ada request bersamaan
+        updated = SupplierBalance.query.filter(
+            SupplierBalance.supplier_id == supplier_id,
+            SupplierBalance.balance >= jumlah_dibayar
+        ).update({SupplierBalance.balance: SupplierBalance.balance - jumlah_dibayar}, synchronize_session=False)
+        if not updated:
+            db.session.rollback()
+            return jsonify({"success": False, "message": f"Jumlah pembayaran melebihi total tagihan."}), 400
+
         new_payment = PembayaranSupplier(
             supplier_id=supplier_id, 
+            tanggal_pembayaran=datetime.date.today(),
             jumlah_pembayaran=jumlah_dibayar, 
             metode_pembayaran=supplier.metode_pembayaran
         )
         db.session.add(new_payment)
-        balance.balance -= jumlah_dibayar
+        db.session.flush()
+        catat_mutasi_pembayaran(new_payment)
+        catat_pembayaran(new_payment)
+        bump_versions(SECTION_SUMMARY)
         db.session.commit()
         return jsonify({"success": True, "message": f"Pembayaran berhasil dicatat."})
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": f"Terjadi kesalahan: {str(e)}"}), 500
 
-@app.route('/api/get_all_payment_history', methods=['GET'])
+@bp.route('/api/get_all_payment_history', methods=['GET'])
 def get_all_payment_history():
+    cursor, limit = _page_args(request.args)
     try:
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
@@ -534,7 +811,7 @@ def get_all_payment_history():
         if metode and metode != 'semua':
             query = query.filter(PembayaranSupplier.metode_pembayaran == metode)
         
-        payments = query.order_by(PembayaranSupplier.tanggal_pembayaran.desc()).all()
+        payments, next_cursor = _keyset_page(query, PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.id, cursor, limit)
 
         payment_list = [{
             "tanggal": p.tanggal_pembayaran.strftime('%Y-%m-%d'),
@@ -543,63 +820,313 @@ def get_all_payment_history():
             "metode": p.metode_pembayaran
         } for p in payments]
         
-        return jsonify({"success": True, "history": payment_list})
+        return jsonify({"success": True, "history": payment_list, "next_cursor": next_cursor})
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    
-@app.route('/api/get_chart_data', methods=['GET'])
-def get_chart_data():
+
+# --- EKSPOR CSV (STREAMING) ---
+# Baris diambil per potongan (yield_per; server-side cursor di PostgreSQL) dan langsung
+# ditulis ke respons, jadi ekspor bertahun-tahun tetap memakai memori yang konstan.
+EXPORT_CHUNK_ROWS = 1000
+
+def _date_arg(name):
+    value = request.args.get(name)
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+def _csv_response(filename, header, statement):
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM agar Excel membaca file sebagai UTF-8
+        buffer.write('\ufeff')
+        writer.writerow(header)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        rows = db.session.execute(statement.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if i % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def _export_filename(prefix, start_date, end_date):
+    return f"{prefix}_{start_date or 'awal'}_{end_date or 'akhir'}.csv"
+
+@bp.route('/api/export/laporan', methods=['GET'])
+def export_laporan():
     try:
-        year = int(request.args.get('year', datetime.date.today().year))
-        month = int(request.args.get('month', datetime.date.today().month))
+        start_date, end_date = _date_arg('start_date'), _date_arg('end_date')
+        supplier_id = request.args.get('supplier_id')
+        statement = db.select(
+            LaporanHarian.id, LaporanHarian.tanggal, Lapak.lokasi, Admin.nama_lengkap, LaporanHarian.status,
+            LaporanHarian.total_produk_terjual, LaporanHarian.total_pendapatan, LaporanHarian.total_biaya_supplier,
+            LaporanHarian.pendapatan_cash, LaporanHarian.pendapatan_qris, LaporanHarian.pendapatan_bca
+        ).join(Lapak, Lapak.id == LaporanHarian.lapak_id)\
+         .join(Admin, Admin.id == Lapak.user_id)
+        if start_date:
+            statement = statement.filter(LaporanHarian.tanggal >= start_date)
+        if end_date:
+            statement = statement.filter(LaporanHarian.tanggal <= end_date)
+        if supplier_id:
+            # Sama seperti get_manage_reports: laporan yang memuat produk supplier ini
+            statement = statement.filter(LaporanHarian.id.in_(
+                db.select(LaporanHarianProduk.laporan_id)
+                  .join(Product, Product.id == LaporanHarianProduk.product_id)
+                  .filter(Product.supplier_id == supplier_id)))
+        statement = statement.order_by(LaporanHarian.tanggal, LaporanHarian.id)
+        header = ["id", "tanggal", "lokasi", "penanggung_jawab", "status", "total_produk_terjual",
+                  "total_pendapatan", "total_biaya_supplier", "pendapatan_cash", "pendapatan_qris", "pendapatan_bca"]
+        return _csv_response(_export_filename('laporan', start_date, end_date), header, statement)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
-        # Tentukan jumlah hari dalam bulan yang dipilih
-        _, num_days = monthrange(year, month)
-        # Buat label untuk semua hari dalam bulan (misal: "1", "2", ..., "31")
-        labels = [str(i) for i in range(1, num_days + 1)]
-        
-        # Inisialisasi data dengan 0 untuk setiap hari
-        pendapatan_data = {day: 0 for day in labels}
-        biaya_data = {day: 0 for day in labels}
+@bp.route('/api/export/rincian_laporan', methods=['GET'])
+def export_rincian_laporan():
+    try:
+        start_date, end_date = _date_arg('start_date'), _date_arg('end_date')
+        supplier_id = request.args.get('supplier_id')
+        status = request.args.get('status')
+        statement = db.select(
+            LaporanHarian.id, LaporanHarian.tanggal, Lapak.lokasi, LaporanHarian.status,
+            func.coalesce(Supplier.nama_supplier, 'Produk Manual'), Product.nama_produk,
+            LaporanHarianProduk.stok_awal, LaporanHarianProduk.stok_akhir, LaporanHarianProduk.jumlah_terjual,
+            LaporanHarianProduk.total_harga_jual, LaporanHarianProduk.total_harga_beli
+        ).select_from(LaporanHarian)\
+         .join(LaporanHarianProduk, LaporanHarianProduk.laporan_id == LaporanHarian.id)\
+         .join(Product, Product.id == LaporanHarianProduk.product_id)\
+         .outerjoin(Supplier, Supplier.id == Product.supplier_id)\
+         .join(Lapak, Lapak.id == LaporanHarian.lapak_id)
+        if start_date:
+            statement = statement.filter(LaporanHarian.tanggal >= start_date)
+        if end_date:
+            statement = statement.filter(LaporanHarian.tanggal <= end_date)
+        if supplier_id:
+            statement = statement.filter(Product.supplier_id == supplier_id)
+        if status:
+            statement = statement.filter(LaporanHarian.status == status)
+        statement = statement.order_by(LaporanHarian.tanggal, LaporanHarian.id, LaporanHarianProduk.id)
+        header = ["laporan_id", "tanggal", "lokasi", "status", "supplier", "produk", "stok_awal", "stok_akhir",
+                  "terjual", "total_harga_jual", "total_harga_beli"]
+        return _csv_response(_export_filename('rincian_laporan', start_date, end_date), header, statement)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
-        # 1. Ambil data pendapatan harian (dari laporan terkonfirmasi)
+@bp.route('/api/export/pembayaran', methods=['GET'])
+def export_pembayaran():
+    try:
+        start_date, end_date = _date_arg('start_date'), _date_arg('end_date')
+        supplier_id = request.args.get('supplier_id')
+        metode = request.args.get('metode')
+        statement = db.select(
+            PembayaranSupplier.id, PembayaranSupplier.tanggal_pembayaran, Supplier.nama_supplier,
+            PembayaranSupplier.jumlah_pembayaran, PembayaranSupplier.metode_pembayaran
+        ).join(Supplier, Supplier.id == PembayaranSupplier.supplier_id)
+        if start_date:
+            statement = statement.filter(PembayaranSupplier.tanggal_pembayaran >= start_date)
+        if end_date:
+            statement = statement.filter(PembayaranSupplier.tanggal_pembayaran <= end_date)
+        if supplier_id:
+            statement = statement.filter(PembayaranSupplier.supplier_id == supplier_id)
+        if metode and metode != 'semua':
+            statement = statement.filter(PembayaranSupplier.metode_pembayaran == metode)
+        statement = statement.order_by(PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.id)
+        header = ["id", "tanggal", "supplier", "jumlah", "metode"]
+        return _csv_response(_export_filename('pembayaran', start_date, end_date), header, statement)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+# --- JOB LAPORAN (DIKERJAKAN DI BACKGROUND) ---
+# Statement bulanan supplier terlalu berat untuk dihitung di dalam request: owner
+# membuat job, memantau statusnya, lalu mengunduh file hasilnya (lihat app/jobs.py).
+@bp.route('/api/jobs/statement_supplier', methods=['POST'])
+def submit_statement_job():
+    try:
+        data = request.json or {}
+        supplier_id = int(data.get('supplier_id') or 0)
+        bulan = data.get('bulan', '')
+        datetime.datetime.strptime(bulan, '%Y-%m')
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "supplier_id dan bulan (YYYY-MM) wajib diisi."}), 400
+    try:
+        if not db.session.get(Supplier, supplier_id):
+            return jsonify({"success": False, "message": "Supplier tidak ditemukan."}), 404
+        job = submit_job('statement_supplier', {"supplier_id": supplier_id, "bulan": bulan})
+        runner = job_runner(current_app)
+        runner.ensure_started()
+        runner.wake()
+        return jsonify({"success": True, "job": job_to_dict(job)}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    try:
+        job = db.session.get(JobLaporan, job_id)
+        if not job:
+            return jsonify({"success": False, "message": "Job tidak ditemukan."}), 404
+        # Job bisa dibuat oleh proses lain; pastikan proses ini juga punya worker
+        job_runner(current_app).ensure_started()
+        return jsonify({"success": True, "job": job_to_dict(job)})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+@bp.route('/api/jobs/<job_id>/download', methods=['GET'])
+def download_job_result(job_id):
+    try:
+        job = db.session.get(JobLaporan, job_id, options=[undefer(JobLaporan.hasil)])
+        if not job:
+            return jsonify({"success": False, "message": "Job tidak ditemukan."}), 404
+        if job.status != JOB_SELESAI:
+            return jsonify({"success": False, "message": f"Job belum selesai (status: {job.status})."}), 409
+        response = current_app.response_class(job.hasil, mimetype=job.content_type)
+        response.headers['Content-Disposition'] = f'attachment; filename="{job.nama_file}"'
+        # Isi file job yang sudah selesai tidak pernah berubah
+        response.headers['Cache-Control'] = 'private, max-age=86400, immutable'
+        return response
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+CHART_PERIODS = ('week', 'month', 'quarter', 'year')
+CHART_GRANULARITIES = ('day', 'week', 'month')
+
+def _chart_range(args):
+    """Tentukan rentang setengah terbuka [start, end) dan granularitas grafik dari parameter request."""
+    today = datetime.date.today()
+    period = args.get('period', 'month')
+    if period not in CHART_PERIODS:
+        raise ValueError(f"period harus salah satu dari {', '.join(CHART_PERIODS)}")
+
+    if args.get('start_date') and args.get('end_date'):
+        start = datetime.datetime.strptime(args['start_date'], '%Y-%m-%d').date()
+        end = datetime.datetime.strptime(args['end_date'], '%Y-%m-%d').date() + timedelta(days=1)
+    else:
+        if args.get('date'):
+            anchor = datetime.datetime.strptime(args['date'], '%Y-%m-%d').date()
+        elif args.get('year') or args.get('month'):
+            anchor = datetime.date(int(args.get('year', today.year)), int(args.get('month', today.month)), 1)
+        else:
+            anchor = today
+
+        if period == 'week':
+            start = anchor - timedelta(days=anchor.weekday())
+            end = start + timedelta(days=7)
+        elif period == 'month':
+            start = anchor.replace(day=1)
+            end = start + timedelta(days=monthrange(start.year, start.month)[1])
+        elif period == 'quarter':
+            start = datetime.date(anchor.year, 3 * ((anchor.month - 1) // 3) + 1, 1)
+            end_month = start.month + 3
+            end = datetime.date(start.year + (end_month > 12), (end_month - 1) % 12 + 1, 1)
+        else:
+            start = datetime.date(anchor.year, 1, 1)
+            end = datetime.date(anchor.year + 1, 1, 1)
+
+    if end <= start:
+        raise ValueError("end_date harus setelah start_date")
+    granularity = args.get('granularity', 'month' if period == 'year' else 'day')
+    if granularity not in CHART_GRANULARITIES:
+        raise ValueError(f"granularity harus salah satu dari {', '.join(CHART_GRANULARITIES)}")
+    return start, end, granularity
+
+def _chart_bucket(tanggal, granularity):
+    if granularity == 'week':
+        return tanggal - timedelta(days=tanggal.weekday())
+    if granularity == 'month':
+        return tanggal.replace(day=1)
+    return tanggal
+
+def _chart_label(bucket, granularity, single_month):
+    if granularity == 'month':
+        return bucket.strftime('%Y-%m')
+    if granularity == 'day' and single_month:
+        # Pertahankan label lama ("1", "2", ...) untuk tampilan per bulan
+        return str(bucket.day)
+    return bucket.isoformat()
+
+def _chart_token():
+    """Versi grafik: token ringkasan; rentang yang sudah lewat tanpa laporan menunggu cukup token lapak."""
+    start, end, granularity = _chart_range(request.args)
+    versions = current_versions()
+    if end <= datetime.date.today():
+        pending = db.session.query(func.count(LaporanHarian.id)).filter(
+            LaporanHarian.tanggal >= start, LaporanHarian.tanggal < end,
+            LaporanHarian.status == 'Menunggu Konfirmasi'
+        ).scalar()
+        if not pending:
+            # Pembayaran selalu bertanggal hari ini, jadi ringkasan rentang ini tidak berubah lagi
+            return (start, end, granularity, versions[SECTION_LAPAK])
+    return (start, end, granularity, versions[SECTION_SUMMARY])
+
+@bp.route('/api/get_chart_data', methods=['GET'])
+@conditional_get(_chart_token)
+def get_chart_data():
+    try:
+        start, end, granularity = _chart_range(request.args)
+
+        # Siapkan semua bucket dalam rentang dengan nilai 0
+        buckets = []
+        current = start
+        while current < end:
+            bucket = _chart_bucket(current, granularity)
+            if not buckets or buckets[-1] != bucket:
+                buckets.append(bucket)
+            current += timedelta(days=1)
+        pendapatan_data = {bucket: 0 for bucket in buckets}
+        biaya_data = {bucket: 0 for bucket in buckets}
+
+        # 1. Ambil data pendapatan harian dari tabel ringkasan (hanya berisi laporan terkonfirmasi).
+        #    Filter rentang langsung pada kolom tanggal agar index terpakai.
         pendapatan_results = db.session.query(
-            func.extract('day', LaporanHarian.tanggal),
-            func.sum(LaporanHarian.total_pendapatan)
+            RingkasanHarian.tanggal,
+            sum_rupiah(RingkasanHarian.pendapatan)
         ).filter(
-            func.extract('year', LaporanHarian.tanggal) == year,
-            func.extract('month', LaporanHarian.tanggal) == month,
-            LaporanHarian.status == 'Terkonfirmasi'
-        ).group_by(func.extract('day', LaporanHarian.tanggal)).all()
+            RingkasanHarian.tanggal >= start,
+            RingkasanHarian.tanggal < end
+        ).group_by(RingkasanHarian.tanggal).all()
 
-        for day, total in pendapatan_results:
-            pendapatan_data[str(int(day))] = total
+        for tanggal, total in pendapatan_results:
+            pendapatan_data[_chart_bucket(tanggal, granularity)] += total or 0
 
-        # 2. Ambil data biaya harian (dari pembayaran supplier)
+        # 2. Ambil data biaya harian (dari ringkasan pembayaran supplier)
         biaya_results = db.session.query(
-            func.extract('day', PembayaranSupplier.tanggal_pembayaran),
-            func.sum(PembayaranSupplier.jumlah_pembayaran)
+            RingkasanPembayaranHarian.tanggal,
+            sum_rupiah(RingkasanPembayaranHarian.jumlah_pembayaran)
         ).filter(
-            func.extract('year', PembayaranSupplier.tanggal_pembayaran) == year,
-            func.extract('month', PembayaranSupplier.tanggal_pembayaran) == month
-        ).group_by(func.extract('day', PembayaranSupplier.tanggal_pembayaran)).all()
-        
-        for day, total in biaya_results:
-            biaya_data[str(int(day))] = total
+            RingkasanPembayaranHarian.tanggal >= start,
+            RingkasanPembayaranHarian.tanggal < end
+        ).group_by(RingkasanPembayaranHarian.tanggal).all()
         
+        for tanggal, total in biaya_results:
+            biaya_data[_chart_bucket(tanggal, granularity)] += total or 0
+
+        last_day = end - timedelta(days=1)
+        single_month = (start.year, start.month) == (last_day.year, last_day.month)
         return jsonify({
             "success": True,
-            "labels": labels,
+            "start_date": start.isoformat(),
+            "end_date": last_day.isoformat(),
+            "granularity": granularity,
+            "labels": [_chart_label(bucket, granularity, single_month) for bucket in buckets],
             "pendapatanData": list(pendapatan_data.values()),
             "biayaData": list(biaya_data.values())
         })
 
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         logging.error(f"Error getting chart data: {str(e)}")
         return jsonify({"success": False, "message": str(e)}), 500
 # --- LAPAK API ---
 # --- REVISI: Kirim info pembayaran ke frontend ---
-@app.route('/api/get_data_buat_catatan/<int:lapak_id>', methods=['GET'])
+@bp.route('/api/get_data_buat_catatan/<int:lapak_id>', methods=['GET'])
 def get_data_buat_catatan(lapak_id):
     today = datetime.date.today()
     # Pengecekan laporan yang sudah ada tetap berlaku
@@ -624,7 +1151,7 @@ def get_data_buat_catatan(lapak_id):
         
     return jsonify({"success": True, "data": suppliers_data})
 
-@app.route('/api/submit_catatan_harian', methods=['POST'])
+@bp.route('/api/submit_catatan_harian', methods=['POST'])
 def submit_catatan_harian():
     data = request.json
     lapak_id = data.get('lapak_id')
@@ -632,54 +1159,79 @@ def submit_catatan_harian():
     if LaporanHarian.query.filter_by(lapak_id=lapak_id, tanggal=today).first():
         return jsonify({"success": False, "message": "Laporan untuk hari ini sudah pernah dibuat."}), 400
     try:
-        total_pendapatan_auto, total_biaya_auto, total_terjual_auto = 0.0, 0.0, 0
+        total_pendapatan_auto, total_biaya_auto, total_terjual_auto = 0, 0, 0
         
         new_report = LaporanHarian(lapak_id=lapak_id, tanggal=today, total_pendapatan=0, total_biaya_supplier=0,
-            pendapatan_cash=float(data['rekap_pembayaran'].get('cash') or 0),
-            pendapatan_qris=float(data['rekap_pembayaran'].get('qris') or 0),
-            pendapatan_bca=float(data['rekap_pembayaran'].get('bca') or 0), total_produk_terjual=0,
-            manual_pendapatan_cash=float(data['rekap_pembayaran'].get('cash') or 0),
-            manual_pendapatan_qris=float(data['rekap_pembayaran'].get('qris') or 0),
-            manual_pendapatan_bca=float(data['rekap_pembayaran'].get('bca') or 0),
-            manual_total_pendapatan=float(data['rekap_pembayaran'].get('total') or 0)
+            pendapatan_cash=_rupiah(data['rekap_pembayaran'].get('cash')),
+            pendapatan_qris=_rupiah(data['rekap_pembayaran'].get('qris')),
+            pendapatan_bca=_rupiah(data['rekap_pembayaran'].get('bca')), total_produk_terjual=0,
+            manual_pendapatan_cash=_rupiah(data['rekap_pembayaran'].get('cash')),
+            manual_pendapatan_qris=_rupiah(data['rekap_pembayaran'].get('qris')),
+            manual_pendapatan_bca=_rupiah(data['rekap_pembayaran'].get('bca')),
+            manual_total_pendapatan=_rupiah(data['rekap_pembayaran'].get('total'))
         )
-        db.session.add(new_report)
-        db.session.flush()
+
+        # Kumpulkan baris yang valid dulu agar produk bisa diambil dalam satu query IN
+        lines = []
+        manual_products = []
         for prod_data in data.get('products', []):
-            product_id = prod_data.get('id')
             stok_awal = int(prod_data.get('stok_awal') or 0)
             stok_akhir = int(prod_data.get('stok_akhir') or 0)
             if stok_awal == 0 and stok_akhir == 0: continue
-            
-            if not product_id:
-                if prod_data.get('nama_produk'):
-                    lapak = Lapak.query.get(lapak_id)
-                    new_product = Product(nama_produk=prod_data['nama_produk'],
-                        supplier_id=prod_data.get('supplier_id') if str(prod_data.get('supplier_id')).lower() != 'manual' else None,
-                        harga_beli=HARGA_BELI_DEFAULT, harga_jual=HARGA_JUAL_DEFAULT, is_manual=True)
-                    new_product.lapaks.append(lapak)
-                    db.session.add(new_product)
-                    db.session.flush()
-                    product_id = new_product.id
-                else: continue 
-
-            product = Product.query.get(product_id)
+
+            product_id = prod_data.get('id')
+            if product_id:
+                lines.append((int(product_id), stok_awal, stok_akhir))
+            elif prod_data.get('nama_produk'):
+                new_product = Product(nama_produk=prod_data['nama_produk'],
+                    supplier_id=prod_data.get('supplier_id') if str(prod_data.get('supplier_id')).lower() != 'manual' else None,
+                    harga_beli=HARGA_BELI_DEFAULT, harga_jual=HARGA_JUAL_DEFAULT, is_manual=True)
+                manual_products.append(new_product)
+                lines.append((new_product, stok_awal, stok_akhir))
+
+        if manual_products:
+            lapak = Lapak.query.options(lazyload(Lapak.anggota)).get(lapak_id)
+            for new_product in manual_products:
+                new_product.lapaks.append(lapak)
+            db.session.add_all(manual_products)
+            db.session.flush()
+            # Produk manual yang diberi supplier ikut tampil di daftar produk supplier (dashboard owner)
+            if any(p.supplier_id for p in manual_products):
+                bump_versions(SECTION_SUPPLIER)
+
+        product_ids = {line[0] for line in lines if isinstance(line[0], int)}
+        products = {}
+        if product_ids:
+            # lazyload: jangan ikut memuat relasi lapaks (lazy='subquery') yang tidak dibutuhkan di sini
+            products = {p.id: p for p in Product.query.options(lazyload(Product.lapaks)).filter(Product.id.in_(product_ids))}
+
+        rincian_rows, stok_rows = [], []
+        for product_ref, stok_awal, stok_akhir in lines:
+            product = products.get(product_ref) if isinstance(product_ref, int) else product_ref
             if not product: continue
             
             jumlah_terjual = max(0, stok_awal - stok_akhir)
             total_harga_jual = jumlah_terjual * product.harga_jual
             total_harga_beli = jumlah_terjual * product.harga_beli
 
-            rincian = LaporanHarianProduk(laporan_id=new_report.id, product_id=product.id, stok_awal=stok_awal, stok_akhir=stok_akhir, jumlah_terjual=jumlah_terjual, total_harga_jual=total_harga_jual, total_harga_beli=total_harga_beli)
-            db.session.add(rincian)
-            db.session.add(StokHarian(lapak_id=lapak_id, product_id=product.id, jumlah_sisa=stok_akhir, tanggal=today))
+            rincian_rows.append({"product_id": product.id, "stok_awal": stok_awal, "stok_akhir": stok_akhir, "jumlah_terjual": jumlah_terjual, "total_harga_jual": total_harga_jual, "total_harga_beli": total_harga_beli})
+            stok_rows.append({"lapak_id": lapak_id, "product_id": product.id, "jumlah_sisa": stok_akhir, "tanggal": today})
             total_pendapatan_auto += total_harga_jual
             total_biaya_auto += total_harga_beli
             total_terjual_auto += jumlah_terjual
-        
+
         new_report.total_pendapatan = total_pendapatan_auto
         new_report.total_biaya_supplier = total_biaya_auto
         new_report.total_produk_terjual = total_terjual_auto
+        db.session.add(new_report)
+        db.session.flush()
+
+        # Simpan rincian & stok sekaligus (executemany), bukan satu per satu
+        if rincian_rows:
+            for row in rincian_rows:
+                row["laporan_id"] = new_report.id
+            db.session.execute(db.insert(LaporanHarianProduk), rincian_rows)
+            db.session.execute(db.insert(StokHarian), stok_rows)
 
         db.session.commit()
         return jsonify({"success": True, "message": "Laporan harian berhasil dikirim!"})
@@ -687,34 +1239,41 @@ def submit_catatan_harian():
         db.session.rollback()
         return jsonify({"success": False, "message": f"Gagal menyimpan laporan: {str(e)}"}), 500
 
-@app.route('/api/get_history_laporan/<int:lapak_id>', methods=['GET'])
+@bp.route('/api/get_history_laporan/<int:lapak_id>', methods=['GET'])
 def get_history_laporan(lapak_id):
+    cursor, limit = _page_args(request.args)
     try:
-        reports = LaporanHarian.query.filter_by(lapak_id=lapak_id).order_by(LaporanHarian.tanggal.desc()).all()
+        reports, next_cursor = _keyset_page(LaporanHarian.query.filter_by(lapak_id=lapak_id),
+                                            LaporanHarian.tanggal, LaporanHarian.id, cursor, limit)
         report_list = [{"id": r.id, "tanggal": r.tanggal.isoformat(), "total_pendapatan": r.total_pendapatan, "total_produk_terjual": r.total_produk_terjual, "status": r.status} for r in reports]
-        return jsonify({"success": True, "reports": report_list})
+        return jsonify({"success": True, "reports": report_list, "next_cursor": next_cursor})
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
 # --- SUPPLIER API ---
-@app.route('/api/get_data_supplier/<int:supplier_id>', methods=['GET'])
+@bp.route('/api/get_data_supplier/<int:supplier_id>', methods=['GET'])
 def get_data_supplier(supplier_id):
     try:
         today = datetime.date.today()
         start_of_month = today.replace(day=1)
         balance_info = SupplierBalance.query.filter_by(supplier_id=supplier_id).first()
-        total_tagihan = balance_info.balance if balance_info else 0.0
+        total_tagihan = balance_info.balance if balance_info else 0
         penjualan_bulan_ini = db.session.query(
-            func.sum(LaporanHarianProduk.total_harga_beli)
-        ).join(LaporanHarian, LaporanHarian.id == LaporanHarianProduk.laporan_id)\
-         .join(Product, Product.id == LaporanHarianProduk.product_id)\
-         .filter(Product.supplier_id == supplier_id, LaporanHarian.tanggal >= start_of_month, LaporanHarian.status == 'Terkonfirmasi').scalar() or 0
+            sum_rupiah(RingkasanHarian.biaya)
+        ).filter(RingkasanHarian.supplier_id == supplier_id, RingkasanHarian.tanggal >= start_of_month).scalar() or 0
         return jsonify({"success": True, "summary": {"total_tagihan": total_tagihan, "penjualan_bulan_ini": penjualan_bulan_ini}})
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
-@app.route('/api/get_supplier_history/<int:supplier_id>', methods=['GET'])
+def _supplier_history_token(supplier_id):
+    # Penjualan hanya bertambah lewat confirm_report dan pembayaran lewat submit_pembayaran (keduanya mengganti token ringkasan)
+    versions = current_versions()
+    return (supplier_id, versions[SECTION_SUMMARY], versions[SECTION_LAPAK], versions[SECTION_SUPPLIER])
+
+@bp.route('/api/get_supplier_history/<int:supplier_id>', methods=['GET'])
+@conditional_get(_supplier_history_token)
 def get_supplier_history(supplier_id):
+    cursor, limit = _page_args(request.args, HISTORY_SECTIONS)
     try:
         # Ambil semua parameter dari request
         start_date_str = request.args.get('start_date')
@@ -729,13 +1288,10 @@ def get_supplier_history(supplier_id):
         if end_date_str:
             end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').date()
             payments_query = payments_query.filter(PembayaranSupplier.tanggal_pembayaran <= end_date)
-        
-        payments = payments_query.order_by(PembayaranSupplier.tanggal_pembayaran.desc()).all()
-        payment_list = [{"tanggal": p.tanggal_pembayaran.strftime('%Y-%m-%d'), "jumlah": p.jumlah_pembayaran, "metode": p.metode_pembayaran} for p in payments]
 
         # Query dasar untuk penjualan
         sales_query = db.session.query(
-            LaporanHarian.tanggal, Lapak.lokasi, Product.nama_produk,
+            LaporanHarian.tanggal, Lapak.lokasi, Product.nama_produk, LaporanHarianProduk.id,
             LaporanHarianProduk.jumlah_terjual
         ).select_from(LaporanHarianProduk)\
          .join(Product, Product.id == LaporanHarianProduk.product_id)\
@@ -756,76 +1312,100 @@ def get_supplier_history(supplier_id):
         if lapak_id:
             sales_query = sales_query.filter(LaporanHarian.lapak_id == lapak_id)
 
-        sales = sales_query.order_by(LaporanHarian.tanggal.desc(), Lapak.lokasi).all()
-        sales_list = [{"tanggal": s.tanggal.strftime('%Y-%m-%d'), "lokasi": s.lokasi, "nama_produk": s.nama_produk, "terjual": s.jumlah_terjual} for s in sales]
-        
-        # Ambil daftar lapak untuk mengisi dropdown di frontend
-        all_lapaks = Lapak.query.order_by(Lapak.lokasi).all()
-        lapak_list = [{"id": l.id, "lokasi": l.lokasi} for l in all_lapaks]
+        # Eksekusi query per halaman; section=payments/sales untuk memuat halaman berikutnya satu tabel saja
+        section = request.args.get('section')
+        response = {"success": True, "next_cursor": {}}
+
+        if section in (None, 'payments'):
+            payments, response["next_cursor"]["payments"] = _keyset_page(
+                payments_query, PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.id, cursor, limit)
+            response["payments"] = [{"tanggal": p.tanggal_pembayaran.strftime('%Y-%m-%d'), "jumlah": p.jumlah_pembayaran, "metode": p.metode_pembayaran} for p in payments]
+
+        if section in (None, 'sales'):
+            sales, response["next_cursor"]["sales"] = _keyset_page(
+                sales_query, LaporanHarian.tanggal, LaporanHarianProduk.id, cursor, limit)
+            response["sales"] = [{"tanggal": s.tanggal.strftime('%Y-%m-%d'), "lokasi": s.lokasi, "nama_produk": s.nama_produk, "terjual": s.jumlah_terjual} for s in sales]
+
+        if section is None:
+            # Ambil daftar lapak untuk mengisi dropdown di frontend
+            all_lapaks = Lapak.query.order_by(Lapak.lokasi).all()
+            response["lapaks"] = [{"id": l.id, "lokasi": l.lokasi} for l in all_lapaks]
         
-        return jsonify({"success": True, "payments": payment_list, "sales": sales_list, "lapaks": lapak_list})
+        return jsonify(response)
     except Exception as e:
         db.session.rollback()
         logging.error(f"Error getting supplier history: {e}")
         return jsonify({"success": False, "message": str(e)}), 500
 
-@app.route('/api/get_report_details/<int:report_id>')
-def get_report_details(report_id):
+@bp.route('/api/get_saldo_supplier/<int:supplier_id>', methods=['GET'])
+def get_saldo_supplier(supplier_id):
+    """Saldo tagihan supplier pada akhir tanggal tertentu (default hari ini) dari snapshot + mutasi sesudahnya."""
+    try:
+        tanggal = _date_arg('tanggal') or datetime.date.today()
+        saldo, snapshot_tanggal = saldo_pada(supplier_id, tanggal)
+        return jsonify({"success": True, "tanggal": tanggal.isoformat(), "saldo": saldo,
+                        "snapshot": snapshot_tanggal.isoformat() if snapshot_tanggal else None})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+@bp.route('/api/get_mutasi_supplier/<int:supplier_id>', methods=['GET'])
+def get_mutasi_supplier(supplier_id):
+    cursor, limit = _page_args(request.args)
     try:
-        report = LaporanHarian.query.options(
-            joinedload(LaporanHarian.lapak).joinedload(Lapak.penanggung_jawab),
-            joinedload(LaporanHarian.rincian_produk).joinedload(LaporanHarianProduk.product).joinedload(Product.supplier)
-        ).get(report_id)
+        query = MutasiSupplier.query.filter_by(supplier_id=supplier_id)
+        start_date, end_date = _date_arg('start_date'), _date_arg('end_date')
+        if start_date:
+            query = query.filter(MutasiSupplier.tanggal >= start_date)
+        if end_date:
+            query = query.filter(MutasiSupplier.tanggal <= end_date)
+        mutasi, next_cursor = _keyset_page(query, MutasiSupplier.tanggal, MutasiSupplier.id, cursor, limit)
+        mutasi_list = [{"id": m.id, "tanggal": m.tanggal.isoformat(), "jenis": m.jenis, "jumlah": m.jumlah,
+                        "laporan_id": m.laporan_id, "pembayaran_id": m.pembayaran_id, "keterangan": m.keterangan} for m in mutasi]
+        return jsonify({"success": True, "mutasi": mutasi_list, "next_cursor": next_cursor})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
 
+def _report_details_token(report_id):
+    # Rincian laporan tidak berubah setelah dikirim; yang bisa berubah hanya status dan nama master data
+    status = db.session.query(LaporanHarian.status).filter(LaporanHarian.id == report_id).scalar()
+    versions = current_versions()
+    return (report_id, status, versions[SECTION_LAPAK], versions[SECTION_SUPPLIER])
+
+@bp.route('/api/get_report_details/<int:report_id>')
+def get_report_details(report_id):
+    try:
+        # Laporan terkonfirmasi dilayani dari arsip: satu baca primary key, ETag = SHA-1 isinya
+        arsip = baca_arsip(report_id)
+    except Exception as e:
+        logging.error(f"Error getting report details: {e}")
+        return jsonify({"success": False, "message": "Terjadi kesalahan pada server"}), 500
+    if arsip is None:
+        return _report_details_terkini(report_id=report_id)
+    # Nama di arsip bisa diganti (arsip lalu dihapus), jadi tetap no-cache: revalidasi cukup satu baca arsip -> 304
+    if arsip.etag in request.if_none_match:
+        return _not_modified(arsip.etag)
+    return _with_etag(current_app.response_class(arsip.isi, mimetype=current_app.json.mimetype), arsip.etag)
+
+@conditional_get(_report_details_token)
+def _report_details_terkini(report_id):
+    # Laporan yang belum dikonfirmasi, atau terkonfirmasi tapi belum (lagi) terarsip
+    try:
+        versions = current_versions()
+        report = laporan_untuk_detail(report_id)
         if not report:
             return jsonify({"success": False, "message": "Laporan tidak ditemukan"}), 404
-
-        # --- PERUBAHAN LOGIKA DIMULAI DI SINI ---
-        # Mengelompokkan produk berdasarkan supplier
-        rincian_per_supplier = {}
-        for item in report.rincian_produk:
-            supplier_name = item.product.supplier.nama_supplier if item.product.supplier else "Produk Manual"
-            
-            if supplier_name not in rincian_per_supplier:
-                rincian_per_supplier[supplier_name] = []
-            
-            rincian_per_supplier[supplier_name].append({
-                "nama_produk": item.product.nama_produk,
-                "stok_awal": item.stok_awal,
-                "stok_akhir": item.stok_akhir,
-                "terjual": item.jumlah_terjual,
-                "harga_jual": item.product.harga_jual,
-                "total_pendapatan": item.total_harga_jual,
-            })
-        # --- AKHIR PERUBAHAN LOGIKA ---
-
-        data = {
-            "id": report.id,
-            "tanggal": report.tanggal.strftime('%d %B %Y'),
-            "status": report.status,
-            "lokasi": report.lapak.lokasi,
-            "penanggung_jawab": report.lapak.penanggung_jawab.nama_lengkap,
-            "rincian_per_supplier": rincian_per_supplier, # <--- Menggunakan data yang sudah dikelompokkan
-            "rekap_otomatis": {
-                "terjual_cash": report.pendapatan_cash,
-                "terjual_qris": report.pendapatan_qris,
-                "terjual_bca": report.pendapatan_bca,
-                "total_produk_terjual": report.total_produk_terjual,
-                "total_pendapatan": report.total_pendapatan,
-                "total_biaya_supplier": report.total_biaya_supplier
-            },
-            "rekap_manual": {
-                "terjual_cash": report.manual_pendapatan_cash,
-                "terjual_qris": report.manual_pendapatan_qris,
-                "terjual_bca": report.manual_pendapatan_bca,
-                # Menggunakan total dari rekap otomatis untuk konsistensi
-                "total_produk_terjual": report.total_produk_terjual,
-                "total_pendapatan": report.manual_total_pendapatan
-            }
-        }
-        return jsonify({"success": True, "data": data})
-
+        data = susun_detail(report)
     except Exception as e:
         logging.error(f"Error getting report details: {e}")
         return jsonify({"success": False, "message": "Terjadi kesalahan pada server"}), 500
 
+    if report.status == 'Terkonfirmasi':
+        try:
+            simpan_arsip(report, data, versions)
+            db.session.commit()
+        except Exception as e:
+            # Gagal mengarsipkan tidak menggagalkan request; dicoba lagi saat dibuka berikutnya
+            db.session.rollback()
+            logging.warning(f"Gagal mengarsipkan detail laporan {report_id}: {e}")
+    return jsonify({"success": True, "data": data})
+
@@ -0,0 +1,56 @@
+import logging
+
+from app import db
+
+# ===================================================================
+# SERVER PRODUKSI (GUNICORN, MULTI PROSES + MULTI THREAD)
+# ===================================================================
+def gunicorn_options(config):
+    """Pengaturan gunicorn dari konfigurasi aplikasi (dipakai wsgi.py dan gunicorn.conf.py)."""
+    options = {
+        'bind': f"{config['WEB_HOST']}:{config['WEB_PORT']}",
+        'workers': config['WEB_WORKERS'],
+        'threads': config['WEB_THREADS'],
+        'worker_class': 'gthread',
+        'keepalive': config['WEB_KEEPALIVE'],
+        'timeout': config['WEB_TIMEOUT'],
+        'graceful_timeout': config['WEB_GRACEFUL_TIMEOUT'],
+        'max_requests': config['WEB_MAX_REQUESTS'],
+        'max_requests_jitter': config['WEB_MAX_REQUESTS'] // 10,
+        'preload_app': config['WEB_PRELOAD'],
+        'post_fork': post_fork,
+    }
+    if config['WEB_ACCESS_LOG']:
+        options['accesslog'] = '-'
+    return options
+
+def dispose_engines(app):
+    """Lepas koneksi database warisan proses induk tanpa menutupnya (koneksi itu masih milik induk)."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def post_fork(server, worker):
+    # Dengan preload_app, aplikasi (dan pool koneksinya) dibuat di master sebelum fork
+    dispose_engines(worker.app.wsgi())
+
+def serve(app):
+    """Jalankan aplikasi dengan gunicorn; di Windows (tanpa gunicorn) pakai server ber-thread Werkzeug."""
+    options = gunicorn_options(app.config)
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logging.warning("gunicorn tidak tersedia, memakai server ber-thread Werkzeug (satu proses).")
+        from werkzeug.serving import run_simple
+        run_simple(app.config['WEB_HOST'], app.config['WEB_PORT'], app, threaded=True)
+        return
+
+    class Launcher(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Launcher().run()
@@ -0,0 +1,75 @@
+import csv
+import datetime
+import io
+
+from app import db
+from app.ledger import saldo_pada, JENIS_PENJUALAN, JENIS_PEMBAYARAN, JENIS_PENYESUAIAN
+from app.models import Supplier, Lapak, LaporanHarian, PembayaranSupplier, MutasiSupplier
+
+# ===================================================================
+# STATEMENT BULANAN SUPPLIER (DIKERJAKAN SEBAGAI JOB BACKGROUND)
+# ===================================================================
+# Statement dibaca dari ledger supplier (mutasi_supplier), bukan dari tabel
+# ringkasan: ringkasan ikut terhapus bersama lapaknya, sedangkan ledger dan
+# saldo berjalan tidak. Mutasi bertanggal pencatatan (hari konfirmasi/
+# pembayaran), jadi baris-baris bulan ini selalu berjumlah saldo akhir.
+def month_range(bulan):
+    """'YYYY-MM' -> (tanggal pertama, tanggal pertama bulan berikutnya)."""
+    start = datetime.datetime.strptime(bulan, '%Y-%m').date()
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start, end
+
+def _keterangan(m):
+    if m.jenis == JENIS_PENJUALAN and m.laporan_id is not None:
+        lokasi = m.lokasi or "lapak sudah dihapus"
+        tanggal = f", laporan {m.tanggal_laporan.isoformat()}" if m.tanggal_laporan else ""
+        return f"Laporan #{m.laporan_id} ({lokasi}{tanggal})"
+    if m.jenis == JENIS_PEMBAYARAN and m.metode_pembayaran:
+        return m.metode_pembayaran
+    return m.keterangan or ""
+
+def build_supplier_statement(supplier_id, bulan):
+    """Statement CSV: saldo awal, mutasi ledger bulan itu (penjualan, pembayaran, penyesuaian), dan saldo akhir."""
+    supplier = db.session.get(Supplier, supplier_id)
+    if supplier is None:
+        raise ValueError(f"Supplier {supplier_id} tidak ditemukan.")
+    start, end = month_range(bulan)
+    satu_hari = datetime.timedelta(days=1)
+    saldo_awal, _ = saldo_pada(supplier_id, start - satu_hari)
+    saldo_akhir, _ = saldo_pada(supplier_id, end - satu_hari)
+
+    # Laporan/lapak/pembayaran bisa sudah dihapus; mutasinya tetap tercantum
+    mutasi = db.session.query(
+        MutasiSupplier.tanggal, MutasiSupplier.jenis, MutasiSupplier.jumlah, MutasiSupplier.laporan_id,
+        MutasiSupplier.keterangan, LaporanHarian.tanggal.label('tanggal_laporan'), Lapak.lokasi,
+        PembayaranSupplier.metode_pembayaran
+    ).outerjoin(LaporanHarian, LaporanHarian.id == MutasiSupplier.laporan_id)\
+     .outerjoin(Lapak, Lapak.id == LaporanHarian.lapak_id)\
+     .outerjoin(PembayaranSupplier, PembayaranSupplier.id == MutasiSupplier.pembayaran_id)\
+     .filter(MutasiSupplier.supplier_id == supplier_id, MutasiSupplier.tanggal >= start, MutasiSupplier.tanggal < end)\
+     .order_by(MutasiSupplier.tanggal, MutasiSupplier.id)
+
+    buffer = io.StringIO()
+    buffer.write('\ufeff')  # BOM agar Excel membaca file sebagai UTF-8
+    writer = csv.writer(buffer)
+    writer.writerow(["Statement Supplier", supplier.nama_supplier])
+    writer.writerow(["Nomor Register", supplier.nomor_register or "-"])
+    writer.writerow(["Periode", bulan])
+    writer.writerow(["Saldo Awal", saldo_awal])
+    writer.writerow([])
+
+    writer.writerow(["Mutasi"])
+    writer.writerow(["tanggal", "jenis", "keterangan", "jumlah"])
+    totals = {JENIS_PENJUALAN: 0, JENIS_PEMBAYARAN: 0, JENIS_PENYESUAIAN: 0}
+    for m in mutasi.yield_per(1000):
+        writer.writerow([m.tanggal.isoformat(), m.jenis, _keterangan(m), m.jumlah])
+        totals[m.jenis] = totals.get(m.jenis, 0) + m.jumlah
+    writer.writerow([])
+    writer.writerow(["Total Penjualan", totals.pop(JENIS_PENJUALAN)])
+    writer.writerow(["Total Pembayaran", -totals.pop(JENIS_PEMBAYARAN)])
+    writer.writerow(["Total Penyesuaian", sum(totals.values())])
+    writer.writerow([])
+    writer.writerow(["Saldo Akhir", saldo_akhir])
+
+    nama_file = f"statement_{supplier.nomor_register or supplier.id}_{bulan}.csv"
+    return nama_file, 'text/csv', buffer.getvalue().encode('utf-8')
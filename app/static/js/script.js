@@ -104,6 +104,37 @@ function toggleTablePasswordVisibility(icon) {
     icon.classList.replace("bi-eye", "bi-eye-slash");
   }
 }
+// Pagination cursor: pasang baris "sentinel" di akhir tabel/list, lalu muat
+// halaman berikutnya saat sentinel terlihat. fetchPage(cursor) harus
+// mengembalikan { html, nextCursor }.
+function attachNextPageLoader(container, cursor, fetchPage, colspan = null) {
+  if (!cursor) return;
+  const sentinel = document.createElement(colspan ? "tr" : "div");
+  const loadingText = "Memuat data berikutnya...";
+  if (colspan) {
+    sentinel.innerHTML = `<td colspan="${colspan}" class="text-center text-muted small">${loadingText}</td>`;
+  } else {
+    sentinel.className = "list-group-item text-center text-muted small";
+    sentinel.textContent = loadingText;
+  }
+  container.appendChild(sentinel);
+
+  const observer = new IntersectionObserver(async (entries) => {
+    if (!entries.some((entry) => entry.isIntersecting)) return;
+    observer.disconnect();
+    try {
+      const { html, nextCursor } = await fetchPage(cursor);
+      // Filter sudah diganti selama request berjalan: abaikan hasil lama
+      if (!sentinel.isConnected) return;
+      sentinel.insertAdjacentHTML("beforebegin", html);
+      sentinel.remove();
+      attachNextPageLoader(container, nextCursor, fetchPage, colspan);
+    } catch (e) {
+      if (sentinel.isConnected) sentinel.textContent = `Gagal memuat: ${e.message}`;
+    }
+  });
+  observer.observe(sentinel);
+}
 
 // --- LOGIN, ROUTING & PAGE MANAGEMENT ---
 async function showPage(pageId) {
@@ -342,6 +373,58 @@ async function populateOwnerSupplierHistoryPage() {
     "none";
 }
 
+// --- STATEMENT BULANAN SUPPLIER (JOB BACKGROUND) ---
+// Server membuat file di background; halaman memantau status job lalu mengunduh hasilnya
+const JOB_POLL_MS = 2000;
+
+async function requestSupplierStatement() {
+  const supplierId = document.getElementById("owner-supplier-select").value;
+  const bulan = document.getElementById("owner-statement-month").value;
+  const statusEl = document.getElementById("owner-statement-status");
+  if (!supplierId || !bulan) {
+    showToast("Pilih supplier dan bulan terlebih dahulu.", false);
+    return;
+  }
+  const btn = document.getElementById("owner-statement-btn");
+  btn.disabled = true;
+  try {
+    const response = await fetch("/api/jobs/statement_supplier", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ supplier_id: supplierId, bulan }),
+    });
+    const result = await response.json();
+    if (!response.ok || !result.success) throw new Error(result.message);
+    statusEl.textContent = "Statement sedang dibuat...";
+    await waitForJob(result.job.id, statusEl);
+  } catch (e) {
+    statusEl.textContent = "";
+    showToast(e.message || "Gagal membuat statement.", false);
+  } finally {
+    btn.disabled = false;
+  }
+}
+
+async function waitForJob(jobId, statusEl) {
+  while (true) {
+    const response = await fetch(`/api/jobs/${jobId}`);
+    const result = await response.json();
+    if (!response.ok || !result.success) throw new Error(result.message);
+    const job = result.job;
+    if (job.status === "Selesai") {
+      statusEl.textContent = `Selesai: ${job.nama_file}`;
+      window.location.href = `/api/jobs/${jobId}/download`;
+      return;
+    }
+    if (job.status === "Gagal") throw new Error(`Statement gagal dibuat: ${job.pesan_error}`);
+    statusEl.textContent =
+      job.percobaan > 1
+        ? `Statement sedang dibuat (percobaan ke-${job.percobaan})...`
+        : "Statement sedang dibuat...";
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+  }
+}
+
 async function fetchAndDisplayOwnerSupplierHistory() {
   const supplierId = document.getElementById("owner-supplier-select").value;
   // Jika belum ada supplier yang dipilih, sembunyikan konten dan jangan lakukan apa-apa
@@ -369,6 +452,36 @@ async function fetchAndDisplayOwnerSupplierHistory() {
   if (endDate) params.append("end_date", endDate);
   const queryString = params.toString();
 
+  const renderPayment = (p) =>
+    `<tr><td>${new Date(p.tanggal + "T00:00:00").toLocaleDateString(
+      "id-ID"
+    )}</td><td>${formatCurrency(p.jumlah)}</td><td><span class="badge bg-info">${
+      p.metode
+    }</span></td></tr>`;
+  const renderSale = (s) =>
+    `<tr><td>${new Date(s.tanggal + "T00:00:00").toLocaleDateString(
+      "id-ID"
+    )}</td><td>${s.lokasi}</td><td>${s.nama_produk}</td><td>${
+      s.terjual
+    } Pcs</td><td class="text-end">${formatCurrency(
+      s.total_harga_beli
+    )}</td></tr>`;
+  // Muat halaman berikutnya untuk satu tabel (payments/sales) saja
+  const pageFetcher = (section, render) => async (cursor) => {
+    const pageParams = new URLSearchParams(params);
+    pageParams.append("section", section);
+    pageParams.append("cursor", cursor);
+    const resp = await fetch(
+      `/api/get_owner_supplier_history/${supplierId}?${pageParams.toString()}`
+    );
+    const page = await resp.json();
+    if (!page.success) throw new Error(page.message);
+    return {
+      html: page[section].map(render).join(""),
+      nextCursor: page.next_cursor[section],
+    };
+  };
+
   try {
     const apiUrl = `/api/get_owner_supplier_history/${supplierId}?${queryString}`;
     const resp = await fetch(apiUrl);
@@ -378,34 +491,24 @@ async function fetchAndDisplayOwnerSupplierHistory() {
     paymentsBody.innerHTML =
       result.payments.length === 0
         ? `<tr><td colspan="3" class="text-center text-muted">Tidak ada pembayaran.</td></tr>`
-        : result.payments
-            .map(
-              (p) =>
-                `<tr><td>${new Date(p.tanggal + "T00:00:00").toLocaleDateString(
-                  "id-ID"
-                )}</td><td>${formatCurrency(
-                  p.jumlah
-                )}</td><td><span class="badge bg-info">${
-                  p.metode
-                }</span></td></tr>`
-            )
-            .join("");
+        : result.payments.map(renderPayment).join("");
+    attachNextPageLoader(
+      paymentsBody,
+      result.next_cursor.payments,
+      pageFetcher("payments", renderPayment),
+      3
+    );
 
     salesBody.innerHTML =
       result.sales.length === 0
         ? `<tr><td colspan="5" class="text-center text-muted">Tidak ada penjualan.</td></tr>`
-        : result.sales
-            .map(
-              (s) =>
-                `<tr><td>${new Date(s.tanggal + "T00:00:00").toLocaleDateString(
-                  "id-ID"
-                )}</td><td>${s.lokasi}</td><td>${s.nama_produk}</td><td>${
-                  s.terjual
-                } Pcs</td><td class="text-end">${formatCurrency(
-                  s.total_harga_beli
-                )}</td></tr>`
-            )
-            .join("");
+        : result.sales.map(renderSale).join("");
+    attachNextPageLoader(
+      salesBody,
+      result.next_cursor.sales,
+      pageFetcher("sales", renderSale),
+      5
+    );
 
     loadingEl.style.display = "none";
     contentEl.style.display = "block";
@@ -621,23 +724,38 @@ async function downloadReportAsPDF() {
   modalBody.style.overflow = originalOverflow;
   showToast("PDF berhasil diunduh.");
 }
+// Halaman pendapatan & biaya memakai endpoint yang sama; permintaan untuk tanggal yang
+// sama yang masih berjalan dipakai bersama (showPage memicu keduanya sekaligus).
+let laporanHarianRequest = null;
+function fetchLaporanHarian(date) {
+  if (!laporanHarianRequest || laporanHarianRequest.date !== date) {
+    const promise = fetch(`/api/get_laporan_harian?date=${date}`)
+      .then((resp) => {
+        if (!resp.ok) throw new Error("Gagal mengambil data");
+        return resp.json();
+      })
+      .finally(() => {
+        if (laporanHarianRequest?.promise === promise) laporanHarianRequest = null;
+      });
+    laporanHarianRequest = { date, promise };
+  }
+  return laporanHarianRequest.promise;
+}
 async function populateLaporanPendapatan() {
   const date = document.getElementById("laporan-pendapatan-datepicker").value;
   const accordionEl = document.getElementById("laporan-pendapatan-accordion");
   accordionEl.innerHTML = `<div class="text-center p-5"><div class="spinner-border text-primary"></div></div>`;
   try {
-    const resp = await fetch(`/api/get_laporan_pendapatan_harian?date=${date}`);
-    if (!resp.ok) throw new Error("Gagal mengambil data");
-    const data = await resp.json();
+    const data = await fetchLaporanHarian(date);
     document.getElementById("total-pendapatan-harian").textContent =
-      formatCurrency(data.total_harian);
+      formatCurrency(data.total_pendapatan);
     accordionEl.innerHTML = "";
     if (data.laporan_per_lapak.length === 0) {
       accordionEl.innerHTML =
         '<div class="alert alert-warning text-center">Tidak ada laporan untuk tanggal ini.</div>';
     } else {
       data.laporan_per_lapak.forEach((lapak, index) => {
-        const productList = lapak.rincian_pendapatan
+        const productList = lapak.rincian
           .map(
             (p) =>
               `<li class="list-group-item d-flex justify-content-between"><div>${p.produk} <small class="text-muted">(${p.supplier})</small></div><div><span class="badge text-bg-light me-2">Awal: ${p.stok_awal}</span><span class="badge text-bg-light me-2">Akhir: ${p.stok_akhir}</span><span class="badge bg-primary rounded-pill">${p.jumlah} Pcs</span></div></li>`
@@ -666,11 +784,9 @@ async function populateLaporanBiaya() {
   const accordionEl = document.getElementById("laporan-biaya-accordion");
   accordionEl.innerHTML = `<div class="text-center p-5"><div class="spinner-border text-warning"></div></div>`;
   try {
-    const resp = await fetch(`/api/get_laporan_biaya_harian?date=${date}`);
-    if (!resp.ok) throw new Error("Gagal mengambil data");
-    const data = await resp.json();
+    const data = await fetchLaporanHarian(date);
     document.getElementById("total-biaya-harian").textContent = formatCurrency(
-      data.total_harian
+      data.total_biaya
     );
     accordionEl.innerHTML = "";
     if (data.laporan_per_lapak.length === 0) {
@@ -678,7 +794,7 @@ async function populateLaporanBiaya() {
         '<div class="alert alert-warning text-center">Tidak ada laporan untuk tanggal ini.</div>';
     } else {
       data.laporan_per_lapak.forEach((lapak, index) => {
-        const productList = lapak.rincian_biaya
+        const productList = lapak.rincian
           .map(
             (p) =>
               `<li class="list-group-item d-flex justify-content-between"><div>${
@@ -741,6 +857,48 @@ async function populateManageReportsPage() {
   if (endDate) params.append("end_date", endDate);
   if (supplierId) params.append("supplier_id", supplierId); // <-- Tambahkan ke parameter API
 
+  const renderReportRow = (r) => {
+    const statusBadge =
+      r.status === "Terkonfirmasi"
+        ? `<span class="badge bg-success">${r.status}</span>`
+        : `<span class="badge bg-warning text-dark">${r.status}</span>`;
+
+    const confirmButton =
+      r.status !== "Terkonfirmasi"
+        ? `<button class="btn btn-sm btn-success" onclick="confirmReport(${r.id})"><i class="bi bi-check-circle-fill"></i></button>`
+        : `<button class="btn btn-sm btn-secondary" disabled><i class="bi bi-check-circle-fill"></i></button>`;
+
+    return `<tr>
+            <td>${r.id}</td><td>${r.lokasi}</td><td>${
+      r.penanggung_jawab
+    }</td>
+            <td>${new Date(r.tanggal).toLocaleDateString("id-ID")}</td>
+            <td>${formatCurrency(r.total_pendapatan)}</td><td>${
+      r.total_produk_terjual
+    } Pcs</td>
+            <td>${statusBadge}</td>
+            <td>
+              <div class="btn-group">
+                <button class="btn btn-sm btn-info" onclick="showReportDetails(${
+                  r.id
+                })"><i class="bi bi-eye-fill"></i></button>
+                ${confirmButton}
+              </div>
+            </td></tr>`;
+  };
+
+  const fetchNextPage = async (cursor) => {
+    const pageParams = new URLSearchParams(params);
+    pageParams.append("cursor", cursor);
+    const resp = await fetch(`/api/get_manage_reports?${pageParams.toString()}`);
+    const page = await resp.json();
+    if (!page.success) throw new Error(page.message);
+    return {
+      html: page.reports.map(renderReportRow).join(""),
+      nextCursor: page.next_cursor,
+    };
+  };
+
   try {
     const resp = await fetch(`/api/get_manage_reports?${params.toString()}`);
     const result = await resp.json();
@@ -749,37 +907,8 @@ async function populateManageReportsPage() {
         tableBody.innerHTML =
           '<tr><td colspan="8" class="text-center text-muted">Tidak ada laporan yang cocok dengan filter.</td></tr>';
       } else {
-        tableBody.innerHTML = result.reports
-          .map((r) => {
-            const statusBadge =
-              r.status === "Terkonfirmasi"
-                ? `<span class="badge bg-success">${r.status}</span>`
-                : `<span class="badge bg-warning text-dark">${r.status}</span>`;
-
-            const confirmButton =
-              r.status !== "Terkonfirmasi"
-                ? `<button class="btn btn-sm btn-success" onclick="confirmReport(${r.id})"><i class="bi bi-check-circle-fill"></i></button>`
-                : `<button class="btn btn-sm btn-secondary" disabled><i class="bi bi-check-circle-fill"></i></button>`;
-
-            return `<tr>
-                    <td>${r.id}</td><td>${r.lokasi}</td><td>${
-              r.penanggung_jawab
-            }</td>
-                    <td>${new Date(r.tanggal).toLocaleDateString("id-ID")}</td>
-                    <td>${formatCurrency(r.total_pendapatan)}</td><td>${
-              r.total_produk_terjual
-            } Pcs</td>
-                    <td>${statusBadge}</td>
-                    <td>
-                      <div class="btn-group">
-                        <button class="btn btn-sm btn-info" onclick="showReportDetails(${
-                          r.id
-                        })"><i class="bi bi-eye-fill"></i></button>
-                        ${confirmButton}
-                      </div>
-                    </td></tr>`;
-          })
-          .join("");
+        tableBody.innerHTML = result.reports.map(renderReportRow).join("");
+        attachNextPageLoader(tableBody, result.next_cursor, fetchNextPage, 8);
       }
       loadingEl.style.display = "none";
       contentEl.style.display = "block";
@@ -1003,12 +1132,12 @@ async function populatePembayaranPage() {
         let isPayable;
         if (item.metode_pembayaran === "BCA") {
           // Untuk BCA, bisa dibayar selama ada tagihan (lebih dari nol)
-          isPayable = item.total_tagihan > 0.01;
+          isPayable = item.total_tagihan > 0;
         } else {
           // Untuk DANA (dan metode lainnya), berlaku minimum 20.000
           isPayable = item.total_tagihan >= 20000;
         }
-        const isPaid = item.total_tagihan < 0.01;
+        const isPaid = item.total_tagihan <= 0;
         let statusBadge, actionBtn, statusText;
 
         if (isPaid) {
@@ -1046,6 +1175,32 @@ async function populatePembayaranPage() {
   }
 }
 
+// --- EKSPOR CSV ---
+// File dibuat bertahap di server, jadi cukup arahkan browser ke URL ekspor
+function downloadExport(kind, filters) {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value) params.append(key, value);
+  });
+  window.location.href = `/api/export/${kind}?${params.toString()}`;
+}
+
+function exportManageReportsCsv(kind) {
+  downloadExport(kind, {
+    start_date: document.getElementById("manage-reports-start-date").value,
+    end_date: document.getElementById("manage-reports-end-date").value,
+    supplier_id: document.getElementById("manage-reports-supplier-filter").value,
+  });
+}
+
+function exportPaymentHistoryCsv() {
+  downloadExport("pembayaran", {
+    start_date: document.getElementById("payment-history-start-date").value,
+    end_date: document.getElementById("payment-history-end-date").value,
+    metode: document.getElementById("payment-history-method").value,
+  });
+}
+
 // Fungsi baru untuk memuat riwayat pembayaran
 async function populatePaymentHistory() {
   const loadingEl = document.getElementById("payment-history-loading");
@@ -1062,6 +1217,30 @@ async function populatePaymentHistory() {
   if (endDate) params.append("end_date", endDate);
   if (metode) params.append("metode", metode);
 
+  const renderPaymentRow = (p) => `
+                    <tr>
+                      <td>${new Date(
+                        p.tanggal + "T00:00:00"
+                      ).toLocaleDateString("id-ID")}</td>
+                      <td>${p.nama_supplier}</td>
+                      <td>${formatCurrency(p.jumlah)}</td>
+                      <td><span class="badge bg-info">${p.metode}</span></td>
+                    </tr>
+                  `;
+  const fetchNextPage = async (cursor) => {
+    const pageParams = new URLSearchParams(params);
+    pageParams.append("cursor", cursor);
+    const resp = await fetch(
+      `/api/get_all_payment_history?${pageParams.toString()}`
+    );
+    const page = await resp.json();
+    if (!page.success) throw new Error(page.message);
+    return {
+      html: page.history.map(renderPaymentRow).join(""),
+      nextCursor: page.next_cursor,
+    };
+  };
+
   try {
     const resp = await fetch(
       `/api/get_all_payment_history?${params.toString()}`
@@ -1072,20 +1251,8 @@ async function populatePaymentHistory() {
     if (result.history.length === 0) {
       tableBody.innerHTML = `<tr><td colspan="4" class="text-center text-muted">Tidak ada riwayat pembayaran.</td></tr>`;
     } else {
-      tableBody.innerHTML = result.history
-        .map(
-          (p) => `
-                    <tr>
-                      <td>${new Date(
-                        p.tanggal + "T00:00:00"
-                      ).toLocaleDateString("id-ID")}</td>
-                      <td>${p.nama_supplier}</td>
-                      <td>${formatCurrency(p.jumlah)}</td>
-                      <td><span class="badge bg-info">${p.metode}</span></td>
-                    </tr>
-                  `
-        )
-        .join("");
+      tableBody.innerHTML = result.history.map(renderPaymentRow).join("");
+      attachNextPageLoader(tableBody, result.next_cursor, fetchNextPage, 4);
     }
   } catch (e) {
     tableBody.innerHTML = `<tr><td colspan="4" class="text-center text-danger">Gagal memuat: ${e.message}</td></tr>`;
@@ -1678,12 +1845,12 @@ async function populateHistoryLaporanPage() {
       '<div class="alert alert-info">Belum ada laporan yang dibuat.</div>';
     return;
   }
-  result.reports.forEach((r) => {
+  const renderReport = (r) => {
     const statusBadge =
       r.status === "Terkonfirmasi"
         ? '<span class="badge bg-success">Terkonfirmasi</span>'
         : '<span class="badge bg-warning text-dark">Menunggu Konfirmasi</span>';
-    listEl.innerHTML += `<div class="list-group-item"><div class="d-flex w-100 justify-content-between"><h5 class="mb-1">${new Date(
+    return `<div class="list-group-item"><div class="d-flex w-100 justify-content-between"><h5 class="mb-1">${new Date(
       r.tanggal
     ).toLocaleDateString("id-ID", {
       weekday: "long",
@@ -1695,7 +1862,20 @@ async function populateHistoryLaporanPage() {
     )}</strong></p><small>Total produk terjual: ${
       r.total_produk_terjual
     } Pcs.</small></div>`;
-  });
+  };
+  const fetchNextPage = async (cursor) => {
+    const pageResp = await fetch(
+      `/api/get_history_laporan/${AppState.currentUser.user_info.lapak_id}?cursor=${encodeURIComponent(cursor)}`
+    );
+    const page = await pageResp.json();
+    if (!page.success) throw new Error(page.message);
+    return {
+      html: page.reports.map(renderReport).join(""),
+      nextCursor: page.next_cursor,
+    };
+  };
+  listEl.innerHTML = result.reports.map(renderReport).join("");
+  attachNextPageLoader(listEl, result.next_cursor, fetchNextPage);
 }
 
 // --- SUPPLIER FUNCTIONS ---
@@ -1743,6 +1923,39 @@ async function populateSupplierHistoryPage() {
   if (lapakId) params.append("lapak_id", lapakId); // Tambahkan lapak_id ke parameter
   const queryString = params.toString();
 
+  const renderPayment = (p) => `
+                    <tr>
+                        <td>${new Date(
+                          p.tanggal + "T00:00:00"
+                        ).toLocaleDateString("id-ID")}</td>
+                        <td>${formatCurrency(p.jumlah)}</td>
+                        <td><span class="badge bg-info">${p.metode}</span></td>
+                    </tr>`;
+  const renderSale = (s) => `
+                    <tr>
+                        <td>${new Date(
+                          s.tanggal + "T00:00:00"
+                        ).toLocaleDateString("id-ID")}</td>
+                        <td>${s.lokasi}</td>
+                        <td>${s.nama_produk}</td>
+                        <td>${s.terjual} Pcs</td>
+                    </tr>`;
+  // Muat halaman berikutnya untuk satu tabel (payments/sales) saja
+  const pageFetcher = (section, render) => async (cursor) => {
+    const pageParams = new URLSearchParams(params);
+    pageParams.append("section", section);
+    pageParams.append("cursor", cursor);
+    const resp = await fetch(
+      `/api/get_supplier_history/${AppState.currentUser.user_info.supplier_id}?${pageParams.toString()}`
+    );
+    const page = await resp.json();
+    if (!page.success) throw new Error(page.message);
+    return {
+      html: page[section].map(render).join(""),
+      nextCursor: page.next_cursor[section],
+    };
+  };
+
   try {
     const apiUrl = `/api/get_supplier_history/${AppState.currentUser.user_info.supplier_id}?${queryString}`;
     const resp = await fetch(apiUrl);
@@ -1760,41 +1973,30 @@ async function populateSupplierHistoryPage() {
       }
     }
 
-    // Bagian untuk mengisi tabel pembayaran (tidak berubah)
+    // Bagian untuk mengisi tabel pembayaran
     if (result.payments.length === 0) {
       paymentsBody.innerHTML = `<tr><td colspan="3" class="text-center text-muted">Belum ada pembayaran.</td></tr>`;
     } else {
-      paymentsBody.innerHTML = result.payments
-        .map(
-          (p) => `
-                    <tr>
-                        <td>${new Date(
-                          p.tanggal + "T00:00:00"
-                        ).toLocaleDateString("id-ID")}</td>
-                        <td>${formatCurrency(p.jumlah)}</td>
-                        <td><span class="badge bg-info">${p.metode}</span></td>
-                    </tr>`
-        )
-        .join("");
+      paymentsBody.innerHTML = result.payments.map(renderPayment).join("");
+      attachNextPageLoader(
+        paymentsBody,
+        result.next_cursor.payments,
+        pageFetcher("payments", renderPayment),
+        3
+      );
     }
 
-    // Bagian untuk mengisi tabel penjualan (tidak berubah)
+    // Bagian untuk mengisi tabel penjualan
     if (result.sales.length === 0) {
       salesBody.innerHTML = `<tr><td colspan="4" class="text-center text-muted">Belum ada penjualan.</td></tr>`;
     } else {
-      salesBody.innerHTML = result.sales
-        .map(
-          (s) => `
-                    <tr>
-                        <td>${new Date(
-                          s.tanggal + "T00:00:00"
-                        ).toLocaleDateString("id-ID")}</td>
-                        <td>${s.lokasi}</td>
-                        <td>${s.nama_produk}</td>
-                        <td>${s.terjual} Pcs</td>
-                    </tr>`
-        )
-        .join("");
+      salesBody.innerHTML = result.sales.map(renderSale).join("");
+      attachNextPageLoader(
+        salesBody,
+        result.next_cursor.sales,
+        pageFetcher("sales", renderSale),
+        4
+      );
     }
 
     loadingEl.style.display = "none";
@@ -0,0 +1,56 @@
+import re
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import NomorUrut, Supplier
+
+# ===================================================================
+# NOMOR REGISTER SUPPLIER (REG001, REG002, ...)
+# ===================================================================
+# Nomor terakhir disimpan di tabel nomor_urut: pratinjau cukup membaca satu baris
+# (primary key) dan add_supplier menaikkannya dengan UPDATE ... RETURNING di
+# transaksinya sendiri, jadi dua owner yang menambah supplier bersamaan tidak
+# pernah mendapat nomor yang sama. Nomor milik supplier yang dihapus tidak dipakai ulang.
+URUTAN_REGISTER_SUPPLIER = 'register_supplier'
+
+def format_nomor_register(nomor):
+    return f"REG{nomor:03d}"
+
+def _nomor_register_terbesar():
+    # Hanya dipakai sekali saat baris urutan belum ada (database lama / hasil seed)
+    nomor = [int(match.group()) for (value,) in db.session.query(Supplier.nomor_register)
+             .filter(Supplier.nomor_register.like('REG%'))
+             if (match := re.search(r'\d+', value))]
+    return max(nomor, default=0)
+
+def inisialisasi_urutan_register():
+    """Buat baris urutan dari nomor REG terbesar yang sudah dipakai (jika belum ada); kembalikan nilainya."""
+    urutan = db.session.get(NomorUrut, URUTAN_REGISTER_SUPPLIER)
+    if urutan is not None:
+        return urutan.nilai
+    nilai = _nomor_register_terbesar()
+    try:
+        with db.session.begin_nested():
+            db.session.add(NomorUrut(nama=URUTAN_REGISTER_SUPPLIER, nilai=nilai))
+    except IntegrityError:
+        # Request lain membuatnya lebih dulu
+        return db.session.get(NomorUrut, URUTAN_REGISTER_SUPPLIER, populate_existing=True).nilai
+    return nilai
+
+def pratinjau_nomor_register():
+    """Nomor yang kemungkinan besar didapat supplier berikutnya (tanpa memesan nomor)."""
+    nilai = db.session.query(NomorUrut.nilai).filter(NomorUrut.nama == URUTAN_REGISTER_SUPPLIER).scalar()
+    if nilai is None:
+        nilai = _nomor_register_terbesar()
+    return format_nomor_register(nilai + 1)
+
+def alokasi_nomor_register():
+    """Ambil nomor register berikutnya secara atomik di transaksi pemanggil."""
+    naikkan = db.update(NomorUrut).where(NomorUrut.nama == URUTAN_REGISTER_SUPPLIER)\
+        .values(nilai=NomorUrut.nilai + 1).returning(NomorUrut.nilai)
+    nilai = db.session.execute(naikkan).scalar()
+    if nilai is None:
+        inisialisasi_urutan_register()
+        nilai = db.session.execute(naikkan).scalar()
+    return format_nomor_register(nilai)
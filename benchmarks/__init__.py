@@ -0,0 +1,9 @@
+import os
+
+
+def database_url(default):
+    """URL database benchmark: BENCH_DATABASE_URL jika diisi (mis. Postgres uji), selain itu `default`.
+
+    Sengaja tidak memakai DATABASE_URL karena benchmark menghapus dan membuat ulang semua tabel.
+    """
+    return os.environ.get('BENCH_DATABASE_URL') or default
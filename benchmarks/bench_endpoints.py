@@ -0,0 +1,324 @@
+"""Benchmark seluruh endpoint dengan budget jumlah query, latensi dan ukuran respons.
+
+Data diisi lewat perintah seed-db (skala di SEED_ARGS), lalu setiap route di
+blueprint 'main' dipanggil lewat test client sebanyak WARMUP + RUNS kali.
+Untuk setiap kasus dicatat p50/p95 latensi, jumlah statement SQL (lewat
+before_cursor_execute) dan ukuran respons, lalu dibandingkan dengan
+benchmarks/budgets.json. Skrip gagal jika ada endpoint yang melewati budget
+query atau ukuran respons (keduanya deterministik), atau ada route yang belum
+punya kasus. Latensi bergantung pada mesin dan beban lain, jadi median yang
+melewati budget hanya dilaporkan sebagai peringatan, kecuali --latency-gate
+(atau BENCH_LATENCY_GATE=1) diberikan.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --update-budgets   # tulis ulang baseline
+    python -m benchmarks.bench_endpoints --only kasus_a kasus_b --update-budgets   # baseline kasus tertentu saja
+    python -m benchmarks.bench_endpoints --latency-gate --latency-factor 3  # latensi ikut menggagalkan, mesin lebih lambat
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import statistics
+import time
+from collections import namedtuple
+
+from benchmarks.common import app, db, capture_statements
+from app.jobs import run_next_job, submit_job
+from app.models import Admin, Supplier, Lapak, Product, SupplierBalance, LaporanHarian
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'budgets.json')
+SEED_ARGS = ['--days', '365', '--lapaks', '40', '--suppliers', '40', '--products-per-supplier', '4', '--seed', '42']
+WARMUP = 2
+RUNS = 30
+# Budget latensi = median terukur x LATENCY_HEADROOM (minimal LATENCY_FLOOR_MS) saat --update-budgets;
+# median dan batas bawah yang lebar agar derau penjadwal tidak terbaca sebagai regresi
+LATENCY_HEADROOM = 5.0
+LATENCY_FLOOR_MS = 25.0
+# Ukuran respons boleh tumbuh sedikit (tanggal relatif terhadap hari ini ikut berubah)
+BYTES_TOLERANCE = 0.10
+
+# build(client, ctx, k) -> (url, json_body[, headers]); k = nomor pemanggilan (termasuk warmup)
+Case = namedtuple('Case', 'name endpoint method build status')
+
+
+# ===================================================================
+# DATA PENDUKUNG KASUS (dihitung di luar pengukuran)
+# ===================================================================
+def _cached(ctx, key, load):
+    if key not in ctx:
+        ctx[key] = load()
+    return ctx[key]
+
+def _ids(query):
+    return [row.id for row in query.order_by('id')]
+
+def _bench_admins(ctx):
+    return _cached(ctx, 'admins', lambda: _ids(Admin.query.filter(Admin.username.like('bench_admin_%'))))
+
+def _bench_lapaks(ctx):
+    return _cached(ctx, 'bench_lapaks', lambda: _ids(Lapak.query.filter(Lapak.lokasi.like('Bench Lapak %'))))
+
+def _bench_suppliers(ctx):
+    return _cached(ctx, 'bench_suppliers', lambda: _ids(Supplier.query.filter(Supplier.username.like('bench_sup_%'))))
+
+def _pending_reports(ctx):
+    return _cached(ctx, 'pending', lambda: _ids(LaporanHarian.query.filter_by(status='Menunggu Konfirmasi')))
+
+def _confirmed_report(ctx):
+    return _cached(ctx, 'confirmed', lambda: LaporanHarian.query.filter_by(status='Terkonfirmasi')
+                   .order_by(LaporanHarian.id.desc()).first().id)
+
+def _statement_month():
+    return (datetime.date.today().replace(day=1) - datetime.timedelta(days=1)).strftime('%Y-%m')
+
+def _finished_job(ctx):
+    def build():
+        job = submit_job('statement_supplier', {"supplier_id": 2, "bulan": _statement_month()})
+        # Kerjakan seluruh antrian (termasuk job dari kasus submit_statement_job)
+        while run_next_job(app.config):
+            pass
+        return job.id
+    return _cached(ctx, 'finished_job', build)
+
+def _richest_supplier(ctx):
+    return _cached(ctx, 'richest', lambda: SupplierBalance.query.order_by(SupplierBalance.balance.desc()).first().supplier_id)
+
+def _all_lapaks(ctx):
+    return _cached(ctx, 'lapaks', lambda: _ids(Lapak.query))
+
+def _catatan_products(ctx):
+    return _cached(ctx, 'catatan_products', lambda: _ids(Product.query.filter(Product.id <= 30)))
+
+def _days_ago(days):
+    return (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+
+def _yesterday():
+    return (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+
+def _revalidate(url):
+    """Kasus conditional GET: ambil ETag sekali, lalu ukur request dengan If-None-Match (harus 304)."""
+    def build(client, ctx, k):
+        full_url = url(ctx) if callable(url) else url
+        # Client terpisah (tanpa 'with') agar context request-nya tidak tertinggal di stack
+        etag = _cached(ctx, ('etag', full_url), lambda: app.test_client().get(full_url).headers['ETag'])
+        return full_url, None, {'If-None-Match': etag}
+    return build
+
+def _dashboard_as_owner(client, ctx, k):
+    with client.session_transaction() as sess:
+        sess['user_role'] = 'owner'
+        sess['user_info'] = {"nama_lengkap": "Owner Utama", "id": 1}
+    return '/dashboard', None
+
+
+# ===================================================================
+# DAFTAR KASUS (urutan penting: add -> update -> delete)
+# ===================================================================
+def _admin_body(k):
+    return {"nama_lengkap": f"Bench Admin {k}", "nik": f"9{k:015d}", "username": f"bench_admin_{k}",
+            "email": f"bench{k}@app.com", "nomor_kontak": "0800", "password": "bench", "password_confirm": "bench"}
+
+def _supplier_body(k):
+    return {"nama_supplier": f"Bench Supplier {k}", "username": f"bench_sup_{k}", "kontak": "0800",
+            "alamat": "Bandung", "password": "bench", "password_confirm": "bench",
+            "metode_pembayaran": "BCA", "nomor_rekening": f"9{k:07d}"}
+
+def _catatan_body(ctx, k):
+    return {"lapak_id": _all_lapaks(ctx)[k],
+            "rekap_pembayaran": {"cash": 100000, "qris": 50000, "bca": 0, "total": 150000},
+            "products": [{"id": pid, "stok_awal": 20, "stok_akhir": 5} for pid in _catatan_products(ctx)]
+                        + [{"nama_produk": f"Produk Manual {k}", "supplier_id": "manual", "stok_awal": 10, "stok_akhir": 4}]}
+
+CASES = [
+    Case('index', 'index', 'GET', lambda c, ctx, k: ('/', None), 200),
+    Case('dashboard', 'dashboard', 'GET', _dashboard_as_owner, 200),
+    Case('login', 'handle_login', 'POST', lambda c, ctx, k: ('/api/login', {"username": "owner", "password": "owner"}), 200),
+    Case('logout', 'logout', 'GET', lambda c, ctx, k: ('/logout', None), 302),
+    Case('get_data_owner', 'get_owner_data', 'GET', lambda c, ctx, k: ('/api/get_data_owner', None), 200),
+    Case('get_data_owner_304', 'get_owner_data', 'GET', _revalidate('/api/get_data_owner'), 304),
+    Case('add_admin', 'add_admin', 'POST', lambda c, ctx, k: ('/api/add_admin', _admin_body(k)), 200),
+    Case('update_admin', 'update_admin', 'PUT',
+         lambda c, ctx, k: (f'/api/update_admin/{_bench_admins(ctx)[k]}', dict(_admin_body(k), password='')), 200),
+    Case('delete_admin', 'delete_admin', 'DELETE', lambda c, ctx, k: (f'/api/delete_admin/{_bench_admins(ctx)[k]}', None), 200),
+    Case('add_lapak', 'add_lapak', 'POST', lambda c, ctx, k: ('/api/add_lapak', {"lokasi": f"Bench Lapak {k}", "user_id": 2, "anggota_ids": [2, 3]}), 200),
+    Case('update_lapak', 'update_lapak', 'PUT',
+         lambda c, ctx, k: (f'/api/update_lapak/{_bench_lapaks(ctx)[k]}', {"lokasi": f"Bench Lapak {k}b", "user_id": 2, "anggota_ids": [2]}), 200),
+    Case('delete_lapak', 'delete_lapak', 'DELETE', lambda c, ctx, k: (f'/api/delete_lapak/{_bench_lapaks(ctx)[k]}', None), 200),
+    Case('get_next_supplier_reg_number', 'get_next_supplier_reg_number', 'GET',
+         lambda c, ctx, k: ('/api/get_next_supplier_reg_number', None), 200),
+    Case('add_supplier', 'add_supplier', 'POST', lambda c, ctx, k: ('/api/add_supplier', _supplier_body(k)), 200),
+    Case('update_supplier', 'update_supplier', 'PUT',
+         lambda c, ctx, k: (f'/api/update_supplier/{_bench_suppliers(ctx)[k]}', dict(_supplier_body(k), password='')), 200),
+    Case('delete_supplier', 'delete_supplier', 'DELETE', lambda c, ctx, k: (f'/api/delete_supplier/{_bench_suppliers(ctx)[k]}', None), 200),
+    Case('get_owner_supplier_history', 'get_owner_supplier_history', 'GET',
+         lambda c, ctx, k: ('/api/get_owner_supplier_history/1', None), 200),
+    Case('get_owner_supplier_history_range', 'get_owner_supplier_history', 'GET',
+         lambda c, ctx, k: ('/api/get_owner_supplier_history/1?start_date=2000-01-01&end_date=2100-01-01&section=sales', None), 200),
+    # cursor tanpa section tidak jelas milik daftar mana; cursor rusak juga 400, bukan 500
+    Case('get_owner_history_cursor_no_section', 'get_owner_supplier_history', 'GET',
+         lambda c, ctx, k: ('/api/get_owner_supplier_history/1?cursor=2026-01-01:10', None), 400),
+    Case('get_owner_history_bad_cursor', 'get_owner_supplier_history', 'GET',
+         lambda c, ctx, k: ('/api/get_owner_supplier_history/1?section=sales&cursor=kemarin', None), 400),
+    Case('get_laporan_harian', 'get_laporan_harian', 'GET',
+         lambda c, ctx, k: (f'/api/get_laporan_harian?date={_yesterday()}', None), 200),
+    Case('get_laporan_harian_week', 'get_laporan_harian', 'GET',
+         lambda c, ctx, k: (f'/api/get_laporan_harian?start_date={_days_ago(7)}&end_date={_yesterday()}', None), 200),
+    Case('get_laporan_harian_304', 'get_laporan_harian', 'GET',
+         _revalidate(lambda ctx: f'/api/get_laporan_harian?date={_yesterday()}'), 304),
+    Case('get_laporan_pendapatan_harian', 'get_laporan_pendapatan_harian', 'GET',
+         lambda c, ctx, k: (f'/api/get_laporan_pendapatan_harian?date={_yesterday()}', None), 200),
+    Case('get_laporan_biaya_harian', 'get_laporan_biaya_harian', 'GET',
+         lambda c, ctx, k: (f'/api/get_laporan_biaya_harian?date={_yesterday()}', None), 200),
+    Case('get_laporan_pendapatan_harian_304', 'get_laporan_pendapatan_harian', 'GET',
+         _revalidate(lambda ctx: f'/api/get_laporan_pendapatan_harian?date={_yesterday()}'), 304),
+    Case('get_manage_reports', 'get_manage_reports', 'GET', lambda c, ctx, k: ('/api/get_manage_reports', None), 200),
+    Case('get_manage_reports_supplier', 'get_manage_reports', 'GET',
+         lambda c, ctx, k: ('/api/get_manage_reports?supplier_id=1', None), 200),
+    Case('confirm_report', 'confirm_report', 'POST', lambda c, ctx, k: (f'/api/confirm_report/{_pending_reports(ctx)[k]}', None), 200),
+    Case('get_pembayaran_data', 'get_pembayaran_data', 'GET', lambda c, ctx, k: ('/api/get_pembayaran_data', None), 200),
+    Case('submit_pembayaran', 'submit_pembayaran', 'POST',
+         lambda c, ctx, k: ('/api/submit_pembayaran', {"supplier_id": _richest_supplier(ctx), "jumlah_pembayaran": 1000}), 200),
+    Case('get_all_payment_history', 'get_all_payment_history', 'GET', lambda c, ctx, k: ('/api/get_all_payment_history', None), 200),
+    Case('get_all_payment_history_bad_limit', 'get_all_payment_history', 'GET',
+         lambda c, ctx, k: ('/api/get_all_payment_history?limit=banyak', None), 400),
+    Case('export_laporan', 'export_laporan', 'GET', lambda c, ctx, k: ('/api/export/laporan', None), 200),
+    Case('export_rincian_laporan_supplier', 'export_rincian_laporan', 'GET',
+         lambda c, ctx, k: ('/api/export/rincian_laporan?supplier_id=1', None), 200),
+    Case('export_pembayaran', 'export_pembayaran', 'GET', lambda c, ctx, k: ('/api/export/pembayaran', None), 200),
+    Case('submit_statement_job', 'submit_statement_job', 'POST',
+         lambda c, ctx, k: ('/api/jobs/statement_supplier', {"supplier_id": 1, "bulan": _statement_month()}), 202),
+    Case('get_job_status', 'get_job_status', 'GET', lambda c, ctx, k: (f'/api/jobs/{_finished_job(ctx)}', None), 200),
+    Case('download_job_result', 'download_job_result', 'GET',
+         lambda c, ctx, k: (f'/api/jobs/{_finished_job(ctx)}/download', None), 200),
+    Case('get_chart_data_month', 'get_chart_data', 'GET', lambda c, ctx, k: ('/api/get_chart_data', None), 200),
+    Case('get_chart_data_year', 'get_chart_data', 'GET', lambda c, ctx, k: ('/api/get_chart_data?period=year', None), 200),
+    Case('get_chart_data_year_304', 'get_chart_data', 'GET', _revalidate('/api/get_chart_data?period=year'), 304),
+    Case('get_data_buat_catatan', 'get_data_buat_catatan', 'GET',
+         lambda c, ctx, k: (f'/api/get_data_buat_catatan/{_all_lapaks(ctx)[-1]}', None), 200),
+    Case('submit_catatan_harian', 'submit_catatan_harian', 'POST', lambda c, ctx, k: ('/api/submit_catatan_harian', _catatan_body(ctx, k)), 200),
+    Case('get_history_laporan', 'get_history_laporan', 'GET', lambda c, ctx, k: ('/api/get_history_laporan/1', None), 200),
+    Case('get_data_supplier', 'get_data_supplier', 'GET', lambda c, ctx, k: ('/api/get_data_supplier/1', None), 200),
+    Case('get_supplier_history', 'get_supplier_history', 'GET', lambda c, ctx, k: ('/api/get_supplier_history/1', None), 200),
+    Case('get_supplier_history_304', 'get_supplier_history', 'GET', _revalidate('/api/get_supplier_history/1'), 304),
+    Case('get_supplier_history_no_section', 'get_supplier_history', 'GET',
+         lambda c, ctx, k: ('/api/get_supplier_history/1?cursor=2026-01-01:10', None), 400),
+    Case('get_saldo_supplier', 'get_saldo_supplier', 'GET',
+         lambda c, ctx, k: (f'/api/get_saldo_supplier/1?tanggal={datetime.date.today() - datetime.timedelta(days=45)}', None), 200),
+    Case('get_mutasi_supplier', 'get_mutasi_supplier', 'GET', lambda c, ctx, k: ('/api/get_mutasi_supplier/1', None), 200),
+    Case('get_report_details', 'get_report_details', 'GET',
+         lambda c, ctx, k: (f'/api/get_report_details/{_confirmed_report(ctx)}', None), 200),
+    Case('get_report_details_304', 'get_report_details', 'GET',
+         _revalidate(lambda ctx: f'/api/get_report_details/{_confirmed_report(ctx)}'), 304),
+]
+
+
+# ===================================================================
+# PENGUKURAN
+# ===================================================================
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def run_case(client, case, ctx):
+    latencies, queries, sizes = [], [], []
+    for k in range(WARMUP + RUNS):
+        with app.app_context():
+            url, body, *headers = case.build(client, ctx, k)
+            db.session.remove()
+        with capture_statements() as statements:
+            start = time.perf_counter()
+            # buffered: respons streaming (ekspor CSV) dibaca habis di dalam pengukuran
+            resp = client.open(url, method=case.method, json=body, headers=headers[0] if headers else None, buffered=True)
+            elapsed = time.perf_counter() - start
+        if resp.status_code != case.status:
+            raise SystemExit(f"{case.name}: {case.method} {url} -> HTTP {resp.status_code} (harusnya {case.status}): {resp.get_data(as_text=True)[:300]}")
+        if k >= WARMUP:
+            latencies.append(elapsed * 1000)
+            queries.append(len(statements))
+            sizes.append(len(resp.get_data()))
+    return {"p50_ms": statistics.median(latencies), "p95_ms": _percentile(latencies, 95),
+            "queries": max(queries), "bytes": max(sizes)}
+
+def check_coverage():
+    """Pastikan setiap route di blueprint 'main' punya minimal satu kasus."""
+    endpoints = {rule.endpoint.split('.', 1)[1] for rule in app.url_map.iter_rules() if rule.endpoint.startswith('main.')}
+    missing = endpoints - {case.endpoint for case in CASES}
+    if missing:
+        raise SystemExit(f"Route tanpa kasus benchmark: {', '.join(sorted(missing))}")
+
+def compare(results, budgets, latency_factor):
+    """-> (kegagalan query/ukuran respons, pelanggaran budget latensi median)."""
+    failures, slow = [], []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f"{name}: belum ada budget (jalankan dengan --update-budgets)")
+            continue
+        if result["queries"] > budget["queries"]:
+            failures.append(f"{name}: {result['queries']} query > budget {budget['queries']}")
+        if result["bytes"] > budget["bytes"] * (1 + BYTES_TOLERANCE):
+            failures.append(f"{name}: respons {result['bytes']} byte > budget {budget['bytes']} (+{BYTES_TOLERANCE:.0%})")
+        if result["p50_ms"] > budget["p50_ms"] * latency_factor:
+            slow.append(f"{name}: median {result['p50_ms']:.1f} ms > budget {budget['p50_ms'] * latency_factor:.1f} ms")
+    return failures, slow
+
+def new_budgets(results):
+    return {name: {"queries": r["queries"],
+                   "p50_ms": round(max(LATENCY_FLOOR_MS, r["p50_ms"] * LATENCY_HEADROOM), 1),
+                   "bytes": r["bytes"]} for name, r in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--update-budgets', action='store_true', help="Tulis hasil pengukuran sebagai baseline baru.")
+    parser.add_argument('--latency-factor', type=float, default=float(os.environ.get('BENCH_LATENCY_FACTOR', 1.0)),
+                        help="Pengali budget latensi untuk mesin yang lebih lambat.")
+    parser.add_argument('--latency-gate', action='store_true', default=os.environ.get('BENCH_LATENCY_GATE') == '1',
+                        help="Gagal juga jika median latensi melewati budget (default: hanya peringatan).")
+    parser.add_argument('--only', nargs='*', help="Jalankan hanya kasus dengan nama ini (kasus lain tidak dicek).")
+    args = parser.parse_args()
+
+    check_coverage()
+    seed = app.test_cli_runner().invoke(args=['seed-db'] + SEED_ARGS)
+    if seed.exit_code != 0:
+        raise SystemExit(f"seed-db gagal:\n{seed.output}")
+
+    cases = [case for case in CASES if not args.only or case.name in args.only]
+    results, ctx = {}, {}
+    with app.app_context(), app.test_client() as client:
+        print(f"{'kasus':38s} {'p50 ms':>8s} {'p95 ms':>8s} {'query':>6s} {'byte':>9s}")
+        for case in cases:
+            results[case.name] = result = run_case(client, case, ctx)
+            print(f"{case.name:38s} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['queries']:6d} {result['bytes']:9d}")
+
+    if args.update_budgets:
+        budgets = new_budgets(results)
+        if args.only:
+            # Hanya kasus yang dijalankan yang ditulis ulang; budget kasus lain dipertahankan
+            with open(BUDGETS_PATH) as f:
+                budgets = dict(json.load(f)["endpoints"], **budgets)
+        with open(BUDGETS_PATH, 'w') as f:
+            json.dump({"seed_args": SEED_ARGS, "runs": RUNS, "endpoints": budgets}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Budget baru ditulis ke {BUDGETS_PATH}")
+        return
+
+    with open(BUDGETS_PATH) as f:
+        baseline = json.load(f)
+    if baseline["seed_args"] != SEED_ARGS:
+        raise SystemExit("Skala data berbeda dengan baseline; jalankan ulang dengan --update-budgets.")
+    failures, slow = compare(results, baseline["endpoints"], args.latency_factor)
+    if args.latency_gate:
+        failures += slow
+    elif slow:
+        print("Peringatan, median latensi melewati budget (tidak menggagalkan tanpa --latency-gate):\n  " + "\n  ".join(slow))
+    if failures:
+        raise SystemExit("Endpoint melewati budget:\n  " + "\n  ".join(failures))
+    print(f"OK: {len(results)} kasus dalam budget query & ukuran respons" + (" & latensi." if args.latency_gate else "."))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Uji antrian job laporan: throughput statement supplier, batas paralel, retry dan lease.
+
+Memakai database file sementara (bukan in-memory) karena worker job berjalan
+di thread terpisah dengan koneksinya sendiri. Yang diperiksa:
+- request submit tetap cepat walaupun statement-nya berat;
+- job yang berjalan bersamaan tidak pernah melebihi JOB_MAX_CONCURRENT
+  meskipun jumlah thread worker lebih banyak;
+- job yang gagal diulang lalu berhasil, atau ditandai Gagal setelah
+  JOB_MAX_ATTEMPTS percobaan;
+- saldo akhir statement bulan berjalan sama dengan saldo berjalan supplier,
+  juga setelah lapak yang punya laporan terkonfirmasi dihapus;
+- job yang lease-nya habis (worker mati) diambil ulang worker lain;
+- polling antrian kosong hanya membaca; job selesai/gagal yang lebih lama dari
+  JOB_RESULT_TTL dihapus oleh pembersihan terpisah (sekali per JOB_PURGE_INTERVAL).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_jobs
+"""
+import csv
+import datetime
+import io
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks import database_url
+
+os.environ['DATABASE_URL'] = database_url(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'jobs.db')}")
+
+from benchmarks.common import app, db, capture_statements
+from app import jobs
+from app.models import JobLaporan, Supplier, SupplierBalance, Product, LaporanHarian, LaporanHarianProduk
+
+SEED_ARGS = ['--days', '120', '--lapaks', '15', '--suppliers', '30', '--seed', '7']
+WORKERS = 4
+MAX_CONCURRENT = 2
+SUBMIT_BUDGET_MS = 50
+
+_active = {"now": 0, "peak": 0}
+_active_lock = threading.Lock()
+_flaky_calls = {}
+
+def slow_job(tag, seconds=0.2):
+    with _active_lock:
+        _active["now"] += 1
+        _active["peak"] = max(_active["peak"], _active["now"])
+    time.sleep(seconds)
+    with _active_lock:
+        _active["now"] -= 1
+    return f"{tag}.txt", 'text/plain', tag.encode()
+
+def flaky_job(tag, failures):
+    _flaky_calls[tag] = _flaky_calls.get(tag, 0) + 1
+    if _flaky_calls[tag] <= failures:
+        raise RuntimeError(f"gagal sementara #{_flaky_calls[tag]}")
+    return f"{tag}.txt", 'text/plain', tag.encode()
+
+# __name__: modul ini sendiri (juga saat dijalankan sebagai __main__), agar penghitung di atas yang dipakai
+jobs.JOB_HANDLERS.update({'bench_slow': f'{__name__}:slow_job', 'bench_flaky': f'{__name__}:flaky_job'})
+
+
+def wait_for(job_ids, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with app.app_context():
+            pending = JobLaporan.query.filter(JobLaporan.id.in_(job_ids),
+                                              JobLaporan.status.in_((jobs.JOB_ANTRI, jobs.JOB_DIPROSES))).count()
+            db.session.remove()
+        if not pending:
+            return
+        time.sleep(0.05)
+    raise SystemExit(f"{pending} job belum selesai setelah {timeout} detik")
+
+def submit(jenis, params):
+    with app.app_context():
+        job_id = jobs.submit_job(jenis, params).id
+        db.session.remove()
+    jobs.job_runner(app).wake()
+    return job_id
+
+def jobs_by_id(job_ids):
+    with app.app_context():
+        result = {job.id: (job.status, job.percobaan) for job in JobLaporan.query.filter(JobLaporan.id.in_(job_ids))}
+        db.session.remove()
+    return result
+
+
+def bench_statements(client):
+    with app.app_context():
+        supplier_ids = [sid for (sid,) in db.session.query(Supplier.id).order_by(Supplier.id)]
+        db.session.remove()
+    bulan = (datetime.date.today().replace(day=1) - datetime.timedelta(days=1)).strftime('%Y-%m')
+    submit_ms, job_ids = [], []
+    start = time.perf_counter()
+    for sid in supplier_ids:
+        t = time.perf_counter()
+        resp = client.post('/api/jobs/statement_supplier', json={"supplier_id": sid, "bulan": bulan})
+        submit_ms.append((time.perf_counter() - t) * 1000)
+        if resp.status_code != 202:
+            raise SystemExit(f"submit gagal: HTTP {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+        job_ids.append(resp.json["job"]["id"])
+    wait_for(job_ids)
+    elapsed = time.perf_counter() - start
+    statuses = {status for status, _ in jobs_by_id(job_ids).values()}
+    if statuses != {jobs.JOB_SELESAI}:
+        raise SystemExit(f"statement tidak semuanya selesai: {statuses}")
+    resp = client.get(f'/api/jobs/{job_ids[0]}/download')
+    if resp.status_code != 200 or not resp.get_data(as_text=True).lstrip('\ufeff').startswith('Statement Supplier'):
+        raise SystemExit(f"unduh statement gagal: HTTP {resp.status_code}")
+    p50 = statistics.median(submit_ms)
+    print(f"statement: {len(job_ids)} job dalam {elapsed:.2f} s ({len(job_ids) / elapsed:.1f} job/s), submit p50 {p50:.1f} ms")
+    if p50 > SUBMIT_BUDGET_MS:
+        raise SystemExit(f"submit p50 {p50:.1f} ms > {SUBMIT_BUDGET_MS} ms")
+
+def statement_rows(client, supplier_id, bulan):
+    resp = client.post('/api/jobs/statement_supplier', json={"supplier_id": supplier_id, "bulan": bulan})
+    job_id = resp.json["job"]["id"]
+    jobs.job_runner(app).wake()
+    wait_for([job_id])
+    resp = client.get(f'/api/jobs/{job_id}/download')
+    if resp.status_code != 200:
+        raise SystemExit(f"unduh statement gagal: HTTP {resp.status_code}")
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True).lstrip('\ufeff'))))
+    labels = {row[0]: row[1] for row in rows if len(row) == 2}
+    mutasi = rows[rows.index(["Mutasi"]) + 2:]
+    total = sum(int(row[3]) for row in mutasi[:mutasi.index([])])
+    return int(labels["Saldo Awal"]), total, int(labels["Saldo Akhir"])
+
+def check_statement_after_delete_lapak(client):
+    # Lapak dengan laporan terkonfirmasi untuk supplier ber-saldo; ringkasannya ikut terhapus, ledger tidak
+    with app.app_context():
+        supplier_id, lapak_id = db.session.query(Product.supplier_id, LaporanHarian.lapak_id)\
+            .select_from(LaporanHarianProduk)\
+            .join(Product, Product.id == LaporanHarianProduk.product_id)\
+            .join(LaporanHarian, LaporanHarian.id == LaporanHarianProduk.laporan_id)\
+            .join(SupplierBalance, SupplierBalance.supplier_id == Product.supplier_id)\
+            .filter(LaporanHarian.status == 'Terkonfirmasi', SupplierBalance.balance > 0)\
+            .order_by(SupplierBalance.balance.desc()).first()
+        db.session.remove()
+    bulan = datetime.date.today().strftime('%Y-%m')
+    sebelum = statement_rows(client, supplier_id, bulan)
+    resp = client.delete(f'/api/delete_lapak/{lapak_id}')
+    if resp.status_code != 200:
+        raise SystemExit(f"hapus lapak gagal: HTTP {resp.status_code}")
+    saldo_awal, total, saldo_akhir = statement_rows(client, supplier_id, bulan)
+    with app.app_context():
+        balance = SupplierBalance.query.filter_by(supplier_id=supplier_id).one().balance
+        db.session.remove()
+    print(f"statement setelah hapus lapak: saldo akhir {sebelum[2]} -> {saldo_akhir}, saldo berjalan {balance}")
+    if saldo_akhir != balance or sebelum[2] != balance:
+        raise SystemExit("Saldo akhir statement bulan berjalan tidak sama dengan saldo berjalan supplier")
+    if saldo_awal + total != saldo_akhir:
+        raise SystemExit(f"Mutasi statement tidak berjumlah saldo akhir: {saldo_awal} + {total} != {saldo_akhir}")
+
+def check_concurrency_limit():
+    job_ids = [submit('bench_slow', {"tag": f"slow{i}"}) for i in range(12)]
+    wait_for(job_ids)
+    print(f"batas paralel: puncak {_active['peak']} job bersamaan ({WORKERS} thread, JOB_MAX_CONCURRENT={MAX_CONCURRENT})")
+    if _active["peak"] > MAX_CONCURRENT:
+        raise SystemExit("Batas JOB_MAX_CONCURRENT terlewati")
+    if _active["peak"] < 2:
+        raise SystemExit("Job tidak pernah berjalan paralel")
+
+def check_retry():
+    recovered = submit('bench_flaky', {"tag": "pulih", "failures": 2})
+    failed = submit('bench_flaky', {"tag": "rusak", "failures": 99})
+    wait_for([recovered, failed])
+    result = jobs_by_id([recovered, failed])
+    print(f"retry: pulih={result[recovered]}, rusak={result[failed]}")
+    if result[recovered] != (jobs.JOB_SELESAI, 3) or result[failed] != (jobs.JOB_GAGAL, app.config['JOB_MAX_ATTEMPTS']):
+        raise SystemExit("Retry job tidak sesuai harapan")
+
+def check_lease_recovery():
+    # Simulasikan worker yang mati: job ditandai Diproses dengan lease yang sudah lewat
+    job_id = 'yatim'
+    with app.app_context():
+        db.session.add(JobLaporan(id=job_id, jenis='bench_slow', parameter='{"seconds":0,"tag":"yatim"}',
+                                  status=jobs.JOB_DIPROSES, pemegang='mati', percobaan=1,
+                                  batas_waktu=datetime.datetime.now() - datetime.timedelta(seconds=1)))
+        db.session.commit()
+        db.session.remove()
+    jobs.job_runner(app).wake()
+    wait_for([job_id])
+    print(f"lease habis: {jobs_by_id([job_id])[job_id]}")
+    if jobs_by_id([job_id])[job_id][0] != jobs.JOB_SELESAI:
+        raise SystemExit("Job dengan lease habis tidak diambil ulang")
+
+def check_result_ttl():
+    now = datetime.datetime.now()
+    ttl = app.config['JOB_RESULT_TTL']
+    with app.app_context():
+        expired = [job_id for (job_id,) in db.session.query(JobLaporan.id)]
+        # Job yang baru selesai (di dalam TTL) harus tetap ada
+        db.session.add(JobLaporan(id='baru', jenis='bench_slow', parameter='{}', status=jobs.JOB_SELESAI,
+                                  selesai_pada=now - datetime.timedelta(seconds=ttl - 60)))
+        db.session.execute(db.update(JobLaporan).where(JobLaporan.id.in_(expired))
+                           .values(selesai_pada=now - datetime.timedelta(seconds=ttl + 1)))
+        db.session.commit()
+        # Polling antrian kosong tidak boleh menulis (dan tidak lagi ikut menghapus job kedaluwarsa)
+        with capture_statements() as statements:
+            if jobs.claim_job(app.config) is not None:
+                raise SystemExit("Tidak ada job antri yang seharusnya diklaim")
+        writes = [sql for sql, _ in statements if sql.lstrip().split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE')]
+        if writes:
+            raise SystemExit(f"claim_job menulis walaupun antrian kosong: {writes}")
+        if db.session.query(JobLaporan.id).count() != len(expired) + 1:
+            raise SystemExit("claim_job menghapus job kedaluwarsa; pembersihan seharusnya terpisah")
+        # Worker sudah membersihkan saat mulai; berikutnya baru setelah JOB_PURGE_INTERVAL
+        if jobs.job_runner(app).purge_due():
+            raise SystemExit("Pembersihan job berjalan lagi sebelum JOB_PURGE_INTERVAL")
+        purged = jobs.purge_expired_jobs(app.config, datetime.datetime.now())
+        remaining = {job_id for (job_id,) in db.session.query(JobLaporan.id)}
+        db.session.remove()
+    print(f"TTL hasil: {purged} job kedaluwarsa dihapus, tersisa {sorted(remaining)}; klaim antrian kosong tanpa query tulis")
+    if remaining != {'baru'} or purged != len(expired):
+        raise SystemExit("Job kedaluwarsa tidak dihapus (atau job yang masih berlaku ikut terhapus)")
+
+
+def main():
+    app.config.update(JOB_WORKERS=WORKERS, JOB_MAX_CONCURRENT=MAX_CONCURRENT, JOB_MAX_ATTEMPTS=3,
+                      JOB_RETRY_DELAY=0.05, JOB_POLL_INTERVAL=0.05)
+    seed = app.test_cli_runner().invoke(args=['seed-db'] + SEED_ARGS)
+    if seed.exit_code != 0:
+        raise SystemExit(f"seed-db gagal:\n{seed.output}")
+    jobs.init_jobs(app)
+
+    client = app.test_client()
+    bench_statements(client)
+    check_statement_after_delete_lapak(client)
+    check_concurrency_limit()
+    check_retry()
+    check_lease_recovery()
+    check_result_ttl()
+    print("OK: antrian job berjalan sesuai batas dan aturan retry.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark throughput /api/login dengan banyak akun admin & supplier.
+
+Password di-hash dengan iterasi minimum (juga dijadikan PASSWORD_HASH_METHOD agar
+tidak di-hash ulang saat login) sehingga yang terukur adalah pencarian akunnya.
+Yang diperiksa:
+- setiap login (berhasil, password salah, username tidak ada) hanya satu query;
+- query login memakai index username_lower (tidak ada SCAN tabel admin/supplier);
+- username tidak membedakan huruf besar/kecil.
+Sebagai pembanding dicetak juga waktu pencarian lama lower(username) = ?.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_login
+    python -m benchmarks.bench_login --accounts 50000 --logins 2000
+"""
+import argparse
+import random
+import re
+import time
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import app, db, capture_statements
+from app.models import Admin, Supplier
+from app.passwords import PasswordHasher
+
+FULL_SCAN = re.compile(r'^SCAN (admin|supplier)\b')
+HASH_METHOD = 'pbkdf2:sha256:1'
+
+
+def seed_accounts(count):
+    db.drop_all()
+    db.create_all()
+    password = generate_password_hash("rahasia", method=HASH_METHOD)
+    db.session.execute(db.insert(Admin), [dict(nama_lengkap=f"Admin {i}", nik=f"{i:016d}", username=f"Admin{i:06d}",
+                                               email=f"admin{i}@app.com", password=password) for i in range(count)])
+    db.session.execute(db.insert(Supplier), [dict(nama_supplier=f"Supplier {i}", username=f"Supplier{i:06d}", password=password)
+                                             for i in range(count)])
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+def login_attempts(count, accounts, rng):
+    """(username, password, status yang diharapkan): campuran admin/supplier, huruf acak, salah password & tidak terdaftar."""
+    attempts = []
+    for _ in range(count):
+        kind = rng.random()
+        name = f"{rng.choice(['admin', 'SUPPLIER', 'Supplier', 'ADMIN'])}{rng.randrange(accounts):06d}"
+        if kind < 0.7:
+            attempts.append((name, "rahasia", 200))
+        elif kind < 0.85:
+            attempts.append((name, "salah", 401))
+        else:
+            attempts.append((f"tidakada{rng.randrange(accounts)}", "rahasia", 401))
+    return attempts
+
+def check_plan(client):
+    with capture_statements() as statements:
+        resp = client.post('/api/login', json={"username": "SUPPLIER000001", "password": "rahasia"})
+    if resp.status_code != 200 or resp.json["role"] != 'supplier':
+        raise SystemExit(f"login supplier gagal: HTTP {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+    if len(statements) != 1:
+        raise SystemExit(f"login memakai {len(statements)} query (harus 1)")
+    if db.engine.dialect.name != 'sqlite':
+        return  # EXPLAIN QUERY PLAN hanya ada di SQLite
+    statement, parameters = statements[0]
+    plan = [row[-1] for row in db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    scans = [step for step in plan if FULL_SCAN.match(step)]
+    if scans:
+        raise SystemExit(f"query login tidak memakai index: {scans}")
+
+def time_legacy_lookup(usernames):
+    start = time.perf_counter()
+    for username in usernames:
+        db.session.query(Admin.id).filter(db.func.lower(Admin.username) == username).first()
+        db.session.query(Supplier.id).filter(db.func.lower(Supplier.username) == username).first()
+    return (time.perf_counter() - start) / len(usernames) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=20000, help="Jumlah akun admin dan juga jumlah akun supplier")
+    parser.add_argument('--logins', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    app.config['PASSWORD_HASH_METHOD'] = HASH_METHOD
+    app.extensions['password_hasher'] = PasswordHasher(app)
+    with app.app_context():
+        seed_accounts(args.accounts)
+        client = app.test_client()
+        check_plan(client)
+
+        attempts = login_attempts(args.logins, args.accounts, rng)
+        start = time.perf_counter()
+        for username, password, expected in attempts:
+            resp = client.post('/api/login', json={"username": username, "password": password})
+            if resp.status_code != expected:
+                raise SystemExit(f"login {username!r}/{password!r}: HTTP {resp.status_code}, seharusnya {expected}")
+        elapsed = time.perf_counter() - start
+
+        legacy_ms = time_legacy_lookup([username.lower() for username, _, _ in attempts[:50]])
+        print(f"akun={2 * args.accounts}  login={len(attempts)}  {len(attempts) / elapsed:.0f} login/s  "
+              f"rata-rata {elapsed / len(attempts) * 1000:.2f} ms (pencarian lama lower(username): {legacy_ms:.2f} ms)")
+    print("OK: login satu query lewat index username_lower.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark login bersamaan (awal shift): pool hash password vs hashing di thread request.
+
+Sekelompok thread login bersamaan dengan password hash sungguhan (PASSWORD_HASH_METHOD),
+sementara satu thread lain terus memanggil endpoint ringan dan mencatat latensinya.
+Dijalankan tiga kali: hashing langsung di thread request (PASSWORD_HASH_WORKERS=0),
+lewat pool dengan antrian cukup untuk semua login, dan lewat pool tanpa antrian.
+Yang diperiksa:
+- dengan pool, latensi endpoint lain tidak lebih buruk daripada hashing langsung (di luar derau PROBE_SLACK_MS);
+- login yang melebihi kapasitas pool + antrian ditolak 503 (bukan error/timeout);
+- password teks biasa dan hash dengan metode lama di-hash ulang setelah login berhasil.
+
+Memakai database file sementara karena login berjalan di banyak thread.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_login_concurrency
+    python -m benchmarks.bench_login_concurrency --logins 80 --workers 4
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks import database_url
+
+os.environ['DATABASE_URL'] = database_url(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}")
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import app, db
+from app.models import Admin, Supplier
+from app.passwords import PasswordHasher, is_password_hash, password_hasher
+
+PROBE_URL = '/api/get_data_supplier/1'
+# p95 probe hanya beberapa ms, jadi selisih di bawah ini dianggap derau penjadwal (terutama di mesin 1 CPU)
+PROBE_SLACK_MS = 5.0
+
+
+def use_hasher(workers, queue):
+    app.config.update(PASSWORD_HASH_WORKERS=workers, PASSWORD_HASH_QUEUE=queue)
+    app.extensions['password_hasher'] = PasswordHasher(app)
+
+def login(client, username, password):
+    return client.post('/api/login', json={"username": username, "password": password}).status_code
+
+def check_rehash():
+    """Supplier demo 'minuman' & 'snack' masih teks biasa; 'roti' diberi hash PBKDF2 berparameter lama."""
+    with app.app_context():
+        supplier = Supplier.query.filter_by(username='roti').one()
+        supplier.password = generate_password_hash('roti', 'pbkdf2:sha256:1000')
+        db.session.commit()
+        db.session.remove()
+    client = app.test_client()
+    for username in ('minuman', 'snack', 'roti'):
+        if login(client, username, 'salah') != 401:
+            raise SystemExit(f"password salah diterima untuk {username}")
+        if login(client, username, username) != 200:
+            raise SystemExit(f"login {username} gagal")
+    with app.app_context():
+        prefix = password_hasher(app).prefix
+        stored = dict(db.session.query(Supplier.username, Supplier.password).filter(Supplier.username.in_(('minuman', 'snack', 'roti'))))
+        db.session.remove()
+    stale = [u for u, p in stored.items() if not is_password_hash(p) or p.split('$', 1)[0] != prefix]
+    if stale:
+        raise SystemExit(f"password belum di-hash ulang: {stale}")
+    for username in stored:
+        if login(client, username, username) != 200:
+            raise SystemExit(f"login {username} gagal setelah hash ulang")
+    print(f"hash ulang: minuman, snack (teks biasa) dan roti (pbkdf2:sha256:1000) -> {prefix}")
+
+def burst(usernames, password):
+    """Semua login dimulai bersamaan; kembalikan (status per login, detik, latensi probe dalam ms)."""
+    statuses, probe_ms = [], []
+    start_gate = threading.Barrier(len(usernames) + 1)
+    done = threading.Event()
+
+    def worker(username):
+        client = app.test_client()
+        start_gate.wait()
+        statuses.append(login(client, username, password))
+
+    def probe():
+        client = app.test_client()
+        while not done.is_set():
+            t = time.perf_counter()
+            client.get(PROBE_URL)
+            probe_ms.append((time.perf_counter() - t) * 1000)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in usernames]
+    for thread in threads:
+        thread.start()
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    start_gate.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+    return statuses, elapsed, probe_ms
+
+def report(label, statuses, elapsed, probe_ms):
+    p95 = sorted(probe_ms)[max(0, int(len(probe_ms) * 0.95) - 1)]
+    print(f"{label:<28} login={len(statuses)}  200={statuses.count(200)}  503={statuses.count(503)}  "
+          f"waktu={elapsed:.2f} s  probe p50={statistics.median(probe_ms):.1f} ms p95={p95:.1f} ms")
+    unexpected = [s for s in statuses if s not in (200, 503)]
+    if unexpected:
+        raise SystemExit(f"{label}: status tidak terduga {sorted(set(unexpected))}")
+    return p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    seed = app.test_cli_runner().invoke(args=['seed-db', '--days', '3', '--lapaks', str(args.logins + 2), '--suppliers', '5', '--seed', '1'])
+    if seed.exit_code != 0:
+        raise SystemExit(f"seed-db gagal:\n{seed.output}")
+    with app.app_context():
+        # PJ lapak buatan (bukan demo) memakai password seed-db 'demo'
+        usernames = [u for (u,) in db.session.query(Admin.username).filter(Admin.username.like('pj%')).order_by(Admin.id)][:args.logins]
+        db.session.remove()
+
+    use_hasher(args.workers, args.logins)
+    check_rehash()
+
+    use_hasher(0, 0)
+    inline_p95 = report("langsung (tanpa pool)", *burst(usernames, 'demo'))
+
+    use_hasher(args.workers, args.logins)
+    statuses, elapsed, probe_ms = burst(usernames, 'demo')
+    pool_p95 = report(f"pool {args.workers} + antrian {args.logins}", statuses, elapsed, probe_ms)
+    if statuses.count(200) != len(usernames):
+        raise SystemExit("Dengan antrian cukup besar semua login harus berhasil")
+
+    # Tanpa antrian: hanya `workers` login yang bisa dikerjakan sekaligus, sisanya harus ditolak 503
+    use_hasher(args.workers, 0)
+    statuses, elapsed, probe_ms = burst(usernames, 'demo')
+    report(f"pool {args.workers} + antrian 0", statuses, elapsed, probe_ms)
+    if not statuses.count(503) or statuses.count(200) < args.workers:
+        raise SystemExit("Login di atas kapasitas pool + antrian seharusnya ditolak 503, yang lain berhasil")
+
+    if pool_p95 > inline_p95 + PROBE_SLACK_MS:
+        raise SystemExit(f"Latensi endpoint lain dengan pool ({pool_p95:.1f} ms) lebih buruk daripada tanpa pool "
+                         f"({inline_p95:.1f} ms + {PROBE_SLACK_MS:.0f} ms)")
+    print("OK: hashing password terbatas oleh pool, login berlebih ditolak 503, password lama di-hash ulang.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Benchmark jumlah query /api/get_data_owner terhadap jumlah supplier.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_owner_data
+"""
+import time
+
+from benchmarks.common import app, seed_master, capture_statements
+
+
+def measure(client):
+    with capture_statements() as statements:
+        start = time.perf_counter()
+        resp = client.get('/api/get_data_owner')
+        elapsed = time.perf_counter() - start
+    assert resp.status_code == 200, resp.get_json()
+    return len(statements), elapsed
+
+
+def main():
+    results = []
+    with app.app_context():
+        for n in (10, 100, 400):
+            seed_master(n)
+            with app.test_client() as client:
+                query_count, elapsed = measure(client)
+            results.append((n, query_count, elapsed))
+            print(f"suppliers={n:4d}  queries={query_count:3d}  waktu={elapsed * 1000:7.1f} ms")
+    counts = {query_count for _, query_count, _ in results}
+    if len(counts) != 1:
+        raise SystemExit(f"Jumlah query bertambah seiring jumlah supplier: {sorted(counts)}")
+    print("OK: jumlah query konstan.")
+
+
+if __name__ == '__main__':
+    main()
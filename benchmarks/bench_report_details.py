@@ -0,0 +1,164 @@
+"""Benchmark /api/get_report_details: arsip laporan terkonfirmasi vs menyusun ulang dari join.
+
+Yang diperiksa:
+- laporan terkonfirmasi yang sudah terarsip dilayani dengan satu query (primary key),
+  begitu juga revalidasi If-None-Match -> 304, dengan strong ETag dari isi respons dan
+  Cache-Control no-cache (nama di dalamnya masih bisa diganti);
+- isi arsip sama dengan detail yang disusun ulang dari tabel laporan;
+- confirm_report langsung mengarsipkan laporannya;
+- mengganti nama supplier, lokasi lapak atau nama penanggung jawab hanya menghapus arsip
+  laporan yang memuat nama itu, dan detail berikutnya memakai nama baru;
+- arsip susulan tidak disimpan jika token versi berganti di antara baca dan simpan.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_report_details
+    python -m benchmarks.bench_report_details --suppliers 40 --days 14
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.common import app, db, capture_statements, seed_master, seed_reports
+from app.arsip_laporan import laporan_untuk_detail, simpan_arsip, susun_detail
+from app.cache import bump_versions, current_versions, SECTION_SUPPLIER
+from app.models import Admin, ArsipDetailLaporan, Lapak, LaporanHarian, LaporanHarianProduk, Product, Supplier
+
+
+def detail_url(report_id):
+    return f'/api/get_report_details/{report_id}'
+
+def archived_ids():
+    return {laporan_id for (laporan_id,) in db.session.query(ArsipDetailLaporan.laporan_id)}
+
+def time_requests(client, report_ids, runs=3):
+    timings = []
+    for _ in range(runs):
+        for report_id in report_ids:
+            t = time.perf_counter()
+            resp = client.get(detail_url(report_id))
+            timings.append((time.perf_counter() - t) * 1000)
+            if resp.status_code != 200:
+                raise SystemExit(f"detail laporan {report_id}: HTTP {resp.status_code}")
+    return statistics.median(timings)
+
+def check_archived(client, report_id):
+    with capture_statements() as statements:
+        resp = client.get(detail_url(report_id))
+    if len(statements) != 1:
+        raise SystemExit(f"detail terarsip memakai {len(statements)} query (harus 1)")
+    if not resp.headers.get('ETag', '').startswith('"'):
+        raise SystemExit(f"ETag arsip harus strong, dapat {resp.headers.get('ETag')!r}")
+    if resp.headers.get('Cache-Control') != 'private, no-cache':
+        raise SystemExit(f"detail terarsip harus selalu direvalidasi, dapat Cache-Control {resp.headers.get('Cache-Control')!r}")
+    with capture_statements() as statements:
+        revalidated = client.get(detail_url(report_id), headers={'If-None-Match': resp.headers['ETag']})
+    if revalidated.status_code != 304 or len(statements) != 1:
+        raise SystemExit(f"revalidasi arsip: HTTP {revalidated.status_code}, {len(statements)} query")
+    return resp.json
+
+def check_rename(client, label, url, body, affected):
+    """Ganti nama lewat API setelah semua laporan terarsip; hanya arsip `affected` yang boleh hilang."""
+    for report_id in db.session.query(LaporanHarian.id).filter_by(status='Terkonfirmasi'):
+        client.get(detail_url(report_id[0]))
+    before = archived_ids()
+    resp = client.put(url, json=body)
+    if resp.status_code != 200:
+        raise SystemExit(f"{label}: HTTP {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+    removed = before - archived_ids()
+    if removed != affected:
+        raise SystemExit(f"{label}: arsip terhapus {sorted(removed)}, seharusnya {sorted(affected)}")
+    print(f"{label}: {len(removed)} dari {len(before)} arsip dihapus")
+
+def check_stale_guard():
+    report_id = db.session.query(LaporanHarian.id).order_by(LaporanHarian.id).first()[0]
+    db.session.query(ArsipDetailLaporan).filter_by(laporan_id=report_id).delete()
+    versions = current_versions()
+    report = laporan_untuk_detail(report_id)
+    data = susun_detail(report)
+    bump_versions(SECTION_SUPPLIER)  # seolah request lain mengganti nama di antara baca dan simpan
+    simpan_arsip(report, data, versions)
+    if db.session.get(ArsipDetailLaporan, report_id) is not None:
+        raise SystemExit("arsip tersimpan walau token versi sudah berganti")
+    simpan_arsip(report, data, current_versions())
+    if db.session.get(ArsipDetailLaporan, report_id) is None:
+        raise SystemExit("arsip tidak tersimpan dengan token versi terbaru")
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suppliers', type=int, default=20)
+    parser.add_argument('--products', type=int, default=5, help="Produk per supplier")
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed_master(args.suppliers, args.products)
+        seed_reports(args.days)
+        client = app.test_client()
+        report_ids = [report_id for (report_id,) in db.session.query(LaporanHarian.id).order_by(LaporanHarian.id)]
+
+        # Laporan hasil seed belum terarsip: pembukaan pertama menyusun dari join lalu mengarsipkannya
+        live = {report_id: client.get(detail_url(report_id)).json for report_id in report_ids}
+        if archived_ids() != set(report_ids):
+            raise SystemExit("laporan terkonfirmasi yang dibuka seharusnya terarsip")
+        for report_id in report_ids:
+            if check_archived(client, report_id) != live[report_id]:
+                raise SystemExit(f"isi arsip laporan {report_id} berbeda dengan detail dari tabel laporan")
+        archived_ms = time_requests(client, report_ids)
+        # Pembanding: tabel arsip dikosongkan sebelum setiap putaran sehingga semua detail disusun ulang
+        timings = []
+        for _ in range(3):
+            db.session.query(ArsipDetailLaporan).delete()
+            db.session.commit()
+            timings.append(time_requests(client, report_ids, runs=1))
+        live_ms = statistics.median(timings)
+        print(f"laporan={len(report_ids)}  rincian/laporan={args.suppliers * args.products}  "
+              f"disusun ulang {live_ms:.2f} ms  dari arsip {archived_ms:.2f} ms")
+
+        # Laporan baru: arsip dibuat di transaksi confirm_report
+        lapak_id = db.session.query(Lapak.id).order_by(Lapak.id).first()[0]
+        pending = LaporanHarian(lapak_id=lapak_id, status='Menunggu Konfirmasi', total_pendapatan=0, total_biaya_supplier=0,
+                                total_produk_terjual=0, pendapatan_cash=0, pendapatan_qris=0, pendapatan_bca=0)
+        db.session.add(pending)
+        db.session.commit()
+        pending_id = pending.id
+        if client.post(f'/api/confirm_report/{pending_id}').status_code != 200:
+            raise SystemExit("confirm_report gagal")
+        if pending_id not in archived_ids():
+            raise SystemExit("confirm_report tidak mengarsipkan laporannya")
+        check_archived(client, pending_id)
+
+        supplier = Supplier.query.order_by(Supplier.id).first()
+        old_name = supplier.nama_supplier
+        with_supplier = {laporan_id for (laporan_id,) in db.session.query(LaporanHarianProduk.laporan_id).distinct()
+                         .join(Product, Product.id == LaporanHarianProduk.product_id).filter(Product.supplier_id == supplier.id)}
+        check_rename(client, "ganti nama supplier", f'/api/update_supplier/{supplier.id}', {
+            "nama_supplier": "Supplier Baru", "username": supplier.username, "kontak": supplier.kontak, "alamat": supplier.alamat,
+            "metode_pembayaran": supplier.metode_pembayaran, "nomor_rekening": supplier.nomor_rekening}, with_supplier)
+        details = client.get(detail_url(min(with_supplier))).json["data"]["rincian_per_supplier"]
+        if "Supplier Baru" not in details or old_name in details:
+            raise SystemExit("detail laporan masih memakai nama supplier lama")
+
+        lapak = db.session.get(Lapak, lapak_id)
+        of_lapak = {laporan_id for (laporan_id,) in db.session.query(LaporanHarian.id).filter_by(lapak_id=lapak_id)}
+        check_rename(client, "ganti lokasi lapak", f'/api/update_lapak/{lapak_id}',
+                     {"lokasi": "Lapak Baru", "user_id": lapak.user_id, "anggota_ids": [a.id for a in lapak.anggota]}, of_lapak)
+        if client.get(detail_url(pending_id)).json["data"]["lokasi"] != "Lapak Baru":
+            raise SystemExit("detail laporan masih memakai lokasi lapak lama")
+
+        admin = db.session.get(Admin, db.session.get(Lapak, lapak_id + 1).user_id)
+        of_admin = {laporan_id for (laporan_id,) in db.session.query(LaporanHarian.id).filter_by(lapak_id=lapak_id + 1)}
+        check_rename(client, "ganti nama penanggung jawab", f'/api/update_admin/{admin.id}', {
+            "nama_lengkap": "PJ Baru", "nik": admin.nik, "username": admin.username, "email": admin.email,
+            "nomor_kontak": admin.nomor_kontak}, of_admin)
+        if client.get(detail_url(min(of_admin))).json["data"]["penanggung_jawab"] != "PJ Baru":
+            raise SystemExit("detail laporan masih memakai nama penanggung jawab lama")
+
+        check_stale_guard()
+        db.session.remove()
+    print("OK: detail laporan terkonfirmasi satu query dari arsip, diarsipkan ulang setelah nama berubah.")
+
+
+if __name__ == '__main__':
+    main()
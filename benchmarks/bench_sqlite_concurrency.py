@@ -0,0 +1,142 @@
+"""Pembaca saat penulis memegang transaksi panjang: journal_mode DELETE vs WAL.
+
+Setiap peran berjalan di proses sendiri dengan koneksinya sendiri (tanpa berbagi
+GIL atau test client): satu proses penulis berulang kali membuka transaksi tulis
+besar (mengubah seluruh rincian laporan, seperti rebuild/impor data) dan
+menahannya HOLD detik sebelum commit, sementara beberapa proses pembaca memanggil
+endpoint baca lewat aplikasi. Dicatat p50/p95/p99 latensi pembaca dan jumlah request
+yang gagal dengan "database is locked" (request yang menunggu lock hanya sebagian kecil
+dari semua baca, jadi p99 dan jumlah gagal yang memperlihatkan blocking).
+
+Di mode DELETE penulis yang halaman cache-nya tumpah ke file memegang lock
+EXCLUSIVE sampai commit, jadi pembaca menunggu sampai busy_timeout lalu gagal;
+di WAL pembaca membaca snapshot terakhir tanpa menunggu.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_sqlite_concurrency
+    python -m benchmarks.bench_sqlite_concurrency --readers 4 --hold 2 --busy-timeout 1000
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ('DELETE', 'WAL')
+READ_URLS = ('/api/get_all_payment_history?limit=50', '/api/get_data_supplier/1', '/api/get_history_laporan/1')
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+# --- PERAN (masing-masing di proses terpisah) ---
+def seed():
+    from benchmarks.common import app, seed_master, seed_reports
+    with app.app_context():
+        seed_master(20, num_lapaks=5)
+        seed_reports(days=30)
+
+def writer(db_path, until, hold):
+    # Koneksi sqlite3 langsung: cache kecil agar halaman kotor tumpah ke file selama transaksi
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={os.environ['SQLITE_JOURNAL_MODE']}")
+    conn.execute("PRAGMA cache_size=10")
+    transactions = 0
+    while time.time() < until:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE laporan_harian_produk SET stok_awal = stok_awal + 1")
+        time.sleep(hold)
+        conn.execute("COMMIT")
+        transactions += 1
+        time.sleep(0.2)
+    print(json.dumps({"transactions": transactions}))
+
+def reader(start, until):
+    from benchmarks.common import app
+    latencies, locked, errors = [], 0, 0
+    with app.test_client() as client:
+        while time.time() < start:
+            time.sleep(0.01)
+        i = 0
+        while time.time() < until:
+            t = time.perf_counter()
+            resp = client.get(READ_URLS[i % len(READ_URLS)])
+            latencies.append((time.perf_counter() - t) * 1000)
+            if resp.status_code != 200:
+                if 'locked' in resp.get_data(as_text=True):
+                    locked += 1
+                else:
+                    errors += 1
+            i += 1
+    print(json.dumps({"latencies": latencies, "locked": locked, "errors": errors}))
+
+# --- ORKESTRASI ---
+def run_mode(mode, args):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", SQLITE_JOURNAL_MODE=mode,
+               SQLITE_BUSY_TIMEOUT=str(args.busy_timeout))
+    env.pop('BENCH_DATABASE_URL', None)  # khusus SQLite: proses anak harus memakai file di atas
+    module = [sys.executable, '-m', 'benchmarks.bench_sqlite_concurrency']
+    subprocess.run(module + ['--role', 'seed'], env=env, check=True)
+
+    # Semua proses mulai di detik yang sama setelah sempat import aplikasi
+    start = time.time() + 3
+    until = start + args.duration
+    procs = [subprocess.Popen(module + ['--role', 'writer', '--db-path', db_path, '--until', str(until), '--hold', str(args.hold)],
+                              env=env, stdout=subprocess.PIPE, text=True)]
+    procs += [subprocess.Popen(module + ['--role', 'reader', '--start', str(start), '--until', str(until)],
+                               env=env, stdout=subprocess.PIPE, text=True) for _ in range(args.readers)]
+    outputs = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            raise SystemExit(f"proses benchmark gagal (exit {proc.returncode})")
+        outputs.append(json.loads(out.strip().splitlines()[-1]))
+    writes, reads = outputs[0], outputs[1:]
+    latencies = [ms for r in reads for ms in r["latencies"]]
+    result = {"mode": mode, "requests": len(latencies), "p50": statistics.median(latencies), "p95": _percentile(latencies, 95), "p99": _percentile(latencies, 99),
+              "locked": sum(r["locked"] for r in reads), "errors": sum(r["errors"] for r in reads),
+              "transactions": writes["transactions"]}
+    print(f"journal_mode={mode:6s}  baca={result['requests']:5d}  p50={result['p50']:7.1f} ms  p95={result['p95']:7.1f} ms  p99={result['p99']:7.1f} ms  "
+          f"database is locked={result['locked']:4d}  error lain={result['errors']}  transaksi tulis={result['transactions']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--role', choices=('seed', 'writer', 'reader'))
+    parser.add_argument('--db-path')
+    parser.add_argument('--start', type=float)
+    parser.add_argument('--until', type=float)
+    parser.add_argument('--readers', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=8.0)
+    parser.add_argument('--hold', type=float, default=1.5, help="Detik penulis menahan transaksinya sebelum commit")
+    parser.add_argument('--busy-timeout', type=int, default=1000, help="SQLITE_BUSY_TIMEOUT (ms) untuk proses pembaca")
+    args = parser.parse_args()
+
+    if args.role == 'seed':
+        return seed()
+    if args.role == 'writer':
+        return writer(args.db_path, args.until, args.hold)
+    if args.role == 'reader':
+        return reader(args.start, args.until)
+
+    results = {mode: run_mode(mode, args) for mode in MODES}
+    wal, delete = results['WAL'], results['DELETE']
+    if wal['locked'] or wal['errors']:
+        raise SystemExit("WAL: pembaca tidak boleh gagal saat ada penulis")
+    if not delete['locked']:
+        raise SystemExit("DELETE: penulis tidak memblokir pembaca; perbesar --hold atau kecilkan --busy-timeout")
+    if wal['p99'] >= delete['p99']:
+        raise SystemExit("WAL seharusnya menurunkan p99 latensi pembaca dibanding DELETE")
+    print("OK: dengan WAL pembaca tidak menunggu transaksi tulis yang panjang.")
+
+
+if __name__ == '__main__':
+    main()
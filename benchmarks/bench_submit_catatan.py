@@ -0,0 +1,39 @@
+"""Benchmark /api/submit_catatan_harian dengan 200 baris produk (+ beberapa produk manual).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_submit_catatan
+"""
+import time
+
+from benchmarks.common import app, seed_master, capture_statements
+from app.models import Lapak, Product, LaporanHarianProduk, StokHarian
+
+NUM_LINES = 200
+NUM_MANUAL = 5
+
+
+def payload(lapak_id, products):
+    lines = [{"id": p.id, "stok_awal": 20, "stok_akhir": 5} for p in products[:NUM_LINES]]
+    lines += [{"id": None, "nama_produk": f"Manual {i}", "supplier_id": "manual", "stok_awal": 10, "stok_akhir": 2}
+              for i in range(NUM_MANUAL)]
+    return {"lapak_id": lapak_id, "rekap_pembayaran": {"cash": 0, "qris": 0, "bca": 0, "total": 0}, "products": lines}
+
+
+def main():
+    with app.app_context():
+        seed_master(NUM_LINES // 4 + 1, products_per_supplier=4, num_lapaks=2)
+        lapak_id = Lapak.query.first().id
+        data = payload(lapak_id, Product.query.order_by(Product.id).all())
+        with app.test_client() as client:
+            with capture_statements() as statements:
+                start = time.perf_counter()
+                resp = client.post('/api/submit_catatan_harian', json=data)
+                elapsed = time.perf_counter() - start
+        assert resp.status_code == 200, resp.get_json()
+        assert LaporanHarianProduk.query.count() == NUM_LINES + NUM_MANUAL
+        assert StokHarian.query.count() == NUM_LINES + NUM_MANUAL
+        print(f"baris={NUM_LINES + NUM_MANUAL}  statements={len(statements)}  waktu={elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
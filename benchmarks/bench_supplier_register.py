@@ -0,0 +1,129 @@
+"""Benchmark nomor register supplier: pratinjau konstan dan alokasi atomik saat add_supplier bersamaan.
+
+Yang diperiksa:
+- /api/get_next_supplier_reg_number hanya satu query (baca satu baris nomor_urut)
+  dan latensinya tidak bergantung pada jumlah supplier;
+- banyak add_supplier bersamaan (beberapa thread, database file) selalu
+  mendapat nomor register yang berbeda dan berurutan tanpa celah;
+- database lama tanpa baris nomor_urut melanjutkan dari nomor REG terbesar.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_supplier_register
+    python -m benchmarks.bench_supplier_register --suppliers 50000 --concurrent 40
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks import database_url
+
+os.environ['DATABASE_URL'] = database_url(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'register.db')}")
+
+from benchmarks.common import app, db, capture_statements
+from app.models import NomorUrut, Supplier
+from app.passwords import PasswordHasher
+from app.urutan import format_nomor_register
+
+PREVIEW_URL = '/api/get_next_supplier_reg_number'
+
+
+def seed_suppliers(count):
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(Supplier), [dict(nama_supplier=f"Supplier {i}", username=f"supplier{i:06d}", password="x",
+                                                  nomor_register=format_nomor_register(i)) for i in range(1, count + 1)])
+    db.session.commit()
+
+def upgrade_db():
+    result = app.test_cli_runner().invoke(args=['upgrade-db'])
+    if result.exit_code != 0:
+        raise SystemExit(f"upgrade-db gagal:\n{result.output}")
+
+def preview_ms(client, runs=200):
+    timings = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        resp = client.get(PREVIEW_URL)
+        timings.append((time.perf_counter() - t) * 1000)
+        if resp.status_code != 200:
+            raise SystemExit(f"pratinjau gagal: HTTP {resp.status_code}")
+    return statistics.median(timings)
+
+def check_preview(client, expected):
+    with capture_statements() as statements:
+        resp = client.get(PREVIEW_URL)
+    if resp.json["reg_number"] != expected:
+        raise SystemExit(f"pratinjau {resp.json['reg_number']}, seharusnya {expected}")
+    if len(statements) != 1:
+        raise SystemExit(f"pratinjau memakai {len(statements)} query (harus 1)")
+
+def add_concurrently(count):
+    results, start_gate = [], threading.Barrier(count)
+
+    def worker(i):
+        client = app.test_client()
+        start_gate.wait()
+        resp = client.post('/api/add_supplier', json={
+            "nama_supplier": f"Baru {i}", "username": f"baru{i}", "kontak": "08", "alamat": None,
+            "password": "baru", "password_confirm": "baru", "metode_pembayaran": "BCA", "nomor_rekening": "1"})
+        results.append((resp.status_code, resp.json.get("nomor_register")))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suppliers', type=int, default=20000)
+    parser.add_argument('--concurrent', type=int, default=20)
+    args = parser.parse_args()
+
+    # Hash murah agar yang terukur adalah alokasi nomornya
+    app.config.update(PASSWORD_HASH_METHOD='pbkdf2:sha256:1', PASSWORD_HASH_QUEUE=args.concurrent)
+    app.extensions['password_hasher'] = PasswordHasher(app)
+    client = app.test_client()
+    with app.app_context():
+        seed_suppliers(10)
+        db.session.remove()
+    upgrade_db()
+    small_ms = preview_ms(client)
+    with app.app_context():
+        seed_suppliers(args.suppliers)
+        # Database lama: belum ada baris nomor_urut, pratinjau & alokasi melanjutkan dari REG terbesar
+        if db.session.get(NomorUrut, 'register_supplier') is not None:
+            raise SystemExit("baris nomor_urut seharusnya belum ada")
+        db.session.remove()
+    upgrade_db()
+    with app.app_context():
+        check_preview(client, format_nomor_register(args.suppliers + 1))
+        large_ms = preview_ms(client)
+        db.session.remove()
+    print(f"pratinjau: {small_ms:.2f} ms (10 supplier) vs {large_ms:.2f} ms ({args.suppliers} supplier)")
+    if large_ms > small_ms * 3:
+        raise SystemExit("Latensi pratinjau bertambah seiring jumlah supplier")
+
+    results, elapsed = add_concurrently(args.concurrent)
+    failed = [status for status, _ in results if status != 200]
+    if failed:
+        raise SystemExit(f"add_supplier gagal: {failed}")
+    numbers = sorted(nomor for _, nomor in results)
+    expected = [format_nomor_register(args.suppliers + i) for i in range(1, args.concurrent + 1)]
+    if numbers != expected:
+        raise SystemExit(f"nomor register tidak unik/berurutan: {numbers}")
+    with app.app_context():
+        check_preview(client, format_nomor_register(args.suppliers + args.concurrent + 1))
+        db.session.remove()
+    print(f"add_supplier bersamaan: {args.concurrent} supplier dalam {elapsed:.2f} s, {numbers[0]}..{numbers[-1]} tanpa bentrok")
+    print("OK: nomor register dialokasikan atomik, pratinjau satu query.")
+
+
+if __name__ == '__main__':
+    main()
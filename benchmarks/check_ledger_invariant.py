@@ -0,0 +1,182 @@
+"""Uji properti ledger: total rincian terkonfirmasi == saldo + pembayaran, tepat sampai rupiah.
+
+Untuk setiap seed, harga produk diacak lalu serangkaian operasi acak
+dijalankan lewat API: membuat catatan harian (termasuk produk manual milik
+supplier), mengkonfirmasi laporan, dan membayar supplier dengan nominal acak
+(termasuk pecahan seperti "1500.5" dan nominal melebihi tagihan). Setelah
+setiap operasi, untuk setiap supplier harus berlaku tanpa toleransi:
+
+    sum(total_harga_beli rincian terkonfirmasi) == saldo + sum(pembayaran)
+
+dan tabel ringkasan harus sama dengan ledger-nya. Semua nominal harus int.
+Ledger mutasi supplier juga diperiksa: jumlah mutasi == saldo berjalan,
+cek_ledger() tanpa selisih, dan saldo_pada() (snapshot + sisa mutasi) sama
+dengan penjumlahan seluruh mutasi sampai tanggal itu. Hari dianggap berganti
+setiap kali catatan dikirim (mutasi & snapshot digeser sehari ke belakang)
+dan sesekali snapshot kemarin dibuat.
+
+Jalankan dari root repo:
+    python -m benchmarks.check_ledger_invariant
+    python -m benchmarks.check_ledger_invariant --seeds 200 --ops 100
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks.common import app, db, seed_master
+from app.ledger import buat_snapshot, cek_ledger, saldo_pada
+from app.models import (Lapak, Product, StokHarian, Supplier, SupplierBalance, LaporanHarian, LaporanHarianProduk, PembayaranSupplier,
+                        RingkasanHarian, RingkasanPembayaranHarian, MutasiSupplier, SnapshotSaldoSupplier, sum_rupiah)
+
+
+def ledger_state():
+    """{supplier_id: (rincian terkonfirmasi, saldo, pembayaran, ringkasan biaya, ringkasan pembayaran)}"""
+    def by_supplier(query):
+        return dict(query.all())
+    rincian = by_supplier(db.session.query(Product.supplier_id, sum_rupiah(LaporanHarianProduk.total_harga_beli))
+                          .join(LaporanHarianProduk, LaporanHarianProduk.product_id == Product.id)
+                          .join(LaporanHarian, LaporanHarian.id == LaporanHarianProduk.laporan_id)
+                          .filter(LaporanHarian.status == 'Terkonfirmasi').group_by(Product.supplier_id))
+    saldo = by_supplier(db.session.query(SupplierBalance.supplier_id, SupplierBalance.balance))
+    bayar = by_supplier(db.session.query(PembayaranSupplier.supplier_id, sum_rupiah(PembayaranSupplier.jumlah_pembayaran))
+                        .group_by(PembayaranSupplier.supplier_id))
+    ringkas_biaya = by_supplier(db.session.query(RingkasanHarian.supplier_id, sum_rupiah(RingkasanHarian.biaya))
+                                .group_by(RingkasanHarian.supplier_id))
+    ringkas_bayar = by_supplier(db.session.query(RingkasanPembayaranHarian.supplier_id, sum_rupiah(RingkasanPembayaranHarian.jumlah_pembayaran))
+                                .group_by(RingkasanPembayaranHarian.supplier_id))
+    return {sid: (rincian.get(sid, 0), saldo.get(sid, 0), bayar.get(sid, 0), ringkas_biaya.get(sid, 0), ringkas_bayar.get(sid, 0))
+            for (sid,) in db.session.query(Supplier.id)}
+
+def check(seed, step, op):
+    errors = []
+    for sid, (rincian, saldo, bayar, ringkas_biaya, ringkas_bayar) in ledger_state().items():
+        where = f"seed {seed} langkah {step} ({op}) supplier {sid}"
+        if not all(isinstance(v, int) for v in (rincian, saldo, bayar, ringkas_biaya, ringkas_bayar)):
+            errors.append(f"{where}: nominal bukan int {(rincian, saldo, bayar)}")
+        if rincian != saldo + bayar:
+            errors.append(f"{where}: rincian {rincian} != saldo {saldo} + pembayaran {bayar}")
+        if ringkas_biaya != rincian or ringkas_bayar != bayar:
+            errors.append(f"{where}: ringkasan ({ringkas_biaya}, {ringkas_bayar}) != ledger ({rincian}, {bayar})")
+        if saldo < 0:
+            errors.append(f"{where}: saldo minus {saldo}")
+    errors.extend(check_mutasi(seed, step, op))
+    db.session.remove()
+    return errors
+
+def check_mutasi(seed, step, op):
+    _, problems = cek_ledger()
+    return [f"seed {seed} langkah {step} ({op}): cek_ledger {problem}" for problem in problems]
+
+def check_saldo_pada(seed):
+    """Di akhir seed: saldo_pada() setiap supplier di setiap tanggal mutasi == penjumlahan mutasi sampai tanggal itu."""
+    errors = []
+    mutasi = db.session.query(MutasiSupplier.supplier_id, MutasiSupplier.tanggal, MutasiSupplier.jumlah).all()
+    dates = sorted({tanggal for _, tanggal, _ in mutasi} | {datetime.date.today()})
+    for (sid,) in db.session.query(Supplier.id):
+        for tanggal in dates:
+            expected = sum(jumlah for s, t, jumlah in mutasi if s == sid and t <= tanggal)
+            saldo, _ = saldo_pada(sid, tanggal)
+            if saldo != expected:
+                errors.append(f"seed {seed} supplier {sid}: saldo_pada({tanggal}) {saldo} != jumlah mutasi {expected}")
+    db.session.remove()
+    return errors
+
+def next_day(rng):
+    """Semua mutasi & snapshot mundur sehari (hari berganti); kadang snapshot kemarin dibuat seperti cron harian."""
+    for model in (MutasiSupplier, SnapshotSaldoSupplier):
+        for row in model.query.order_by(model.tanggal):
+            row.tanggal -= datetime.timedelta(days=1)
+        db.session.flush()
+    if rng.random() < 0.5:
+        buat_snapshot(datetime.date.today() - datetime.timedelta(days=1))
+    db.session.commit()
+
+
+def random_nominal(rng, maximum):
+    """Nominal pembayaran acak dalam bentuk yang dikirim frontend: int, float, atau teks berpecahan."""
+    value = rng.uniform(1, max(2, maximum * 1.2))
+    return rng.choice([int(value), round(value, 2), f"{value:.1f}", str(int(value))])
+
+def run_seed(client, seed, ops):
+    rng = random.Random(seed)
+    seed_master(4, products_per_supplier=3, num_lapaks=3)
+    with app.app_context():
+        for product in Product.query:
+            product.harga_beli = rng.randrange(500, 25000, rng.choice([1, 50, 500]))
+            product.harga_jual = product.harga_beli + rng.randrange(0, 5000)
+        db.session.commit()
+        lapak_ids = [lid for (lid,) in db.session.query(Lapak.id)]
+        product_ids = {lid: [p.id for p in db.session.get(Lapak, lid).products] for lid in lapak_ids}
+        supplier_ids = [sid for (sid,) in db.session.query(Supplier.id)]
+        db.session.remove()
+
+    errors, day = [], 0
+    for step in range(ops):
+        op = rng.choice(['catatan', 'catatan', 'konfirmasi', 'konfirmasi', 'bayar'])
+        if op == 'catatan':
+            lapak_id = rng.choice(lapak_ids)
+            products = [{"id": pid, "stok_awal": rng.randint(0, 40), "stok_akhir": rng.randint(0, 10)}
+                        for pid in product_ids[lapak_id] if rng.random() < 0.8]
+            if rng.random() < 0.3:
+                products.append({"nama_produk": f"Manual {seed}-{step}", "supplier_id": rng.choice(supplier_ids + ['manual']),
+                                 "stok_awal": rng.randint(1, 10), "stok_akhir": 0})
+            resp = client.post('/api/submit_catatan_harian', json={
+                "lapak_id": lapak_id, "products": products,
+                "rekap_pembayaran": {"cash": rng.uniform(0, 1e5), "qris": str(rng.randint(0, 50000)), "bca": None, "total": "0"}})
+            if resp.status_code != 200:
+                errors.append(f"seed {seed} langkah {step}: submit_catatan_harian HTTP {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+            # Geser laporan & stok ke hari sebelumnya agar lapak yang sama bisa melapor lagi
+            with app.app_context():
+                day += 1
+                kemarin = datetime.date.today() - datetime.timedelta(days=day)
+                for model in (LaporanHarian, StokHarian):
+                    model.query.filter_by(tanggal=datetime.date.today()).update({model.tanggal: kemarin})
+                db.session.commit()
+                next_day(rng)
+                db.session.remove()
+        elif op == 'konfirmasi':
+            with app.app_context():
+                pending = [rid for (rid,) in db.session.query(LaporanHarian.id).filter_by(status='Menunggu Konfirmasi')]
+                db.session.remove()
+            if pending:
+                resp = client.post(f'/api/confirm_report/{rng.choice(pending)}')
+                if resp.status_code != 200:
+                    errors.append(f"seed {seed} langkah {step}: confirm_report HTTP {resp.status_code}")
+        else:
+            sid = rng.choice(supplier_ids)
+            with app.app_context():
+                saldo = db.session.query(SupplierBalance.balance).filter_by(supplier_id=sid).scalar() or 0
+                db.session.remove()
+            # Sesekali bayar tepat sebesar saldo (batas perbandingan tanpa toleransi)
+            jumlah = saldo if saldo and rng.random() < 0.2 else random_nominal(rng, saldo)
+            resp = client.post('/api/submit_pembayaran', json={"supplier_id": sid, "jumlah_pembayaran": jumlah})
+            if resp.status_code not in (200, 400):
+                errors.append(f"seed {seed} langkah {step}: submit_pembayaran HTTP {resp.status_code}")
+        with app.app_context():
+            errors.extend(check(seed, step, op))
+        if errors:
+            return errors
+    with app.app_context():
+        return check_saldo_pada(seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seeds', type=int, default=30)
+    parser.add_argument('--ops', type=int, default=60)
+    args = parser.parse_args()
+
+    errors = []
+    with app.app_context():
+        client = app.test_client()
+        for seed in range(args.seeds):
+            errors.extend(run_seed(client, seed, args.ops))
+            if errors:
+                break
+    if errors:
+        raise SystemExit("Invariant ledger dilanggar:\n  " + "\n  ".join(errors[:20]))
+    print(f"OK: {args.seeds} seed x {args.ops} operasi, rincian terkonfirmasi == saldo + pembayaran == ledger mutasi (tepat).")
+
+
+if __name__ == '__main__':
+    main()
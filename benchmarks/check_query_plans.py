@@ -0,0 +1,91 @@
+"""Pastikan setiap endpoint /api/get_* (dan ekspor berfilter) membaca tabel ledger lewat index.
+
+Setiap SELECT yang dijalankan endpoint diulang dengan EXPLAIN QUERY PLAN.
+Baris rencana "SCAN <tabel>" tanpa index pada tabel ledger (laporan,
+pembayaran dan tabel ringkasannya) dianggap full table scan.
+
+Jalankan dari root repo:
+    python -m benchmarks.check_query_plans
+"""
+import datetime
+import re
+
+from benchmarks.common import app, db, seed_master, seed_reports, capture_statements
+from app.models import LaporanHarian, Lapak, Supplier
+
+LEDGER_TABLES = ('laporan_harian', 'laporan_harian_produk', 'pembayaran_supplier',
+                 'ringkasan_harian', 'ringkasan_pembayaran_harian', 'mutasi_supplier', 'snapshot_saldo_supplier',
+                 'arsip_detail_laporan')
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+def endpoints():
+    today = datetime.date.today()
+    yesterday = (today - datetime.timedelta(days=1)).isoformat()
+    week_ago = (today - datetime.timedelta(days=7)).isoformat()
+    report_id = LaporanHarian.query.first().id
+    lapak_id = Lapak.query.first().id
+    supplier_id = Supplier.query.first().id
+    return [
+        '/api/get_data_owner',
+        '/api/get_next_supplier_reg_number',
+        f'/api/get_owner_supplier_history/{supplier_id}?start_date={week_ago}&end_date={yesterday}',
+        f'/api/get_laporan_pendapatan_harian?date={yesterday}',
+        f'/api/get_laporan_biaya_harian?date={yesterday}',
+        f'/api/get_laporan_harian?start_date={week_ago}&end_date={yesterday}',
+        f'/api/get_manage_reports?start_date={week_ago}&end_date={yesterday}',
+        f'/api/get_manage_reports?supplier_id={supplier_id}',
+        '/api/get_pembayaran_data',
+        f'/api/get_all_payment_history?start_date={week_ago}',
+        f'/api/get_chart_data?year={today.year}&month={today.month}',
+        f'/api/get_data_buat_catatan/{lapak_id}',
+        f'/api/get_history_laporan/{lapak_id}',
+        f'/api/get_data_supplier/{supplier_id}',
+        f'/api/get_supplier_history/{supplier_id}?start_date={week_ago}&lapak_id={lapak_id}',
+        f'/api/get_saldo_supplier/{supplier_id}?tanggal={yesterday}',
+        f'/api/get_mutasi_supplier/{supplier_id}?start_date={week_ago}',
+        f'/api/get_report_details/{report_id}',
+        f'/api/export/laporan?start_date={week_ago}&end_date={yesterday}',
+        f'/api/export/rincian_laporan?start_date={week_ago}&supplier_id={supplier_id}',
+        f'/api/export/pembayaran?start_date={week_ago}',
+    ]
+
+
+def full_scans(statement, parameters):
+    conn = db.session.connection()
+    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scans = []
+    for row in plan:
+        match = FULL_SCAN.match(row[-1])
+        if match and match.group(1) in LEDGER_TABLES:
+            scans.append(row[-1])
+    return scans
+
+
+def main():
+    failures = []
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            raise SystemExit("EXPLAIN QUERY PLAN hanya tersedia untuk SQLite.")
+        seed_master(5, num_lapaks=3)
+        seed_reports(days=7)
+        with app.test_client() as client:
+            for url in endpoints():
+                with capture_statements() as statements:
+                    resp = client.get(url, buffered=True)
+                if resp.status_code >= 400:
+                    failures.append(f"{url}: HTTP {resp.status_code}")
+                    continue
+                for statement, parameters in statements:
+                    if not statement.lstrip().upper().startswith('SELECT'):
+                        continue
+                    for scan in full_scans(statement, parameters):
+                        failures.append(f"{url}: {scan}")
+                print(f"diperiksa {url}")
+    if failures:
+        raise SystemExit("Full table scan ditemukan:\n  " + "\n  ".join(failures))
+    print("OK: semua endpoint memakai index pada tabel ledger.")
+
+
+if __name__ == '__main__':
+    main()
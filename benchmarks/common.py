@@ -0,0 +1,94 @@
+"""Utilitas bersama untuk skrip benchmark: seeding data dan pencatatan statement SQL."""
+import datetime
+import os
+from contextlib import contextmanager
+
+from benchmarks import database_url
+
+# Gunakan database in-memory agar penjualan.db tidak tersentuh (kecuali skrip sudah memilih
+# database sendiri); BENCH_DATABASE_URL selalu didahulukan
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ['DATABASE_URL'] = database_url(os.environ['DATABASE_URL'])
+# Job laporan dikerjakan langsung oleh skrip (run_next_job), bukan oleh thread worker di background
+os.environ.setdefault('JOB_WORKERS', '0')
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.ringkasan import rebuild_ringkasan
+from app.ledger import backfill_ledger
+from app.models import Admin, Supplier, Lapak, Product, SupplierBalance, LaporanHarian, LaporanHarianProduk, PembayaranSupplier
+
+app = create_app()
+
+
+def seed_master(num_suppliers, products_per_supplier=3, num_lapaks=5):
+    """Buat owner, lapak (beserta PJ) dan supplier dengan produknya."""
+    # Transaksi baca yang masih terbuka akan menahan DROP TABLE di Postgres
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    owner = Admin(nama_lengkap="Owner", nik="0", username="owner", email="owner@app.com", password="x")
+    db.session.add(owner)
+    lapaks = []
+    for i in range(num_lapaks):
+        pj = Admin(nama_lengkap=f"PJ {i}", nik=f"pj{i}", username=f"pj{i}", email=f"pj{i}@app.com", password="x")
+        lapak = Lapak(lokasi=f"Lapak {i}", penanggung_jawab=pj)
+        lapak.anggota = [pj]
+        lapaks.append(lapak)
+    db.session.add_all(lapaks)
+    for i in range(num_suppliers):
+        supplier = Supplier(nama_supplier=f"Supplier {i}", username=f"sup{i}", nomor_register=f"REG{i + 1:03d}",
+                            password="x", metode_pembayaran="BCA", nomor_rekening=f"{i:06d}")
+        supplier.balance = SupplierBalance(balance=0)
+        for j in range(products_per_supplier):
+            product = Product(nama_produk=f"Produk {i}-{j}", harga_beli=1000, harga_jual=1500)
+            product.lapaks = lapaks[:2]
+            supplier.products.append(product)
+        db.session.add(supplier)
+    db.session.commit()
+    db.session.remove()
+
+
+def seed_reports(days=7):
+    """Buat laporan harian terkonfirmasi untuk setiap lapak dan satu pembayaran per supplier."""
+    today = datetime.date.today()
+    lapaks = Lapak.query.all()
+    products = Product.query.all()
+    for i in range(days, 0, -1):
+        tanggal = today - datetime.timedelta(days=i)
+        for lapak in lapaks:
+            report = LaporanHarian(lapak_id=lapak.id, tanggal=tanggal, status='Terkonfirmasi',
+                                   total_pendapatan=0, total_biaya_supplier=0, total_produk_terjual=0,
+                                   pendapatan_cash=0, pendapatan_qris=0, pendapatan_bca=0)
+            for product in products:
+                report.rincian_produk.append(LaporanHarianProduk(
+                    product_id=product.id, stok_awal=10, stok_akhir=5, jumlah_terjual=5,
+                    total_harga_jual=5 * product.harga_jual, total_harga_beli=5 * product.harga_beli))
+                report.total_pendapatan += 5 * product.harga_jual
+                report.total_biaya_supplier += 5 * product.harga_beli
+                report.total_produk_terjual += 5
+            db.session.add(report)
+    for supplier in Supplier.query.all():
+        db.session.add(PembayaranSupplier(supplier_id=supplier.id, tanggal_pembayaran=today,
+                                          jumlah_pembayaran=1000, metode_pembayaran=supplier.metode_pembayaran))
+    db.session.commit()
+    rebuild_ringkasan()
+    backfill_ledger()
+    db.session.commit()
+    db.session.remove()
+
+
+@contextmanager
+def capture_statements():
+    """Kumpulkan (statement, parameters) setiap query yang dijalankan di dalam blok."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
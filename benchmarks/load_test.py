@@ -0,0 +1,118 @@
+"""Uji beban server produksi (wsgi.py) dengan jumlah worker yang berbeda.
+
+Database file sementara diisi lewat seed-db, lalu untuk setiap jumlah worker
+server dijalankan di proses terpisah dan dibebani beberapa proses klien
+(koneksi keep-alive) yang memanggil campuran endpoint baca owner, lapak dan
+supplier selama DURATION detik. Throughput idealnya naik seiring jumlah
+worker selama masih ada core CPU yang menganggur.
+
+Jalankan dari root repo:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --workers 1 2 4 8 --threads 4 --clients 16
+"""
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DURATION = 5.0
+SEED_ARGS = ['--days', '180', '--lapaks', '10', '--suppliers', '20', '--seed', '1']
+PATHS = [
+    '/api/get_data_owner',
+    '/api/get_manage_reports',
+    '/api/get_all_payment_history',
+    '/api/get_chart_data',
+    '/api/get_pembayaran_data',
+    '/api/get_history_laporan/1',
+    '/api/get_data_supplier/1',
+    '/api/get_supplier_history/1',
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"Server tidak merespons di port {port}")
+
+def client_loop(port, offset, duration):
+    """Satu klien: kirim request berurutan lewat satu koneksi keep-alive; kembalikan (latensi, gagal)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors, i = [], 0, offset
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', PATHS[i % len(PATHS)])
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        i += 1
+    conn.close()
+    return latencies, errors
+
+def run_level(env, workers, threads, clients):
+    port = _free_port()
+    server_env = dict(env, WEB_HOST='127.0.0.1', WEB_PORT=str(port), WEB_WORKERS=str(workers), WEB_THREADS=str(threads))
+    server = subprocess.Popen([sys.executable, 'wsgi.py'], env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(port)
+        with ProcessPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(client_loop, [port] * clients, range(clients), [DURATION] * clients))
+    finally:
+        # SIGTERM: gunicorn menyelesaikan request yang sedang berjalan sebelum berhenti
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(l for result in results for l in result[0])
+    errors = sum(result[1] for result in results)
+    if not latencies:
+        raise SystemExit(f"workers={workers}: tidak ada request yang berhasil ({errors} gagal)")
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    return len(latencies) / DURATION, latencies[len(latencies) // 2] * 1000, p95 * 1000, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'load.db')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'seed-db'] + SEED_ARGS,
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+
+    print(f"CPU={os.cpu_count()}  threads/worker={args.threads}  klien={args.clients}  durasi={DURATION:.0f} s")
+    baseline = None
+    for workers in args.workers:
+        rps, p50, p95, errors = run_level(env, workers, args.threads, args.clients)
+        baseline = baseline or rps
+        print(f"workers={workers:2d}  req/s={rps:8.1f}  ({rps / baseline:4.2f}x)  p50={p50:7.1f} ms  p95={p95:7.1f} ms  gagal={errors}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Jalankan semua skrip benchmark/pemeriksaan berurutan, opsional terhadap database lain.
+
+Tanpa argumen semua skrip memakai SQLite sementara seperti biasa. Dengan --database-url
+(atau BENCH_DATABASE_URL) setiap skrip memakai database itu, misalnya Postgres uji, supaya
+perilaku yang bergantung dialek (upsert ringkasan, UPDATE ... RETURNING, UPDATE saldo
+bersyarat, kolom BigInteger) ikut teruji. Semua tabel di database itu dihapus dan dibuat
+ulang: jangan arahkan ke database produksi.
+
+Skrip yang khusus SQLite (rencana query, journal mode) dilewati untuk dialek lain.
+
+Jalankan dari root repo:
+    python -m benchmarks.run_suite
+    python -m benchmarks.run_suite --database-url postgresql://postgres@localhost/penjualan_uji
+    python -m benchmarks.run_suite --only stress_ledger bench_jobs
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SUITE = (
+    'bench_endpoints', 'check_query_plans', 'bench_owner_data', 'stress_ledger', 'bench_submit_catatan',
+    'bench_jobs', 'bench_login', 'bench_login_concurrency', 'bench_supplier_register', 'bench_report_details',
+    'check_ledger_invariant',
+)
+# Benchmark beban yang lama; hanya dijalankan lewat --only
+EXTRA = ('bench_sqlite_concurrency', 'load_test')
+SQLITE_ONLY = ('check_query_plans', 'bench_sqlite_concurrency', 'load_test')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+                        help="URL database uji (default: BENCH_DATABASE_URL, atau SQLite sementara)")
+    parser.add_argument('--only', nargs='+', choices=SUITE + EXTRA, help="Hanya jalankan skrip ini")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop('BENCH_DATABASE_URL', None)
+    if args.database_url:
+        env['BENCH_DATABASE_URL'] = args.database_url
+    sqlite = not args.database_url or args.database_url.startswith('sqlite')
+
+    failed, names = [], args.only or SUITE
+    for name in names:
+        if name in SQLITE_ONLY and not sqlite:
+            print(f"=== {name}: dilewati (khusus SQLite)")
+            continue
+        print(f"=== {name}", flush=True)
+        t = time.perf_counter()
+        result = subprocess.run([sys.executable, '-m', f'benchmarks.{name}'], env=env)
+        status = "OK" if result.returncode == 0 else f"GAGAL (exit {result.returncode})"
+        print(f"=== {name}: {status} dalam {time.perf_counter() - t:.1f} s", flush=True)
+        if result.returncode != 0:
+            failed.append(name)
+
+    if failed:
+        raise SystemExit(f"gagal: {', '.join(failed)}")
+    print(f"OK: {len(names)} skrip selesai ({args.database_url or 'SQLite sementara'}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Uji beban konkuren confirm_report & submit_pembayaran terhadap invariant ledger.
+
+Beberapa thread mengkonfirmasi laporan yang sama secara bersamaan sambil thread
+lain mencatat pembayaran. Setiap lapak punya dua laporan per tanggal dan tabel
+ringkasan dikosongkan dulu, jadi konfirmasi dan pembayaran pertama bersamaan
+berebut baris ringkasan yang sama. Setelah selesai, untuk setiap supplier harus berlaku:
+
+    saldo == total biaya rincian laporan terkonfirmasi - total pembayaran
+
+setiap laporan hanya boleh dikonfirmasi sukses satu kali, dan tabel ringkasan
+harian (penjualan & pembayaran) harus sama dengan hasil hitung ulang dari
+rincian laporan terkonfirmasi dan tabel pembayaran.
+
+Jalankan dari root repo:
+    python -m benchmarks.stress_ledger
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import database_url
+
+# Thread butuh koneksi masing-masing, jadi gunakan file database sementara
+_db_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = database_url(f"sqlite:///{os.path.join(_db_dir, 'stress.db')}")
+
+from sqlalchemy.sql import func
+
+from benchmarks.common import app, db, seed_master, seed_reports
+from app.models import (LaporanHarian, LaporanHarianProduk, Product, SupplierBalance, PembayaranSupplier,
+                        RingkasanHarian, RingkasanPembayaranHarian, MutasiSupplier)
+from app.ringkasan import SUPPLIER_ID_RINGKASAN
+
+CONFIRMERS_PER_REPORT = 3
+PAYMENTS_PER_SUPPLIER = 20
+PAYMENT_AMOUNT = 40000
+
+
+def duplicate_reports():
+    """Laporan kedua untuk setiap lapak & tanggal (key ringkasan sama dengan laporan pertama)."""
+    columns = [c.key for c in LaporanHarian.__table__.columns if c.key != 'id']
+    for report in LaporanHarian.query.all():
+        copy = LaporanHarian(**{c: getattr(report, c) for c in columns})
+        copy.rincian_produk = [LaporanHarianProduk(product_id=item.product_id, stok_awal=item.stok_awal, stok_akhir=item.stok_akhir,
+                                                   jumlah_terjual=item.jumlah_terjual, total_harga_jual=item.total_harga_jual,
+                                                   total_harga_beli=item.total_harga_beli) for item in report.rincian_produk]
+        db.session.add(copy)
+
+def rollup_errors():
+    """Bandingkan tabel ringkasan dengan hasil agregasi ulang dari tabel mentah."""
+    errors = []
+    expected_sales = {(tanggal, lapak_id, sid): (pendapatan, biaya, terjual) for tanggal, lapak_id, sid, pendapatan, biaya, terjual in
+                      db.session.query(LaporanHarian.tanggal, LaporanHarian.lapak_id, SUPPLIER_ID_RINGKASAN,
+                                       func.sum(LaporanHarianProduk.total_harga_jual), func.sum(LaporanHarianProduk.total_harga_beli),
+                                       func.sum(LaporanHarianProduk.jumlah_terjual))
+                      .select_from(LaporanHarianProduk)
+                      .join(LaporanHarian, LaporanHarian.id == LaporanHarianProduk.laporan_id)
+                      .join(Product, Product.id == LaporanHarianProduk.product_id)
+                      .filter(LaporanHarian.status == 'Terkonfirmasi')
+                      .group_by(LaporanHarian.tanggal, LaporanHarian.lapak_id, SUPPLIER_ID_RINGKASAN)}
+    actual_sales = {(r.tanggal, r.lapak_id, r.supplier_id): (r.pendapatan, r.biaya, r.jumlah_terjual) for r in RingkasanHarian.query}
+    for key in expected_sales.keys() | actual_sales.keys():
+        if expected_sales.get(key) != actual_sales.get(key):
+            errors.append(f"ringkasan penjualan {key}: {actual_sales.get(key)} != {expected_sales.get(key)}")
+
+    expected_payments = dict(((tanggal, sid), total) for tanggal, sid, total in
+                             db.session.query(PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.supplier_id,
+                                              func.sum(PembayaranSupplier.jumlah_pembayaran))
+                             .group_by(PembayaranSupplier.tanggal_pembayaran, PembayaranSupplier.supplier_id))
+    actual_payments = {(r.tanggal, r.supplier_id): r.jumlah_pembayaran for r in RingkasanPembayaranHarian.query}
+    for key in expected_payments.keys() | actual_payments.keys():
+        if expected_payments.get(key) != actual_payments.get(key):
+            errors.append(f"ringkasan pembayaran {key}: {actual_payments.get(key)} != {expected_payments.get(key)}")
+    return errors
+
+
+def main():
+    with app.app_context():
+        seed_master(6, products_per_supplier=3, num_lapaks=4)
+        seed_reports(days=5)
+        # Jadikan semua laporan menunggu konfirmasi dan saldo awal tetap kecil
+        LaporanHarian.query.update({LaporanHarian.status: 'Menunggu Konfirmasi'})
+        SupplierBalance.query.update({SupplierBalance.balance: 2000})
+        for model in (PembayaranSupplier, RingkasanHarian, RingkasanPembayaranHarian, MutasiSupplier):
+            model.query.delete()
+        duplicate_reports()
+        db.session.commit()
+        report_ids = [r.id for r in LaporanHarian.query.all()]
+        supplier_ids = [b.supplier_id for b in SupplierBalance.query.all()]
+        db.session.remove()
+
+    results = {"confirm": [], "pay": []}
+    lock = threading.Lock()
+
+    def confirm(report_id):
+        with app.test_client() as client:
+            resp = client.post(f'/api/confirm_report/{report_id}')
+        with lock:
+            results["confirm"].append((report_id, resp.status_code))
+
+    def pay(supplier_id):
+        with app.test_client() as client:
+            resp = client.post('/api/submit_pembayaran', json={"supplier_id": supplier_id, "jumlah_pembayaran": PAYMENT_AMOUNT})
+        with lock:
+            results["pay"].append((supplier_id, resp.status_code))
+
+    jobs = [(confirm, rid) for rid in report_ids for _ in range(CONFIRMERS_PER_REPORT)]
+    jobs += [(pay, sid) for sid in supplier_ids for _ in range(PAYMENTS_PER_SUPPLIER)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for future in [pool.submit(fn, arg) for fn, arg in jobs]:
+            future.result()
+
+    errors = []
+    success_per_report = {}
+    for report_id, status in results["confirm"]:
+        if status == 500:
+            errors.append(f"confirm_report/{report_id} gagal dengan HTTP 500")
+        success_per_report[report_id] = success_per_report.get(report_id, 0) + (status == 200)
+    errors += [f"laporan {rid} dikonfirmasi {n} kali" for rid, n in success_per_report.items() if n != 1]
+    errors += [f"submit_pembayaran supplier {sid} gagal dengan HTTP 500" for sid, status in results["pay"] if status == 500]
+
+    with app.app_context():
+        credits = dict(db.session.query(Product.supplier_id, func.sum(LaporanHarianProduk.total_harga_beli))
+                       .join(Product, Product.id == LaporanHarianProduk.product_id)
+                       .join(LaporanHarian, LaporanHarian.id == LaporanHarianProduk.laporan_id)
+                       .filter(LaporanHarian.status == 'Terkonfirmasi')
+                       .group_by(Product.supplier_id).all())
+        debits = dict(db.session.query(PembayaranSupplier.supplier_id, func.sum(PembayaranSupplier.jumlah_pembayaran))
+                      .group_by(PembayaranSupplier.supplier_id).all())
+        for balance in SupplierBalance.query.all():
+            expected = 2000 + credits.get(balance.supplier_id, 0) - debits.get(balance.supplier_id, 0)
+            if balance.balance != expected:
+                errors.append(f"supplier {balance.supplier_id}: saldo {balance.balance} != {expected}")
+            if balance.balance < 0:
+                errors.append(f"supplier {balance.supplier_id}: saldo minus {balance.balance}")
+        errors += rollup_errors()
+
+    paid = sum(1 for _, status in results["pay"] if status == 200)
+    print(f"konfirmasi={len(results['confirm'])}  pembayaran sukses={paid}/{len(results['pay'])}")
+    if errors:
+        raise SystemExit("Invariant ledger dilanggar:\n  " + "\n  ".join(errors))
+    print("OK: saldo supplier dan tabel ringkasan konsisten dengan laporan & pembayaran.")
+
+
+if __name__ == '__main__':
+    main()
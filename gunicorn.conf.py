@@ -0,0 +1,6 @@
+# Konfigurasi gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+# Semua nilai dibaca dari environment WEB_* (lihat app/config.py).
+from app.config import config_from_env
+from app.server import gunicorn_options
+
+globals().update(gunicorn_options(config_from_env()))
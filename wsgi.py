@@ -0,0 +1,12 @@
+"""Entry point produksi.
+
+    python wsgi.py                          # launcher bawaan (pengaturan dari WEB_*)
+    gunicorn -c gunicorn.conf.py wsgi:app   # atau lewat CLI gunicorn
+"""
+from app import create_app
+from app.server import serve
+
+app = create_app()
+
+if __name__ == '__main__':
+    serve(app)